@@ -0,0 +1,40 @@
+"""add keyset pagination indexes
+
+Revision ID: 210a5ec12bb6
+Revises: e2fd3ff02cb0
+Create Date: 2026-10-18 09:12:40.118523
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "210a5ec12bb6"
+down_revision: str | Sequence[str] | None = "e2fd3ff02cb0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # (sort_key, id) btrees back the WHERE (k, id) > (...) ORDER BY k, id seeks
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shipments_created_at_id ON shipments (created_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shipments_planned_date_id "
+        "ON shipments (planned_delivery_date, id)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_shipments_status_id ON shipments (status, id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parcels_shipment_id_id ON parcels (shipment_id, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_parcels_shipment_id_id")
+    op.execute("DROP INDEX IF EXISTS ix_shipments_status_id")
+    op.execute("DROP INDEX IF EXISTS ix_shipments_planned_date_id")
+    op.execute("DROP INDEX IF EXISTS ix_shipments_created_at_id")
@@ -0,0 +1,33 @@
+"""add depot_id to shipments
+
+Revision ID: 3f7d2b8e9a14
+Revises: c41f8a2e6b19
+Create Date: 2026-10-18 18:40:12.518204
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f7d2b8e9a14"
+down_revision: str | Sequence[str] | None = "c41f8a2e6b19"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Depot responsible for the shipment (nearest to the recipient), set by batch assignment
+    op.add_column("shipments", sa.Column("depot_id", sa.Integer(), nullable=True))
+    op.create_foreign_key("fk_shipments_depot_id", "shipments", "depots", ["depot_id"], ["id"])
+    op.create_index("ix_shipments_depot_id", "shipments", ["depot_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_shipments_depot_id", table_name="shipments")
+    op.drop_constraint("fk_shipments_depot_id", "shipments", type_="foreignkey")
+    op.drop_column("shipments", "depot_id")
@@ -0,0 +1,38 @@
+"""add partial indexes for kpis
+
+Revision ID: 7b3e9c41d2a8
+Revises: 210a5ec12bb6
+Create Date: 2026-10-18 11:02:17.554210
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e9c41d2a8"
+down_revision: str | Sequence[str] | None = "210a5ec12bb6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # delivered_today: range scan over delivered rows only
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shipments_delivered_at_delivered "
+        "ON shipments (delivered_at) WHERE status = 'DELIVERED'"
+    )
+    # in_transit (optionally per service level) without touching delivered/created rows
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shipments_in_transit_service_level "
+        "ON shipments (service_level) WHERE status = 'IN_TRANSIT'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_shipments_in_transit_service_level")
+    op.execute("DROP INDEX IF EXISTS ix_shipments_delivered_at_delivered")
@@ -0,0 +1,121 @@
+"""add routes.stops_version bumped by triggers
+
+Revision ID: 8a1c5e7f0b32
+Revises: 3f7d2b8e9a14
+Create Date: 2026-10-18 19:05:41.274019
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a1c5e7f0b32"
+down_revision: str | Sequence[str] | None = "3f7d2b8e9a14"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Incremented whenever the route's stops or their address geometries change, so
+    # cached per-route results (route lengths) can be validated with one cheap read.
+    op.add_column(
+        "routes",
+        sa.Column("stops_version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_routes_date_depot", "routes", ["route_date", "depot_id"])
+    # Lets the addresses trigger find the routes that visit a moved address
+    op.create_index("ix_stops_address_id", "stops", ["address_id"])
+
+    # Statement-level triggers with transition tables: one UPDATE of each affected
+    # route per statement, however many stop rows it touched.
+    op.execute(
+        """
+        CREATE FUNCTION bump_route_stops_version_from_stops() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (SELECT route_id FROM new_rows);
+            ELSIF TG_OP = 'UPDATE' THEN
+                -- Ignore updates that do not move a stop (e.g. actual_time scans)
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (
+                    SELECT unnest(ARRAY[o.route_id, n.route_id])
+                    FROM old_rows o
+                    JOIN new_rows n ON n.id = o.id
+                    WHERE (o.route_id, o.sequence, o.address_id)
+                          IS DISTINCT FROM (n.route_id, n.sequence, n.address_id)
+                );
+            ELSE
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (SELECT route_id FROM old_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER stops_bump_route_version_ins AFTER INSERT ON stops
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_route_stops_version_from_stops()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER stops_bump_route_version_upd AFTER UPDATE ON stops
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_route_stops_version_from_stops()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER stops_bump_route_version_del AFTER DELETE ON stops
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_route_stops_version_from_stops()
+        """
+    )
+    # Only geometry changes matter; compared as WKB because geography "=" is not exact
+    op.execute(
+        """
+        CREATE FUNCTION bump_route_stops_version_from_addresses() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE routes SET stops_version = stops_version + 1
+            WHERE id IN (
+                SELECT s.route_id
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                JOIN stops s ON s.address_id = n.id
+                WHERE ST_AsBinary(o.geom) IS DISTINCT FROM ST_AsBinary(n.geom)
+            );
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER addresses_bump_route_version AFTER UPDATE ON addresses
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_route_stops_version_from_addresses()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS addresses_bump_route_version ON addresses")
+    op.execute("DROP FUNCTION IF EXISTS bump_route_stops_version_from_addresses()")
+    op.execute("DROP TRIGGER IF EXISTS stops_bump_route_version_del ON stops")
+    op.execute("DROP TRIGGER IF EXISTS stops_bump_route_version_upd ON stops")
+    op.execute("DROP TRIGGER IF EXISTS stops_bump_route_version_ins ON stops")
+    op.execute("DROP FUNCTION IF EXISTS bump_route_stops_version_from_stops()")
+    op.drop_index("ix_stops_address_id", table_name="stops")
+    op.drop_index("ix_routes_date_depot", table_name="routes")
+    op.drop_column("routes", "stops_version")
@@ -0,0 +1,39 @@
+"""add (parcel_id, event_time, id) index on tracking_events
+
+Revision ID: b6e4a1d9c370
+Revises: d5b9e2c4f871
+Create Date: 2026-10-18 20:41:55.203118
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e4a1d9c370"
+down_revision: str | Sequence[str] | None = "d5b9e2c4f871"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Backs WHERE parcel_id = ? AND (event_time, id) > (...) ORDER BY event_time, id LIMIT n
+    # (per-parcel pages and the per-parcel runs of the shipment timeline) without a sort.
+    # It covers every lookup of the (parcel_id, event_time) index, which is dropped.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tracking_events_parcel_time_id "
+        "ON tracking_events (parcel_id, event_time, id)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_tracking_events_parcel_time")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tracking_events_parcel_time "
+        "ON tracking_events (parcel_id, event_time)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_tracking_events_parcel_time_id")
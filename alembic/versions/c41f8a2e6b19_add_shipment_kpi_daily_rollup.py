@@ -0,0 +1,47 @@
+"""add shipment_kpi_daily rollup
+
+Revision ID: c41f8a2e6b19
+Revises: 7b3e9c41d2a8
+Create Date: 2026-10-18 12:20:45.901337
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f8a2e6b19"
+down_revision: str | Sequence[str] | None = "7b3e9c41d2a8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "shipment_kpi_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("service_level", sa.String(length=20), nullable=False),
+        sa.Column("shipments", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("on_time", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("day", "status", "service_level"),
+    )
+    # Initial backfill (same query as the rebuild command)
+    op.execute(
+        """
+        INSERT INTO shipment_kpi_daily (day, status, service_level, shipments, on_time)
+        SELECT CAST(created_at AS date), CAST(status AS varchar), service_level, COUNT(*),
+               SUM(COALESCE(status = 'DELIVERED' AND planned_delivery_date IS NOT NULL
+                            AND delivered_at < planned_delivery_date + 1, false)::int)
+        FROM shipments
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("shipment_kpi_daily")
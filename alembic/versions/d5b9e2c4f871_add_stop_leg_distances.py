@@ -0,0 +1,165 @@
+"""add stops.leg_m / cum_m maintained by triggers
+
+Revision ID: d5b9e2c4f871
+Revises: 8a1c5e7f0b32
+Create Date: 2026-10-18 19:32:08.610447
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5b9e2c4f871"
+down_revision: str | Sequence[str] | None = "8a1c5e7f0b32"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # leg_m: geography distance from the previous located stop (0 for the first one and
+    # for stops without geom); cum_m: running total along the route. NULL = not computed
+    # yet (existing rows until scripts/backfill_stop_legs.py has run).
+    op.add_column("stops", sa.Column("leg_m", sa.Double(), nullable=True))
+    op.add_column("stops", sa.Column("cum_m", sa.Double(), nullable=True))
+    op.execute("CREATE INDEX ix_stops_legs_pending ON stops (route_id) WHERE leg_m IS NULL")
+
+    # Rewrites only rows whose values change, so re-running it is cheap
+    op.execute(
+        """
+        CREATE FUNCTION recompute_route_legs(route_ids integer[]) RETURNS void
+        LANGUAGE sql AS $$
+            WITH located AS (
+                SELECT s.id,
+                       COALESCE(ST_Distance(a.geom, LAG(a.geom) OVER (
+                           PARTITION BY s.route_id ORDER BY s.sequence)), 0) AS leg_m
+                FROM stops s
+                JOIN addresses a ON a.id = s.address_id
+                WHERE s.route_id = ANY(route_ids) AND a.geom IS NOT NULL
+            ),
+            legs AS (
+                SELECT s.id,
+                       COALESCE(l.leg_m, 0) AS leg_m,
+                       SUM(COALESCE(l.leg_m, 0)) OVER (
+                           PARTITION BY s.route_id ORDER BY s.sequence) AS cum_m
+                FROM stops s
+                LEFT JOIN located l ON l.id = s.id
+                WHERE s.route_id = ANY(route_ids)
+            )
+            UPDATE stops s
+            SET leg_m = legs.leg_m, cum_m = legs.cum_m
+            FROM legs
+            WHERE s.id = legs.id
+              AND (s.leg_m, s.cum_m) IS DISTINCT FROM (legs.leg_m, legs.cum_m)
+        $$
+        """
+    )
+    # Same affected-route detection as before, now also recomputing their legs. The
+    # legs UPDATE re-fires the stops trigger but changes no route/sequence/address.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_route_stops_version_from_stops() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            ids integer[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(DISTINCT route_id) INTO ids FROM new_rows;
+            ELSIF TG_OP = 'UPDATE' THEN
+                -- Ignore updates that do not move a stop (e.g. actual_time scans)
+                SELECT array_agg(DISTINCT r) INTO ids
+                FROM (
+                    SELECT unnest(ARRAY[o.route_id, n.route_id]) AS r
+                    FROM old_rows o
+                    JOIN new_rows n ON n.id = o.id
+                    WHERE (o.route_id, o.sequence, o.address_id)
+                          IS DISTINCT FROM (n.route_id, n.sequence, n.address_id)
+                ) moved;
+            ELSE
+                SELECT array_agg(DISTINCT route_id) INTO ids FROM old_rows;
+            END IF;
+            IF ids IS NOT NULL THEN
+                UPDATE routes SET stops_version = stops_version + 1 WHERE id = ANY(ids);
+                PERFORM recompute_route_legs(ids);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_route_stops_version_from_addresses() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            ids integer[];
+        BEGIN
+            SELECT array_agg(DISTINCT s.route_id) INTO ids
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            JOIN stops s ON s.address_id = n.id
+            WHERE ST_AsBinary(o.geom) IS DISTINCT FROM ST_AsBinary(n.geom);
+            IF ids IS NOT NULL THEN
+                UPDATE routes SET stops_version = stops_version + 1 WHERE id = ANY(ids);
+                PERFORM recompute_route_legs(ids);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_route_stops_version_from_stops() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (SELECT route_id FROM new_rows);
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (
+                    SELECT unnest(ARRAY[o.route_id, n.route_id])
+                    FROM old_rows o
+                    JOIN new_rows n ON n.id = o.id
+                    WHERE (o.route_id, o.sequence, o.address_id)
+                          IS DISTINCT FROM (n.route_id, n.sequence, n.address_id)
+                );
+            ELSE
+                UPDATE routes SET stops_version = stops_version + 1
+                WHERE id IN (SELECT route_id FROM old_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_route_stops_version_from_addresses() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE routes SET stops_version = stops_version + 1
+            WHERE id IN (
+                SELECT s.route_id
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                JOIN stops s ON s.address_id = n.id
+                WHERE ST_AsBinary(o.geom) IS DISTINCT FROM ST_AsBinary(n.geom)
+            );
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute("DROP FUNCTION IF EXISTS recompute_route_legs(integer[])")
+    op.execute("DROP INDEX IF EXISTS ix_stops_legs_pending")
+    op.drop_column("stops", "cum_m")
+    op.drop_column("stops", "leg_m")
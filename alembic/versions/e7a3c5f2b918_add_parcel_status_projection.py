@@ -0,0 +1,52 @@
+"""add parcel_status projection (latest event per parcel)
+
+Revision ID: e7a3c5f2b918
+Revises: b6e4a1d9c370
+Create Date: 2026-10-18 21:27:13.540961
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c5f2b918"
+down_revision: str | Sequence[str] | None = "b6e4a1d9c370"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "parcel_status",
+        sa.Column("parcel_id", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("code", sa.String(length=32), nullable=False),
+        sa.Column("event_time", sa.DateTime(), nullable=False),
+        sa.Column("lat", sa.Double(), nullable=True),
+        sa.Column("lon", sa.Double(), nullable=True),
+        sa.Column("location_name", sa.String(length=100), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["parcel_id"], ["parcels.id"]),
+        sa.PrimaryKeyConstraint("parcel_id"),
+    )
+    # Initial backfill (same query as scripts/rebuild_parcel_status.py, in one range)
+    op.execute(
+        """
+        INSERT INTO parcel_status
+            (parcel_id, event_id, code, event_time, lat, lon, location_name, updated_at)
+        SELECT DISTINCT ON (parcel_id)
+               parcel_id, id, code, event_time, lat, lon, location_name,
+               now() AT TIME ZONE 'utc'
+        FROM tracking_events
+        ORDER BY parcel_id, event_time DESC, id DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("parcel_status")
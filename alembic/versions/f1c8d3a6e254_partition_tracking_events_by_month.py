@@ -0,0 +1,136 @@
+"""partition tracking_events by month on event_time
+
+Revision ID: f1c8d3a6e254
+Revises: e7a3c5f2b918
+Create Date: 2026-10-18 22:14:36.872045
+
+"""
+
+from typing import Union
+from collections.abc import Sequence
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c8d3a6e254"
+down_revision: str | Sequence[str] | None = "e7a3c5f2b918"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Months premade after the current one; later months come from
+# python -m app.services.tracking_partitions (TRACKING_PARTITION_MONTHS_AHEAD)
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, parcel_id, code, description, event_time, lat, lon, location_name"
+
+
+def _add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.execute(
+        "ALTER TABLE tracking_events ADD CONSTRAINT tracking_events_pkey "
+        "PRIMARY KEY (id, event_time)"
+    )
+    op.execute(
+        "ALTER TABLE tracking_events ADD CONSTRAINT tracking_events_parcel_id_fkey "
+        "FOREIGN KEY (parcel_id) REFERENCES parcels (id)"
+    )
+    op.execute("CREATE INDEX ix_tracking_events_code ON tracking_events (code)")
+    op.execute(
+        "CREATE INDEX ix_tracking_events_parcel_time_id "
+        "ON tracking_events (parcel_id, event_time, id)"
+    )
+
+
+def upgrade() -> None:
+    # The heap is swapped for a partitioned table of the same name and columns. Rows
+    # are copied inside this transaction (writers wait; disk briefly holds both
+    # copies), then the old table is dropped. Constraints and indexes are built after
+    # the copy, one per partition. The id sequence is kept, so ids continue. The
+    # primary key must include the partition key, so it becomes (id, event_time).
+    bind = op.get_bind()
+    first, current = bind.execute(
+        sa.text(
+            "SELECT CAST(date_trunc('month', min(event_time)) AS date), "
+            "CAST(date_trunc('month', now() AT TIME ZONE 'utc') AS date) FROM tracking_events"
+        )
+    ).one()
+    first = min(first or current, current)
+
+    op.execute("ALTER TABLE tracking_events RENAME TO tracking_events_legacy")
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE tracking_events (
+            id integer NOT NULL DEFAULT nextval('tracking_events_id_seq'),
+            parcel_id integer NOT NULL,
+            code varchar(32) NOT NULL,
+            description varchar(255),
+            event_time timestamp without time zone NOT NULL,
+            lat double precision,
+            lon double precision,
+            location_name varchar(100)
+        ) PARTITION BY RANGE (event_time)
+        """
+    )
+    month, last = first, _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE tracking_events_p{month:%Y%m} PARTITION OF tracking_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+        )
+        month = nxt
+    # Safety net for events outside every premade month; the maintenance command
+    # moves them into their month once it exists
+    op.execute("CREATE TABLE tracking_events_default PARTITION OF tracking_events DEFAULT")
+
+    op.execute(
+        f"INSERT INTO tracking_events ({COLUMNS}) SELECT {COLUMNS} FROM tracking_events_legacy"
+    )
+    op.execute("DROP TABLE tracking_events_legacy")
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY tracking_events.id")
+    _create_indexes()
+    op.execute("ANALYZE tracking_events")
+
+
+def downgrade() -> None:
+    # Back to one heap with the attached partitions' rows (detached ones stay as
+    # standalone tables and are not copied back).
+    op.execute("ALTER TABLE tracking_events RENAME TO tracking_events_partitioned")
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE tracking_events (
+            id integer NOT NULL DEFAULT nextval('tracking_events_id_seq'),
+            parcel_id integer NOT NULL,
+            code varchar(32) NOT NULL,
+            description varchar(255),
+            event_time timestamp without time zone NOT NULL,
+            lat double precision,
+            lon double precision,
+            location_name varchar(100)
+        )
+        """
+    )
+    op.execute(
+        f"INSERT INTO tracking_events ({COLUMNS}) SELECT {COLUMNS} FROM tracking_events_partitioned"
+    )
+    op.execute("DROP TABLE tracking_events_partitioned")
+    op.execute("ALTER SEQUENCE tracking_events_id_seq OWNED BY tracking_events.id")
+    op.execute("ALTER TABLE tracking_events ADD CONSTRAINT tracking_events_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE tracking_events ADD CONSTRAINT tracking_events_parcel_id_fkey "
+        "FOREIGN KEY (parcel_id) REFERENCES parcels (id)"
+    )
+    op.execute("CREATE INDEX ix_tracking_events_code ON tracking_events (code)")
+    op.execute(
+        "CREATE INDEX ix_tracking_events_parcel_time_id "
+        "ON tracking_events (parcel_id, event_time, id)"
+    )
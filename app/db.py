@@ -1,6 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
+from .pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
 from .settings import settings
 
 
@@ -10,11 +16,43 @@ class Base(DeclarativeBase):
     pass
 
 
+def _pool_options() -> dict:
+    """Pool sizing from settings (shared by the sync and async engines)."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+
+
 def get_engine():
     """Create a synchronous SQLAlchemy engine."""
-    return create_engine(settings.sqlalchemy_url, pool_pre_ping=True)
+    engine = create_engine(
+        settings.sqlalchemy_url, poolclass=InstrumentedQueuePool, **_pool_options()
+    )
+    instrument_engine(engine, "sync")
+    return engine
+
+
+def get_async_engine():
+    """Create an asyncpg-backed AsyncEngine."""
+    engine = create_async_engine(
+        settings.sqlalchemy_async_url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **_pool_options(),
+    )
+    instrument_engine(engine.sync_engine, "async")
+    return engine
 
 
 # Session factory for request-scoped sessions
 # TODO: wire it in routers later
 SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
+
+# Async session factory; objects stay usable after commit (no implicit lazy IO on the loop)
+AsyncSessionLocal = async_sessionmaker(
+    bind=get_async_engine(), autoflush=False, expire_on_commit=False
+)
@@ -1,8 +1,10 @@
 # Provides a request-scoped SQLAlchemy session for FastAPI routers.
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
-from .db import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import AsyncSessionLocal, SessionLocal
 
 
 def get_db() -> Generator:
@@ -11,3 +13,8 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
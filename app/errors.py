@@ -12,6 +12,7 @@ class ErrorCode(str, Enum):
     UNAUTHORIZED = "unauthorized"
     FORBIDDEN = "forbidden"
     RATE_LIMITED = "rate_limited"
+    UNAVAILABLE = "service_unavailable"
     INTERNAL = "internal_error"
 
 
@@ -51,3 +52,10 @@ class NotFoundError(AppError):
 class ConflictError(AppError):
     def __init__(self, detail: str):
         super().__init__(status=409, code=ErrorCode.CONFLICT, title="Conflict", detail=detail)
+
+
+class ServiceUnavailableError(AppError):
+    def __init__(self, detail: str):
+        super().__init__(
+            status=503, code=ErrorCode.UNAVAILABLE, title="Service unavailable", detail=detail
+        )
@@ -0,0 +1,97 @@
+# Decoding of bulk request bodies (JSON array, NDJSON, CSV) into plain records.
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .errors import AppError, DomainValidationError, ErrorCode
+
+JSON_TYPES = {"application/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+
+class UnsupportedMediaTypeError(AppError):
+    def __init__(self, content_type: str | None):
+        super().__init__(
+            status=415,
+            code=ErrorCode.VALIDATION,
+            title="Unsupported media type",
+            detail=f"expected JSON array, NDJSON or CSV, got {content_type or 'none'}",
+        )
+
+
+def media_type(content_type: str | None) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def iter_records(body: bytes, content_type: str | None) -> Iterator[dict[str, Any] | Exception]:
+    """
+    Yield one dict per input record, in input order. A record that cannot be
+    decoded (bad NDJSON line) is yielded as the exception so callers can
+    report it against its row number instead of failing the whole upload.
+    The media type is checked eagerly; decoding happens lazily.
+    """
+    kind = media_type(content_type)
+    if kind in JSON_TYPES:
+        return _iter_json(body)
+    if kind in NDJSON_TYPES:
+        return _iter_ndjson(body)
+    if kind in CSV_TYPES:
+        return _iter_csv(body)
+    raise UnsupportedMediaTypeError(content_type)
+
+
+def _iter_json(body: bytes) -> Iterator[Any]:
+    try:
+        data = json.loads(body)
+    except ValueError as exc:
+        raise DomainValidationError(f"invalid JSON body: {exc}") from exc
+    if not isinstance(data, list):
+        raise DomainValidationError("expected a JSON array of objects")
+    yield from data
+
+
+def _decode(body: bytes, encoding: str = "utf-8") -> str:
+    try:
+        return body.decode(encoding)
+    except UnicodeDecodeError as exc:
+        raise DomainValidationError("body is not valid UTF-8") from exc
+
+
+def _iter_ndjson(body: bytes) -> Iterator[Any]:
+    for line in io.StringIO(_decode(body)):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield exc
+
+
+def _iter_csv(body: bytes) -> Iterator[dict[str, Any]]:
+    reader = csv.DictReader(io.StringIO(_decode(body, "utf-8-sig")))
+    for rec in reader:
+        # CSV has no null: empty cells mean "not provided"
+        yield {k: (v if v != "" else None) for k, v in rec.items() if k is not None}
+
+
+def iter_lines(chunks: Iterable[bytes], *, max_line_bytes: int) -> Iterator[bytes]:
+    """
+    Re-split arbitrary byte chunks into lines without buffering more than one
+    partial line. A line longer than `max_line_bytes` aborts the stream.
+    """
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in (*lines, pending):
+            if len(line) > max_line_bytes:
+                raise DomainValidationError(f"line exceeds {max_line_bytes} bytes")
+        yield from lines
+    if pending:
+        yield pending
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,8 +14,27 @@ from .logging_setup import configure_logging
 
 # Routers
 from .routers import addresses, analytics, geo, geo_optimize, parcels, shipments, tracking
+from .services.depot_index import depot_index
+from .services.tracking_buffer import tracking_buffer
 from .settings import settings
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers; drain them on shutdown."""
+    if settings.TRACKING_BUFFER_ENABLED:
+        await tracking_buffer.start()
+    if settings.DEPOT_INDEX_ENABLED:
+        await depot_index.start()
+    try:
+        yield
+    finally:
+        if settings.DEPOT_INDEX_ENABLED:
+            await depot_index.stop()
+        if settings.TRACKING_BUFFER_ENABLED:
+            await tracking_buffer.stop()
+
+
 # Keep using settings for title; read optional version/description safely
 app = FastAPI(
     title=settings.APP_NAME,
@@ -24,6 +44,7 @@ app = FastAPI(
         "APP_DESCRIPTION",
         "REST API for data-driven logistics: shipments, parcels, routes, geo & analytics.",
     ),
+    lifespan=lifespan,
 )
 
 
@@ -4,6 +4,7 @@ from datetime import date, datetime
 
 from geoalchemy2 import Geography
 from sqlalchemy import (
+    BigInteger,
     Date,
     DateTime,
     Double,
@@ -98,6 +99,8 @@ class Shipment(Base):
 
     sender_address_id: Mapped[int] = mapped_column(ForeignKey("addresses.id"))
     recipient_address_id: Mapped[int] = mapped_column(ForeignKey("addresses.id"))
+    # Nearest depot to the recipient; set by batch depot assignment
+    depot_id: Mapped[int | None] = mapped_column(ForeignKey("depots.id"), index=True)
 
     planned_delivery_date: Mapped[date | None] = mapped_column(Date)
     delivered_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -107,7 +110,7 @@ class Shipment(Base):
 
     sender: Mapped[Address] = relationship(foreign_keys=[sender_address_id])
     recipient: Mapped[Address] = relationship(foreign_keys=[recipient_address_id])
-    parcels: Mapped[list[Parcel]] = relationship(back_populates="shipment")
+    parcels: Mapped[list[Parcel]] = relationship(back_populates="shipment", order_by="Parcel.id")
 
 
 class Parcel(Base):
@@ -122,12 +125,29 @@ class Parcel(Base):
     volume_dm3: Mapped[float | None] = mapped_column(Double)
 
     shipment: Mapped[Shipment] = relationship(back_populates="parcels")
-    events: Mapped[list[TrackingEvent]] = relationship(back_populates="parcel")
+    events: Mapped[list[TrackingEvent]] = relationship(
+        back_populates="parcel", order_by="(TrackingEvent.event_time, TrackingEvent.id)"
+    )
 
 
 Index("ix_parcels_shipment_barcode", Parcel.shipment_id, Parcel.barcode, unique=True)
 
 
+class ShipmentKpiDaily(Base):
+    """
+    Rollup of shipments per creation day, current status and service level.
+    Maintained in the same transaction as every status change; see repositories/kpi.py.
+    """
+
+    __tablename__ = "shipment_kpi_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)  # shipments.created_at::date
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    service_level: Mapped[str] = mapped_column(String(20), primary_key=True)
+    shipments: Mapped[int] = mapped_column(BigInteger, default=0)
+    on_time: Mapped[int] = mapped_column(BigInteger, default=0)  # delivered on/before plan
+
+
 # ---------- Routes & stops ----------
 StopType = Enum("PICKUP", "DELIVERY", name="stop_type")
 
@@ -143,6 +163,8 @@ class Route(Base):
     driver_id: Mapped[int | None] = mapped_column(ForeignKey("drivers.id"))
     route_date: Mapped[date] = mapped_column(Date)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Bumped by DB triggers when the route's stops or their address geometries change
+    stops_version: Mapped[int] = mapped_column(BigInteger, server_default="0")
 
 
 class Stop(Base):
@@ -158,24 +180,64 @@ class Stop(Base):
     planned_time: Mapped[datetime | None] = mapped_column(DateTime)
     actual_time: Mapped[datetime | None] = mapped_column(DateTime)
     shipment_id: Mapped[int | None] = mapped_column(ForeignKey("shipments.id"))
+    # Maintained by DB triggers: distance from the previous located stop and running total
+    # (NULL until computed; see scripts/backfill_stop_legs.py)
+    leg_m: Mapped[float | None] = mapped_column(Double)
+    cum_m: Mapped[float | None] = mapped_column(Double)
 
 
 Index("ix_stops_route_seq", Stop.route_id, Stop.sequence, unique=True)
+Index("ix_stops_address_id", Stop.address_id)
+Index("ix_routes_date_depot", Route.route_date, Route.depot_id)
 
 
 # ---------- Tracking events ----------
 class TrackingEvent(Base):
-    """Event stream for a parcel (e.g., COLLECTED, IN_DEPOT, DELIVERED)."""
+    """
+    Event stream for a parcel (e.g., COLLECTED, IN_DEPOT, DELIVERED).
+    Range-partitioned by month on event_time (hence the (id, event_time) primary key);
+    partitions are managed by services/tracking_partitions.py.
+    """
 
     __tablename__ = "tracking_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (event_time)"}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     parcel_id: Mapped[int] = mapped_column(ForeignKey("parcels.id"))
     code: Mapped[str] = mapped_column(String(32), index=True)
     description: Mapped[str | None] = mapped_column(String(255))
-    event_time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    event_time: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow
+    )
     lat: Mapped[float | None] = mapped_column(Double)
     lon: Mapped[float | None] = mapped_column(Double)
     location_name: Mapped[str | None] = mapped_column(String(100))
 
     parcel: Mapped[Parcel] = relationship(back_populates="events")
+
+
+Index(
+    "ix_tracking_events_parcel_time_id",
+    TrackingEvent.parcel_id,
+    TrackingEvent.event_time,
+    TrackingEvent.id,
+)
+
+
+class ParcelStatus(Base):
+    """
+    Latest tracking event per parcel (greatest (event_time, event_id), so late arrivals
+    of older events do not win). Refreshed in the same transaction as every event
+    write; see repositories/parcel_status.py.
+    """
+
+    __tablename__ = "parcel_status"
+
+    parcel_id: Mapped[int] = mapped_column(ForeignKey("parcels.id"), primary_key=True)
+    event_id: Mapped[int] = mapped_column(Integer)  # tracking_events.id
+    code: Mapped[str] = mapped_column(String(32))
+    event_time: Mapped[datetime] = mapped_column(DateTime)
+    lat: Mapped[float | None] = mapped_column(Double)
+    lon: Mapped[float | None] = mapped_column(Double)
+    location_name: Mapped[str | None] = mapped_column(String(100))
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
@@ -0,0 +1,102 @@
+# Opaque keyset (cursor) pagination helpers shared by list endpoints.
+
+import base64
+import json
+from collections.abc import Callable, Sequence
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Select, or_, tuple_
+
+from .errors import DomainValidationError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort key name -> parser turning the JSON-encoded value back into a Python value
+KEY_PARSERS: dict[str, Callable[[Any], Any]] = {
+    "id": int,
+    "created_at": datetime.fromisoformat,
+    "event_time": datetime.fromisoformat,
+    "planned_delivery_date": date.fromisoformat,
+    "distance": float,
+}
+
+
+def encode_cursor(sort: str, key: Any, last_id: int) -> str:
+    """Encode the last row's (sort_key, id) as an opaque url-safe token."""
+    if isinstance(key, date | datetime):
+        key = key.isoformat()
+    raw = json.dumps([sort, key, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """Decode a cursor produced by `encode_cursor` for the same sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cur_sort, key, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if key is not None:
+            key = KEY_PARSERS[cur_sort](key)
+        last_id = int(last_id)
+    except (ValueError, TypeError, KeyError) as exc:
+        raise DomainValidationError("invalid cursor") from exc
+    if cur_sort != sort:
+        raise DomainValidationError(f"cursor was issued for sort={cur_sort}, not sort={sort}")
+    return key, last_id
+
+
+def apply_keyset(
+    stmt: Select,
+    sort_col,
+    id_col,
+    *,
+    after: tuple[Any, int] | None,
+    limit: int,
+    offset: int = 0,
+    nullable: bool = True,
+) -> Select:
+    """
+    Order by (sort_col, id) and seek past `after` with an index-friendly row comparison.
+    Ascending order puts NULL sort keys last (Postgres default), matching a btree on (k, id).
+    For a NOT NULL sort_col pass ``nullable=False``: the seek is then the bare row
+    comparison, which the planner can use as an index range bound (the ``OR k IS NULL``
+    branch would turn it into a filter), plus a redundant ``k >= key`` that lets
+    partitions ranged on k be pruned (row comparisons are not used for pruning).
+    """
+    if sort_col is id_col:
+        stmt = stmt.order_by(id_col)
+        if after is not None:
+            stmt = stmt.where(id_col > after[1])
+    else:
+        stmt = stmt.order_by(sort_col, id_col)
+        if after is not None:
+            key, last_id = after
+            if key is None:
+                stmt = stmt.where(sort_col.is_(None), id_col > last_id)
+            elif not nullable:
+                stmt = stmt.where(sort_col >= key, tuple_(sort_col, id_col) > tuple_(key, last_id))
+            else:
+                stmt = stmt.where(
+                    or_(tuple_(sort_col, id_col) > tuple_(key, last_id), sort_col.is_(None))
+                )
+    stmt = stmt.limit(limit)
+    if offset:
+        stmt = stmt.offset(offset)
+    return stmt
+
+
+def next_cursor(items: Sequence[Any], sort: str, limit: int) -> str | None:
+    """Cursor for the page after `items`, or None when this page was the last one."""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(sort, getattr(last, sort), last.id)
+
+
+def resolve_page(sort: str, cursor: str | None, offset: int) -> tuple[Any, int] | None:
+    """Validate cursor/offset combination and decode the cursor if present."""
+    if cursor is None:
+        return None
+    if offset:
+        raise DomainValidationError("use either cursor or offset, not both")
+    return decode_cursor(cursor, sort)
@@ -0,0 +1,70 @@
+# Prometheus telemetry for SQLAlchemy connection pools (exported on /metrics).
+
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"])
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"])
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Overflow connections currently in use", ["pool"])
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (includes new connects)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CONNECTION_AGE = Histogram(
+    "db_pool_connection_age_seconds",
+    "Age of DBAPI connections at checkout",
+    ["pool"],
+    buckets=(1, 10, 30, 60, 300, 900, 1800, 3600, 7200, 21600, 86400),
+)
+
+
+class _TimedCheckoutMixin:
+    """Observe how long `_do_get` blocks on the pool queue."""
+
+    metrics_label = "default"
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool=self.metrics_label).observe(time.perf_counter() - t0)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Attach pool gauges and age tracking to a (sync) engine."""
+    engine.pool.metrics_label = label
+
+    # Read through `engine.pool` so gauges follow a pool recreated by dispose()
+    POOL_SIZE.labels(pool=label).set_function(lambda: engine.pool.size())
+    POOL_CHECKED_OUT.labels(pool=label).set_function(lambda: engine.pool.checkedout())
+    POOL_OVERFLOW.labels(pool=label).set_function(lambda: max(engine.pool.overflow(), 0))
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        record.info["connected_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        connected_at = record.info.get("connected_at")
+        if connected_at is not None:
+            POOL_CONNECTION_AGE.labels(pool=label).observe(time.monotonic() - connected_at)
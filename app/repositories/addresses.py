@@ -1,18 +1,42 @@
-from collections.abc import Sequence
-from typing import Protocol
+from collections.abc import Iterable, Sequence
+from typing import Any, Protocol
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, text, update
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..pagination import apply_keyset
+from .bulk import copy_rows
+
+# Column order of rows passed to bulk_insert (after the leading input ordinal)
+BULK_COLUMNS = ("name", "line1", "line2", "city", "zip_code", "country_code", "lat", "lon")
+
+# Everything but geom: enough to build an AddressOut without a follow-up SELECT
+_RETURNING = [c for c in models.Address.__table__.columns if c.name != "geom"]
+
+
+def _with_geom(values: dict[str, Any]) -> dict[str, Any]:
+    """Add a geom expression computed from lat/lon by the database in the same statement."""
+    lat, lon = values.get("lat"), values.get("lon")
+    geom = None
+    if lat is not None and lon is not None:
+        geom = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+    return {**values, "geom": geom}
 
 
 class AddressRepository(Protocol):
     """Abstraction for persistence (Dependency Inversion)."""
 
     def create(self, db: Session, obj: models.Address) -> models.Address: ...
+    def insert(self, db: Session, values: dict[str, Any]) -> models.Address: ...
+    def update(
+        self, db: Session, address_id: int, values: dict[str, Any]
+    ) -> models.Address | None: ...
     def get(self, db: Session, address_id: int) -> models.Address | None: ...
-    def list(self, db: Session, *, limit: int, offset: int) -> Sequence[models.Address]: ...
+    def list(
+        self, db: Session, *, limit: int, offset: int, after: tuple[Any, int] | None = None
+    ) -> Sequence[models.Address]: ...
+    def bulk_insert(self, db: Session, rows: Iterable[Sequence]) -> Sequence[tuple[int, int]]: ...
 
 
 class SqlAlchemyAddressRepository:
@@ -24,9 +48,84 @@ class SqlAlchemyAddressRepository:
         db.refresh(obj)
         return obj
 
+    def insert(self, db: Session, values: dict[str, Any]) -> models.Address:
+        """INSERT ... RETURNING with geom set in the same statement; one commit."""
+        stmt = insert(models.Address).values(_with_geom(values)).returning(*_RETURNING)
+        row = db.execute(stmt).mappings().one()
+        db.commit()
+        # Detached row snapshot: nothing to expire, so no refresh SELECT on serialization
+        return models.Address(**row)
+
+    def update(self, db: Session, address_id: int, values: dict[str, Any]) -> models.Address | None:
+        """UPDATE ... RETURNING keeping geom in sync with lat/lon; one commit."""
+        stmt = (
+            update(models.Address)
+            .where(models.Address.id == address_id)
+            .values(_with_geom(values))
+            .returning(*_RETURNING)
+        )
+        row = db.execute(stmt).mappings().one_or_none()
+        db.commit()
+        return models.Address(**row) if row is not None else None
+
     def get(self, db: Session, address_id: int) -> models.Address | None:
         return db.get(models.Address, address_id)
 
-    def list(self, db: Session, *, limit: int, offset: int):
-        stmt = select(models.Address).limit(limit).offset(offset)
+    def list(self, db: Session, *, limit: int, offset: int, after: tuple[Any, int] | None = None):
+        stmt = apply_keyset(
+            select(models.Address),
+            models.Address.id,
+            models.Address.id,
+            after=after,
+            limit=limit,
+            offset=offset,
+        )
         return db.execute(stmt).scalars().all()
+
+    def bulk_insert(self, db: Session, rows: Iterable[Sequence]) -> Sequence[tuple[int, int]]:
+        """
+        COPY `(ord, *BULK_COLUMNS)` rows into a temp staging table, then move them into
+        `addresses` with geom computed in one set-based INSERT. Ids are drawn from the
+        sequence up front so the (ord, id) mapping is deterministic. One commit.
+        """
+        cols = ", ".join(BULK_COLUMNS)
+        db.execute(
+            text(
+                """
+                CREATE TEMP TABLE addresses_import (
+                    ord integer NOT NULL,
+                    id integer,
+                    name varchar(100),
+                    line1 varchar(255),
+                    line2 varchar(255),
+                    city varchar(100),
+                    zip_code varchar(20),
+                    country_code varchar(2),
+                    lat double precision,
+                    lon double precision
+                ) ON COMMIT DROP
+                """
+            )
+        )
+        copy_rows(db, "addresses_import", ("ord", *BULK_COLUMNS), rows)
+        db.execute(
+            text(
+                "UPDATE addresses_import "
+                "SET id = nextval(pg_get_serial_sequence('addresses', 'id'))"
+            )
+        )
+        db.execute(
+            text(
+                f"""
+                INSERT INTO addresses (id, {cols}, geom)
+                SELECT id, {cols},
+                       CASE WHEN lat IS NOT NULL AND lon IS NOT NULL
+                            THEN ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography
+                       END
+                FROM addresses_import
+                """
+            )
+        )
+        mapping = db.execute(text("SELECT ord, id FROM addresses_import ORDER BY ord")).all()
+        db.commit()
+        return [(o, i) for o, i in mapping]
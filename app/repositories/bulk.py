@@ -0,0 +1,46 @@
+# PostgreSQL COPY helpers for set-based bulk loads.
+
+import csv
+import io
+from collections.abc import Iterable, Sequence
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+COPY_NULL = r"\N"
+
+
+def _csv_chunk(rows: Iterable[Sequence]) -> io.StringIO:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for row in rows:
+        writer.writerow([COPY_NULL if v is None else v for v in row])
+    buf.seek(0)
+    return buf
+
+
+def copy_rows(
+    db: Session,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+    *,
+    chunk_size: int = 10_000,
+) -> int:
+    """
+    Stream `rows` into `table` with COPY FROM STDIN in chunks of `chunk_size`
+    (bounded memory). Runs on the session's connection, inside its transaction.
+    """
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    sql = (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN " f"WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+    total = 0
+    it = iter(rows)
+    try:
+        while chunk := list(islice(it, chunk_size)):
+            cursor.copy_expert(sql, _csv_chunk(chunk))
+            total += len(chunk)
+    finally:
+        cursor.close()
+    return total
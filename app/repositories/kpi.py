@@ -0,0 +1,137 @@
+# Transactional maintenance of the shipment_kpi_daily rollup.
+#
+# Every statement here only *adds deltas* inside the caller's transaction; the
+# caller commits together with the shipment change that caused it.
+
+from collections.abc import Iterable
+from datetime import date, datetime
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+_UPSERT = """
+    INSERT INTO shipment_kpi_daily (day, status, service_level, shipments, on_time)
+    SELECT day, status, service_level, SUM(shipments), SUM(on_time)
+    FROM deltas
+    GROUP BY day, status, service_level
+    ON CONFLICT (day, status, service_level) DO UPDATE
+    SET shipments = shipment_kpi_daily.shipments + EXCLUDED.shipments,
+        on_time = shipment_kpi_daily.on_time + EXCLUDED.on_time
+"""
+
+BUMP_SQL = text(
+    f"""
+    WITH deltas (day, status, service_level, shipments, on_time) AS (
+        VALUES (CAST(:day AS date), CAST(:status AS varchar), CAST(:service_level AS varchar),
+                1, 0)
+    )
+    {_UPSERT}
+    """
+)
+
+
+def _on_time(alias: str) -> str:
+    return (
+        f"COALESCE({alias}.status = 'DELIVERED' AND {alias}.planned_delivery_date IS NOT NULL "
+        f"AND {alias}.delivered_at < {alias}.planned_delivery_date + 1, false)::int"
+    )
+
+
+# Mark shipments delivered and move their counter from the old (status, on_time)
+# to the new one, in one statement. ``cur`` locks the rows and reads their current
+# version (FOR UPDATE waits for a concurrent delivery and then sees its result), so
+# two transactions delivering the same shipment cannot both move its counter. Rows
+# whose (status, on_time) bucket does not change emit no delta.
+MARK_DELIVERED_SQL = text(
+    f"""
+    WITH cur AS (
+        SELECT id, status, planned_delivery_date, delivered_at
+        FROM shipments
+        WHERE id IN :ids
+        ORDER BY id
+        FOR UPDATE
+    ),
+    changed AS (
+        UPDATE shipments AS s
+        SET status = 'DELIVERED', delivered_at = :now
+        FROM cur
+        WHERE cur.id = s.id
+        RETURNING CAST(s.created_at AS date) AS day, s.service_level,
+                  CAST(cur.status AS varchar) AS old_status,
+                  {_on_time("cur")} AS old_on_time,
+                  {_on_time("s")} AS new_on_time
+    ),
+    moved AS (
+        SELECT * FROM changed
+        WHERE old_status <> 'DELIVERED' OR old_on_time <> new_on_time
+    ),
+    deltas (day, status, service_level, shipments, on_time) AS (
+        SELECT day, old_status, service_level, -1, -old_on_time FROM moved
+        UNION ALL
+        SELECT day, 'DELIVERED', service_level, 1, new_on_time FROM moved
+    )
+    {_UPSERT}
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+REBUILD_SQL = [
+    text("LOCK TABLE shipments IN SHARE MODE"),  # block writers so the snapshot is exact
+    text("DELETE FROM shipment_kpi_daily"),
+    text(
+        f"""
+        INSERT INTO shipment_kpi_daily (day, status, service_level, shipments, on_time)
+        SELECT CAST(s.created_at AS date), CAST(s.status AS varchar), s.service_level,
+               COUNT(*), SUM({_on_time("s")})
+        FROM shipments AS s
+        GROUP BY 1, 2, 3
+        """
+    ),
+]
+
+READ_SQL = text(
+    """
+    SELECT service_level,
+           SUM(shipments) AS total,
+           COALESCE(SUM(shipments) FILTER (WHERE status = 'IN_TRANSIT'), 0) AS in_transit,
+           COALESCE(SUM(shipments) FILTER (WHERE status = 'DELIVERED'), 0) AS delivered,
+           SUM(on_time) AS on_time
+    FROM shipment_kpi_daily
+    WHERE (CAST(:date_from AS date) IS NULL OR day >= :date_from)
+      AND (CAST(:date_to AS date) IS NULL OR day <= :date_to)
+    GROUP BY service_level
+    HAVING SUM(shipments) <> 0
+    """
+)
+
+
+class SqlAlchemyKpiCounterRepository:
+    def bump_created(self, db: Session, *, day: date, status: str, service_level: str) -> None:
+        db.execute(BUMP_SQL, {"day": day, "status": status, "service_level": service_level})
+
+    def mark_delivered(self, db: Session, shipment_ids: Iterable[int], now: datetime) -> None:
+        ids = list(shipment_ids)
+        if ids:
+            db.execute(MARK_DELIVERED_SQL, {"ids": ids, "now": now})
+
+    def read(self, db: Session, *, date_from: date | None, date_to: date | None):
+        return db.execute(READ_SQL, {"date_from": date_from, "date_to": date_to}).all()
+
+    def rebuild(self, db: Session) -> None:
+        for stmt in REBUILD_SQL:
+            db.execute(stmt)
+        db.commit()
+
+
+class AsyncSqlAlchemyKpiCounterRepository:
+    async def bump_created(
+        self, db: AsyncSession, *, day: date, status: str, service_level: str
+    ) -> None:
+        await db.execute(BUMP_SQL, {"day": day, "status": status, "service_level": service_level})
+
+    async def mark_delivered(
+        self, db: AsyncSession, shipment_ids: Iterable[int], now: datetime
+    ) -> None:
+        ids = list(shipment_ids)
+        if ids:
+            await db.execute(MARK_DELIVERED_SQL, {"ids": ids, "now": now})
@@ -0,0 +1,121 @@
+# Transactional maintenance of the parcel_status projection (latest event per parcel).
+#
+# Statements run inside the caller's transaction, after its events are written, and
+# commit with them. The projection only moves forward: a conflicting row is replaced
+# only by a greater (event_time, event_id), so events arriving out of order, replays
+# and concurrent writers can never roll a parcel back to an older status.
+
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+
+_UPSERT = """
+    ON CONFLICT (parcel_id) DO UPDATE
+    SET event_id = EXCLUDED.event_id,
+        code = EXCLUDED.code,
+        event_time = EXCLUDED.event_time,
+        lat = EXCLUDED.lat,
+        lon = EXCLUDED.lon,
+        location_name = EXCLUDED.location_name,
+        updated_at = EXCLUDED.updated_at
+    WHERE (parcel_status.event_time, parcel_status.event_id)
+        < (EXCLUDED.event_time, EXCLUDED.event_id)
+"""
+
+_COLUMNS = "parcel_id, event_id, code, event_time, lat, lon, location_name, updated_at"
+
+# Latest event of each given parcel: a backward probe of ix_tracking_events_parcel_time_id
+# in each monthly partition, however many events the parcel has.
+REFRESH_SQL = text(
+    f"""
+    INSERT INTO parcel_status ({_COLUMNS})
+    SELECT p.id, e.id, e.code, e.event_time, e.lat, e.lon, e.location_name,
+           now() AT TIME ZONE 'utc'
+    FROM unnest(CAST(:parcel_ids AS integer[])) AS p(id)
+    CROSS JOIN LATERAL (
+        SELECT t.id, t.code, t.event_time, t.lat, t.lon, t.location_name
+        FROM tracking_events t
+        WHERE t.parcel_id = p.id
+        ORDER BY t.event_time DESC, t.id DESC
+        LIMIT 1
+    ) e
+    {_UPSERT}
+    """
+)
+
+# Replay of a parcel id range [lo, hi) from tracking_events (rebuild)
+REBUILD_RANGE_SQL = text(
+    f"""
+    INSERT INTO parcel_status ({_COLUMNS})
+    SELECT DISTINCT ON (parcel_id)
+           parcel_id, id, code, event_time, lat, lon, location_name, now() AT TIME ZONE 'utc'
+    FROM tracking_events
+    WHERE parcel_id >= :lo AND parcel_id < :hi
+    ORDER BY parcel_id, event_time DESC, id DESC
+    {_UPSERT}
+    """
+)
+
+RESET_SQL = text("TRUNCATE parcel_status")
+
+
+def _parcel_ids(parcel_ids: Iterable[int]) -> list[int]:
+    # Distinct (ON CONFLICT cannot touch a row twice) and sorted, so concurrent
+    # batches lock projection rows in the same order and cannot deadlock.
+    return sorted(set(parcel_ids))
+
+
+def _lookup_stmt(parcel_ids: Sequence[int], barcodes: Sequence[str]):
+    P, S = models.Parcel, models.ParcelStatus
+    conds = []
+    if parcel_ids:
+        conds.append(P.id.in_(parcel_ids))
+    if barcodes:
+        conds.append(P.barcode.in_(barcodes))
+    return (
+        select(
+            P.id.label("parcel_id"),
+            P.shipment_id,
+            P.barcode,
+            S.code,
+            S.event_time,
+            S.lat,
+            S.lon,
+            S.location_name,
+        )
+        .outerjoin(S, S.parcel_id == P.id)
+        .where(or_(*conds))
+        .order_by(P.id)
+    )
+
+
+class SqlAlchemyParcelStatusRepository:
+    def refresh(self, db: Session, parcel_ids: Iterable[int]) -> None:
+        ids = _parcel_ids(parcel_ids)
+        if ids:
+            db.execute(REFRESH_SQL, {"parcel_ids": ids})
+
+    def rebuild_range(self, db: Session, lo: int, hi: int) -> int:
+        """Replay the events of parcels lo <= id < hi. Caller commits."""
+        return db.execute(REBUILD_RANGE_SQL, {"lo": lo, "hi": hi}).rowcount
+
+    def reset(self, db: Session) -> None:
+        db.execute(RESET_SQL)
+        db.commit()
+
+    def lookup(self, db: Session, parcel_ids: Sequence[int], barcodes: Sequence[str]):
+        return db.execute(_lookup_stmt(parcel_ids, barcodes)).all()
+
+
+class AsyncSqlAlchemyParcelStatusRepository:
+    async def refresh(self, db: AsyncSession, parcel_ids: Iterable[int]) -> None:
+        ids = _parcel_ids(parcel_ids)
+        if ids:
+            await db.execute(REFRESH_SQL, {"parcel_ids": ids})
+
+    async def lookup(self, db: AsyncSession, parcel_ids: Sequence[int], barcodes: Sequence[str]):
+        return (await db.execute(_lookup_stmt(parcel_ids, barcodes))).all()
@@ -1,17 +1,34 @@
 from collections.abc import Sequence
-from typing import Protocol
+from typing import Any, Protocol
 
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..pagination import apply_keyset
+
+
+def _list_stmt(*, shipment_id: int | None, limit: int, offset: int, after: tuple[Any, int] | None):
+    stmt = select(models.Parcel)
+    if shipment_id:
+        stmt = stmt.where(models.Parcel.shipment_id == shipment_id)
+    return apply_keyset(
+        stmt, models.Parcel.id, models.Parcel.id, after=after, limit=limit, offset=offset
+    )
 
 
 class ParcelRepository(Protocol):
     def create(self, db: Session, obj: models.Parcel) -> models.Parcel: ...
     def get(self, db: Session, parcel_id: int) -> models.Parcel | None: ...
     def list(
-        self, db: Session, *, shipment_id: int | None, limit: int, offset: int
+        self,
+        db: Session,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        after: tuple[Any, int] | None = None,
     ) -> Sequence[models.Parcel]: ...
 
 
@@ -25,8 +42,51 @@ class SqlAlchemyParcelRepository:
     def get(self, db: Session, parcel_id: int) -> models.Parcel | None:
         return db.get(models.Parcel, parcel_id)
 
-    def list(self, db: Session, *, shipment_id: int | None, limit: int, offset: int):
-        stmt = select(models.Parcel).limit(limit).offset(offset)
-        if shipment_id:
-            stmt = stmt.where(models.Parcel.shipment_id == shipment_id)
+    def list(
+        self,
+        db: Session,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        after: tuple[Any, int] | None = None,
+    ):
+        stmt = _list_stmt(shipment_id=shipment_id, limit=limit, offset=offset, after=after)
         return db.execute(stmt).scalars().all()
+
+
+class AsyncParcelRepository(Protocol):
+    async def create(self, db: AsyncSession, obj: models.Parcel) -> models.Parcel: ...
+    async def get(self, db: AsyncSession, parcel_id: int) -> models.Parcel | None: ...
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        after: tuple[Any, int] | None = None,
+    ) -> Sequence[models.Parcel]: ...
+
+
+class AsyncSqlAlchemyParcelRepository:
+    async def create(self, db: AsyncSession, obj: models.Parcel) -> models.Parcel:
+        db.add(obj)
+        await db.commit()
+        await db.refresh(obj)
+        return obj
+
+    async def get(self, db: AsyncSession, parcel_id: int) -> models.Parcel | None:
+        return await db.get(models.Parcel, parcel_id)
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        after: tuple[Any, int] | None = None,
+    ):
+        stmt = _list_stmt(shipment_id=shipment_id, limit=limit, offset=offset, after=after)
+        return (await db.execute(stmt)).scalars().all()
@@ -0,0 +1,41 @@
+from collections.abc import Sequence
+from typing import Any, Protocol
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+class RouteRepository(Protocol):
+    def create_many(
+        self,
+        db: Session,
+        routes: Sequence[dict[str, Any]],
+        stops: Sequence[Sequence[dict[str, Any]]],
+    ) -> Sequence[int]: ...
+
+
+class SqlAlchemyRouteRepository:
+    def create_many(
+        self,
+        db: Session,
+        routes: Sequence[dict[str, Any]],
+        stops: Sequence[Sequence[dict[str, Any]]],
+    ) -> Sequence[int]:
+        """
+        Insert routes with one multi-row INSERT ... RETURNING id and all their stops
+        (``stops[i]`` belongs to ``routes[i]``) with one executemany. Caller commits.
+        """
+        if not routes:
+            return []
+        stmt = insert(models.Route).returning(models.Route.id, sort_by_parameter_order=True)
+        ids = db.execute(stmt, list(routes)).scalars().all()
+        rows = [
+            {**stop, "route_id": route_id}
+            for route_id, route_stops in zip(ids, stops, strict=True)
+            for stop in route_stops
+        ]
+        if rows:
+            db.execute(insert(models.Stop), rows)
+        return ids
@@ -1,10 +1,83 @@
 from collections.abc import Sequence
-from typing import Protocol
+from datetime import datetime
+from typing import Any, Protocol
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 
 from .. import models
+from ..pagination import apply_keyset
+
+SORT_COLUMNS = {
+    "id": models.Shipment.id,
+    "created_at": models.Shipment.created_at,
+    "planned_delivery_date": models.Shipment.planned_delivery_date,
+}
+
+
+# Sort keys that may be NULL; NULLs sort last (ascending), after every non-NULL key
+NULLABLE_SORTS = frozenset({"planned_delivery_date"})
+
+
+def _list_stmt(
+    *, status: str | None, limit: int, offset: int, sort: str, after: tuple[Any, int] | None
+):
+    """
+    Seeks are plain (k, id) row comparisons, usable as a range bound on the (k, id)
+    index. For a nullable key that covers the non-NULL segment only; `_null_segment`
+    tells the caller when to continue into the NULL one.
+    """
+    stmt = select(models.Shipment)
+    if status:
+        stmt = stmt.where(models.Shipment.status == status)
+    return apply_keyset(
+        stmt,
+        SORT_COLUMNS[sort],
+        models.Shipment.id,
+        after=after,
+        limit=limit,
+        offset=offset,
+        nullable=False,
+    )
+
+
+def _null_segment(
+    sort: str, after: tuple[Any, int] | None, got: int, limit: int
+) -> tuple[Any, int] | None:
+    """Cursor into the NULL-key rows when a non-NULL seek page came back short."""
+    if sort in NULLABLE_SORTS and after is not None and after[0] is not None and got < limit:
+        return (None, 0)
+    return None
+
+
+def _full_stmt(shipment_id: int):
+    """
+    Shipment with both addresses (joined), parcels and their events (one SELECT ... IN
+    each): three queries however many parcels. Anything else raises instead of lazy
+    loading, so an N+1 cannot creep in unnoticed.
+    """
+    return (
+        select(models.Shipment)
+        .where(models.Shipment.id == shipment_id)
+        .options(
+            joinedload(models.Shipment.sender),
+            joinedload(models.Shipment.recipient),
+            selectinload(models.Shipment.parcels).selectinload(models.Parcel.events),
+            raiseload("*"),
+        )
+    )
+
+
+# One statement for any number of rows: the pairs travel as two array parameters
+ASSIGN_DEPOTS_SQL = text(
+    """
+    UPDATE shipments AS s
+    SET depot_id = v.depot_id, updated_at = :now
+    FROM unnest(CAST(:ids AS integer[]), CAST(:depot_ids AS integer[])) AS v(id, depot_id)
+    WHERE s.id = v.id
+"""
+)
 
 
 class ShipmentRepository(Protocol):
@@ -12,9 +85,20 @@ class ShipmentRepository(Protocol):
 
     def create(self, db: Session, obj: models.Shipment) -> models.Shipment: ...
     def get(self, db: Session, shipment_id: int) -> models.Shipment | None: ...
+    def get_full(self, db: Session, shipment_id: int) -> models.Shipment | None: ...
     def list(
-        self, db: Session, *, status: str | None, limit: int, offset: int
+        self,
+        db: Session,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        after: tuple[Any, int] | None = None,
     ) -> Sequence[models.Shipment]: ...
+    def assign_depots(
+        self, db: Session, shipment_ids: Sequence[int], depot_ids: Sequence[int], now: datetime
+    ) -> int: ...
 
 
 class SqlAlchemyShipmentRepository:
@@ -29,8 +113,86 @@ class SqlAlchemyShipmentRepository:
     def get(self, db: Session, shipment_id: int) -> models.Shipment | None:
         return db.get(models.Shipment, shipment_id)
 
-    def list(self, db: Session, *, status: str | None, limit: int, offset: int):
-        stmt = select(models.Shipment).limit(limit).offset(offset)
-        if status:
-            stmt = stmt.where(models.Shipment.status == status)
-        return db.execute(stmt).scalars().all()
+    def get_full(self, db: Session, shipment_id: int) -> models.Shipment | None:
+        return db.execute(_full_stmt(shipment_id)).unique().scalar_one_or_none()
+
+    def list(
+        self,
+        db: Session,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        after: tuple[Any, int] | None = None,
+    ):
+        stmt = _list_stmt(status=status, limit=limit, offset=offset, sort=sort, after=after)
+        items = list(db.execute(stmt).scalars().all())
+        if nulls := _null_segment(sort, after, len(items), limit):
+            stmt = _list_stmt(
+                status=status, limit=limit - len(items), offset=0, sort=sort, after=nulls
+            )
+            items += db.execute(stmt).scalars().all()
+        return items
+
+    def assign_depots(
+        self, db: Session, shipment_ids: Sequence[int], depot_ids: Sequence[int], now: datetime
+    ) -> int:
+        """Set depot_id per shipment in one UPDATE; the caller commits."""
+        if not shipment_ids:
+            return 0
+        params = {"ids": list(shipment_ids), "depot_ids": list(depot_ids), "now": now}
+        return db.execute(ASSIGN_DEPOTS_SQL, params).rowcount
+
+
+class AsyncShipmentRepository(Protocol):
+    """Async counterpart of ShipmentRepository."""
+
+    async def create(self, db: AsyncSession, obj: models.Shipment) -> models.Shipment: ...
+    async def get(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None: ...
+    async def get_full(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None: ...
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        after: tuple[Any, int] | None = None,
+    ) -> Sequence[models.Shipment]: ...
+
+
+class AsyncSqlAlchemyShipmentRepository:
+    """SQLAlchemy AsyncSession-backed repository."""
+
+    async def create(self, db: AsyncSession, obj: models.Shipment) -> models.Shipment:
+        db.add(obj)
+        await db.commit()
+        await db.refresh(obj)
+        return obj
+
+    async def get(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None:
+        return await db.get(models.Shipment, shipment_id)
+
+    async def get_full(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None:
+        return (await db.execute(_full_stmt(shipment_id))).unique().scalar_one_or_none()
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        after: tuple[Any, int] | None = None,
+    ):
+        stmt = _list_stmt(status=status, limit=limit, offset=offset, sort=sort, after=after)
+        items = list((await db.execute(stmt)).scalars().all())
+        if nulls := _null_segment(sort, after, len(items), limit):
+            stmt = _list_stmt(
+                status=status, limit=limit - len(items), offset=0, sort=sort, after=nulls
+            )
+            items += (await db.execute(stmt)).scalars().all()
+        return items
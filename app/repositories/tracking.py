@@ -1,15 +1,120 @@
 from collections.abc import Sequence
-from typing import Protocol
+from datetime import datetime
+from typing import Any, Protocol
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 
 from .. import models
+from ..pagination import apply_keyset
+from .bulk import copy_rows
+
+# Column order of rows passed to copy_events
+COPY_COLUMNS = ("parcel_id", "code", "description", "event_time", "lat", "lon", "location_name")
+
+
+def _events_page(
+    stmt,
+    *,
+    limit: int,
+    offset: int,
+    after: tuple[Any, int] | None,
+    since: datetime | None,
+    until: datetime | None,
+):
+    """
+    Keyset page in (event_time, id) order, optionally within [since, until). Bounds on
+    event_time (the window and the cursor) also prune the monthly partitions.
+    """
+    E = models.TrackingEvent
+    if since is not None:
+        stmt = stmt.where(E.event_time >= since)
+    if until is not None:
+        stmt = stmt.where(E.event_time < until)
+    return apply_keyset(
+        stmt, E.event_time, E.id, after=after, limit=limit, offset=offset, nullable=False
+    )
+
+
+def _parcel_events_stmt(
+    parcel_id: int,
+    *,
+    limit: int,
+    offset: int,
+    after: tuple[Any, int] | None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """One parcel's events in (event_time, id) order: a range scan of the parcel index."""
+    stmt = select(models.TrackingEvent).where(models.TrackingEvent.parcel_id == parcel_id)
+    return _events_page(stmt, limit=limit, offset=offset, after=after, since=since, until=until)
+
+
+def _shipment_timeline_stmt(
+    shipment_id: int,
+    *,
+    limit: int,
+    offset: int,
+    after: tuple[Any, int] | None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """
+    Events of all parcels of a shipment merged in (event_time, id) order.
+
+    Each parcel contributes at most one page of rows, read in order from the
+    (parcel_id, event_time, id) index by a LATERAL top-N; the outer ORDER BY ... LIMIT
+    merges those short runs. The work is bounded by parcels x page size, not by the
+    shipment's total number of events.
+    """
+    E, P = models.TrackingEvent, models.Parcel
+    per_parcel = _events_page(
+        select(E).where(E.parcel_id == P.id),
+        limit=limit + offset,
+        offset=0,
+        after=after,
+        since=since,
+        until=until,
+    ).lateral("e")
+    ev = aliased(E, per_parcel)
+    stmt = (
+        select(ev)
+        .select_from(P)
+        .join(per_parcel, true())
+        .where(P.shipment_id == shipment_id)
+        .order_by(ev.event_time, ev.id)
+        .limit(limit)
+    )
+    return stmt.offset(offset) if offset else stmt
 
 
 class TrackingRepository(Protocol):
     def create(self, db: Session, obj: models.TrackingEvent) -> models.TrackingEvent: ...
-    def list_for_parcel(self, db: Session, parcel_id: int) -> Sequence[models.TrackingEvent]: ...
+    def list_for_parcel(
+        self,
+        db: Session,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Sequence[models.TrackingEvent]: ...
+    def list_for_shipment(
+        self,
+        db: Session,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Sequence[models.TrackingEvent]: ...
+    def insert_many(self, db: Session, rows: Sequence[dict[str, Any]]) -> Sequence[int]: ...
+    def copy_events(self, db: Session, rows: Sequence[Sequence[Any]]) -> int: ...
 
 
 class SqlAlchemyTrackingRepository:
@@ -19,6 +124,113 @@ class SqlAlchemyTrackingRepository:
         db.refresh(obj)
         return obj
 
-    def list_for_parcel(self, db: Session, parcel_id: int):
-        stmt = select(models.TrackingEvent).where(models.TrackingEvent.parcel_id == parcel_id)
+    def list_for_parcel(
+        self,
+        db: Session,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        stmt = _parcel_events_stmt(
+            parcel_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+        return db.execute(stmt).scalars().all()
+
+    def list_for_shipment(
+        self,
+        db: Session,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        stmt = _shipment_timeline_stmt(
+            shipment_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
         return db.execute(stmt).scalars().all()
+
+    def insert_many(self, db: Session, rows: Sequence[dict[str, Any]]) -> Sequence[int]:
+        """Multi-row INSERT ... RETURNING id (ids in `rows` order). Caller commits."""
+        if not rows:
+            return []
+        stmt = insert(models.TrackingEvent).returning(
+            models.TrackingEvent.id, sort_by_parameter_order=True
+        )
+        return db.execute(stmt, list(rows)).scalars().all()
+
+    def copy_events(self, db: Session, rows: Sequence[Sequence[Any]]) -> int:
+        """COPY `COPY_COLUMNS`-ordered tuples into tracking_events. Caller commits."""
+        return copy_rows(db, "tracking_events", COPY_COLUMNS, rows, chunk_size=len(rows) or 1)
+
+
+class AsyncTrackingRepository(Protocol):
+    async def create(self, db: AsyncSession, obj: models.TrackingEvent) -> models.TrackingEvent: ...
+    async def list_for_parcel(
+        self,
+        db: AsyncSession,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Sequence[models.TrackingEvent]: ...
+    async def list_for_shipment(
+        self,
+        db: AsyncSession,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Sequence[models.TrackingEvent]: ...
+
+
+class AsyncSqlAlchemyTrackingRepository:
+    async def create(self, db: AsyncSession, obj: models.TrackingEvent) -> models.TrackingEvent:
+        db.add(obj)
+        await db.commit()
+        await db.refresh(obj)
+        return obj
+
+    async def list_for_parcel(
+        self,
+        db: AsyncSession,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        stmt = _parcel_events_stmt(
+            parcel_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+        return (await db.execute(stmt)).scalars().all()
+
+    async def list_for_shipment(
+        self,
+        db: AsyncSession,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        after: tuple[Any, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        stmt = _shipment_timeline_stmt(
+            shipment_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+        return (await db.execute(stmt)).scalars().all()
@@ -1,10 +1,13 @@
 # Minimal address endpoints so we can create addresses for shipments.
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from .. import schemas
 from ..deps import get_db
+from ..ingest import iter_records
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor
 from ..services.addresses import AddressesService
 
 router = APIRouter(prefix="/api/addresses", tags=["addresses"])
@@ -24,9 +27,27 @@ def create_address(payload: schemas.AddressIn, db: Session = Depends(get_db)):
     return service.create(db, payload)
 
 
+@router.post("/bulk", response_model=schemas.AddressBulkOut)
+async def bulk_create_addresses(request: Request, db: Session = Depends(get_db)):
+    """
+    Bulk import from a JSON array, NDJSON (application/x-ndjson) or CSV (text/csv, header row).
+    Valid rows are COPY-loaded with geom computed in-database; invalid rows are reported.
+    """
+    records = iter_records(await request.body(), request.headers.get("content-type"))
+    return await run_in_threadpool(service.bulk_create, db, records)
+
+
 @router.get("", response_model=list[schemas.AddressOut])
-def list_addresses(page: dict = Depends(pagination), db: Session = Depends(get_db)):
-    return service.list(db, **page)
+def list_addresses(
+    response: Response,
+    cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+    page: dict = Depends(pagination),
+    db: Session = Depends(get_db),
+):
+    items = service.list(db, cursor=cursor, **page)
+    if nxt := next_cursor(items, "id", page["limit"]):
+        response.headers[NEXT_CURSOR_HEADER] = nxt
+    return items
 
 
 @router.get("/{address_id}", response_model=schemas.AddressOut)
@@ -35,3 +56,15 @@ def get_address(address_id: int = Path(..., ge=1), db: Session = Depends(get_db)
     if not obj:
         raise HTTPException(404, "address not found")
     return obj
+
+
+@router.put("/{address_id}", response_model=schemas.AddressOut)
+def update_address(
+    payload: schemas.AddressIn,
+    address_id: int = Path(..., ge=1),
+    db: Session = Depends(get_db),
+):
+    obj = service.update(db, address_id, payload)
+    if not obj:
+        raise HTTPException(404, "address not found")
+    return obj
@@ -1,9 +1,12 @@
 # Simple operational KPIs.
 
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from ..deps import get_db
+from ..errors import DomainValidationError
 from ..services.analytics import AnalyticsService
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
@@ -11,5 +14,11 @@ service = AnalyticsService()
 
 
 @router.get("/kpis")
-def kpis(db: Session = Depends(get_db)):
-    return service.kpis(db)
+def kpis(
+    date_from: date | None = Query(None, alias="from", description="created_at >= this day"),
+    date_to: date | None = Query(None, alias="to", description="created_at <= this day"),
+    db: Session = Depends(get_db),
+):
+    if date_from and date_to and date_from > date_to:
+        raise DomainValidationError("'from' must not be after 'to'")
+    return service.kpis(db, date_from=date_from, date_to=date_to)
@@ -1,76 +1,264 @@
-# Geospatial endpoints using PostGIS geography functions.
+# Geospatial endpoints: PostGIS geography queries plus in-process geodesy.
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select, text
+from datetime import date
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import models
-from ..deps import get_db
+from .. import models, schemas
+from ..deps import get_async_db, get_db
+from ..errors import DomainValidationError
+from ..geodesy import Metric, distance as geodesic_distance, haversine, vincenty_scalar
+from ..pagination import NEXT_CURSOR_HEADER
+from ..services.depot_index import depot_index
+from ..services.distance_matrix import MATRIX_MEDIA_TYPE, DistanceMatrixService
+from ..services.geo_search import (
+    addresses_within_page,
+    addresses_within_stmt,
+    nearby_depots_payload,
+    nearby_depots_stmt,
+)
+from ..services.route_lengths import AsyncRouteLengthService, RouteLengthService
+from ..settings import settings
 
 router = APIRouter(prefix="/api/geo", tags=["geo"])
+matrix_service = DistanceMatrixService()
+lengths = RouteLengthService()
+async_lengths = AsyncRouteLengthService()
 
 
-@router.get("/nearest-depot")
-def nearest_depot(
-    lat: float = Query(..., description="WGS84 latitude"),
-    lon: float = Query(..., description="WGS84 longitude"),
-    db: Session = Depends(get_db),
-):
+def _nearest_depot_stmt(lat: float, lon: float):
     # Build point in WGS84
     pt = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
 
     # Join depots to their address geometries and compute distance in meters
-    stmt = (
+    return (
         select(models.Depot, func.ST_Distance(models.Address.geom, pt).label("distance_m"))
         .join(models.Address, models.Depot.address_id == models.Address.id)
         .where(models.Address.geom.is_not(None))
         .order_by("distance_m")
         .limit(1)
     )
-    row = db.execute(stmt).first()
+
+
+def _nearest_depot_payload(row) -> dict:
     if not row:
         raise HTTPException(404, "No depot with geometry found")
     depot, dist = row
     return {"depot": {"id": depot.id, "name": depot.name}, "distance_m": float(dist)}
 
 
+def _indexed_nearest_depot(lat: float, lon: float) -> dict:
+    # In-memory answer (same payload and WGS84 spheroid distance as the SQL path)
+    found = depot_index.nearest(lat, lon)
+    if not found:
+        raise HTTPException(404, "No depot with geometry found")
+    return found[0]
+
+
+if settings.use_async_db:
+
+    @router.get("/nearest-depot")
+    async def nearest_depot(
+        lat: float = Query(..., description="WGS84 latitude"),
+        lon: float = Query(..., description="WGS84 longitude"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        if depot_index.ready:
+            return _indexed_nearest_depot(lat, lon)
+        row = (await db.execute(_nearest_depot_stmt(lat, lon))).first()
+        return _nearest_depot_payload(row)
+
+    @router.get("/depots/nearby")
+    async def depots_nearby(
+        lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+        lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+        k: int = Query(5, ge=1, le=100, description="Number of depots"),
+        radius_m: float | None = Query(None, gt=0, description="Only depots within this radius"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        if depot_index.ready:
+            return depot_index.nearest(lat, lon, k, radius_m)
+        rows = (await db.execute(nearby_depots_stmt(lat, lon, k, radius_m))).all()
+        return nearby_depots_payload(rows)
+
+    @router.get("/addresses/within", response_model=list[schemas.AddressNearbyOut])
+    async def addresses_within(
+        response: Response,
+        lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+        lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+        radius_m: float = Query(..., gt=0, description="Search radius in metres"),
+        limit: int = Query(50, ge=1, le=200, description="Page size (max 200)"),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        stmt = addresses_within_stmt(lat, lon, radius_m, limit=limit, cursor=cursor)
+        items, nxt = addresses_within_page((await db.execute(stmt)).all(), limit)
+        if nxt:
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/route-length/{route_id}")
+    async def route_length(route_id: int, db: AsyncSession = Depends(get_async_db)):
+        return {"route_id": route_id, "meters": await async_lengths.length(db, route_id)}
+
+    @router.get("/route-legs/{route_id}")
+    async def route_legs(route_id: int, db: AsyncSession = Depends(get_async_db)):
+        return await async_lengths.legs(db, route_id)
+
+    @router.get("/route-lengths")
+    async def route_lengths(
+        route_date: date = Query(..., description="Routes operated on this day"),
+        depot_id: int | None = Query(None, description="Only this depot's routes"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        return await async_lengths.for_day(db, route_date, depot_id)
+
+else:
+
+    @router.get("/nearest-depot")
+    def nearest_depot(
+        lat: float = Query(..., description="WGS84 latitude"),
+        lon: float = Query(..., description="WGS84 longitude"),
+        db: Session = Depends(get_db),
+    ):
+        if depot_index.ready:
+            return _indexed_nearest_depot(lat, lon)
+        row = db.execute(_nearest_depot_stmt(lat, lon)).first()
+        return _nearest_depot_payload(row)
+
+    @router.get("/depots/nearby")
+    def depots_nearby(
+        lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+        lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+        k: int = Query(5, ge=1, le=100, description="Number of depots"),
+        radius_m: float | None = Query(None, gt=0, description="Only depots within this radius"),
+        db: Session = Depends(get_db),
+    ):
+        if depot_index.ready:
+            return depot_index.nearest(lat, lon, k, radius_m)
+        rows = db.execute(nearby_depots_stmt(lat, lon, k, radius_m)).all()
+        return nearby_depots_payload(rows)
+
+    @router.get("/addresses/within", response_model=list[schemas.AddressNearbyOut])
+    def addresses_within(
+        response: Response,
+        lat: float = Query(..., ge=-90, le=90, description="WGS84 latitude"),
+        lon: float = Query(..., ge=-180, le=180, description="WGS84 longitude"),
+        radius_m: float = Query(..., gt=0, description="Search radius in metres"),
+        limit: int = Query(50, ge=1, le=200, description="Page size (max 200)"),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        db: Session = Depends(get_db),
+    ):
+        stmt = addresses_within_stmt(lat, lon, radius_m, limit=limit, cursor=cursor)
+        items, nxt = addresses_within_page(db.execute(stmt).all(), limit)
+        if nxt:
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/route-length/{route_id}")
+    def route_length(route_id: int, db: Session = Depends(get_db)):
+        return {"route_id": route_id, "meters": lengths.length(db, route_id)}
+
+    @router.get("/route-legs/{route_id}")
+    def route_legs(route_id: int, db: Session = Depends(get_db)):
+        """Stored per-stop leg and cumulative distances (``stops.leg_m``/``cum_m``)."""
+        return lengths.legs(db, route_id)
+
+    @router.get("/route-lengths")
+    def route_lengths(
+        route_date: date = Query(..., description="Routes operated on this day"),
+        depot_id: int | None = Query(None, description="Only this depot's routes"),
+        db: Session = Depends(get_db),
+    ):
+        """Lengths of all routes of a day in one grouped query; unchanged routes from cache."""
+        return lengths.for_day(db, route_date, depot_id)
+
+
+# Pure computation: no session dependency, so no pool checkout. ``async def`` runs it on
+# the event loop (microseconds) instead of dispatching to the threadpool.
 @router.get("/distance")
-def distance(
-    from_lat: float,
-    from_lon: float,
-    to_lat: float,
-    to_lon: float,
-    db: Session = Depends(get_db),
+async def distance(
+    from_lat: float = Query(..., ge=-90, le=90),
+    from_lon: float = Query(..., ge=-180, le=180),
+    to_lat: float = Query(..., ge=-90, le=90),
+    to_lon: float = Query(..., ge=-180, le=180),
+    metric: Metric = Query("ellipsoidal", description="ellipsoidal (WGS84) or haversine"),
 ):
-    a = func.ST_SetSRID(func.ST_MakePoint(from_lon, from_lat), 4326)
-    b = func.ST_SetSRID(func.ST_MakePoint(to_lon, to_lat), 4326)
-    d = db.scalar(select(func.ST_Distance(a, b)))
-    return {"meters": float(d)}
-
-
-@router.get("/route-length/{route_id}")
-def route_length(route_id: int, db: Session = Depends(get_db)):
-    # Compute pairwise distances between consecutive stops, then sum in the outer query.
-    stmt = text(
-        """
-        WITH ordered AS (
-            SELECT s.sequence, a.geom
-            FROM stops s
-            JOIN addresses a ON a.id = s.address_id
-            WHERE s.route_id = :route_id
-              AND a.geom IS NOT NULL
-            ORDER BY s.sequence
-        ),
-        pairs AS (
-            SELECT sequence,
-                   geom,
-                   LAG(geom) OVER (ORDER BY sequence) AS prev_geom
-            FROM ordered
+    """
+    Distance in metres between two WGS84 points, computed in-process. ``ellipsoidal``
+    (Vincenty on WGS84) matches geography ``ST_Distance`` within 1 mm except for
+    nearly antipodal points, where it falls back to haversine (within 0.5%).
+    """
+    if metric == "ellipsoidal":
+        meters = vincenty_scalar(from_lat, from_lon, to_lat, to_lon)
+    else:
+        meters = float(haversine(from_lat, from_lon, to_lat, to_lon))
+    return {"meters": meters}
+
+
+@router.post("/distance/batch", response_class=ORJSONResponse)
+def distance_batch(payload: schemas.DistanceBatchIn):
+    """Distances in metres for many independent pairs, vectorized, in request order."""
+    if len(payload.pairs) > settings.GEO_DISTANCE_BATCH_MAX_PAIRS:
+        raise DomainValidationError(
+            f"batch exceeds {settings.GEO_DISTANCE_BATCH_MAX_PAIRS} pairs",
+            extra={"max_pairs": settings.GEO_DISTANCE_BATCH_MAX_PAIRS},
         )
-        SELECT COALESCE(SUM(ST_Distance(geom, prev_geom)), 0) AS total_m
-        FROM pairs
-        WHERE prev_geom IS NOT NULL
+    lat1, lon1, lat2, lon2 = np.array(payload.pairs, dtype=np.float64).T
+    meters = geodesic_distance(lat1, lon1, lat2, lon2, metric=payload.metric)
+    return ORJSONResponse({"metric": payload.metric, "meters": meters})
+
+
+@router.post(
+    "/matrix",
+    responses={200: {"content": {MATRIX_MEDIA_TYPE: {}}, "description": "JSON or float32 matrix"}},
+)
+def distance_matrix(
+    payload: schemas.DistanceMatrixIn, request: Request, db: Session = Depends(get_db)
+):
     """
+    Many-to-many distances in metres (origins x destinations; origins x origins when
+    destinations are omitted). ``mode=postgis`` runs one set-based geography
+    ST_Distance query; ``mode=engine`` computes in-process (``metric`` applies).
+    With ``Accept: application/octet-stream`` the matrix is streamed as float32
+    row-major bytes (shape in ``X-Matrix-Rows``/``X-Matrix-Cols``); otherwise JSON.
+    """
+    req = matrix_service.prepare(db, payload.origins, payload.destinations)
+    rows, cols = req.shape
+    binary = MATRIX_MEDIA_TYPE in request.headers.get("accept", "")
+    buffered = not binary or payload.mode == "postgis"
+    if buffered and rows * cols > settings.GEO_MATRIX_MAX_CELLS_BUFFERED:
+        raise DomainValidationError(
+            f"matrix too large for JSON / postgis mode ({rows}x{cols}); "
+            f"request {MATRIX_MEDIA_TYPE} with mode=engine",
+            extra={"max_cells": settings.GEO_MATRIX_MAX_CELLS_BUFFERED},
+        )
+
+    headers = {"X-Matrix-Rows": str(rows), "X-Matrix-Cols": str(cols)}
+    if binary:
+        headers["Content-Length"] = str(rows * cols * 4)
+        if payload.mode == "engine":
+            chunks = matrix_service.engine_chunks(req, payload.metric)
+        else:
+            chunks = matrix_service.chunks(matrix_service.postgis(db, req))
+        return StreamingResponse(chunks, media_type=MATRIX_MEDIA_TYPE, headers=headers)
+
+    if payload.mode == "engine":
+        matrix = matrix_service.engine(req, payload.metric)
+    else:
+        matrix = matrix_service.postgis(db, req)
+    return ORJSONResponse(
+        {
+            "rows": rows,
+            "cols": cols,
+            "mode": payload.mode,
+            "metric": payload.metric if payload.mode == "engine" else "spheroid",
+            "meters": matrix,
+        },
+        headers=headers,
     )
-    total = db.scalar(stmt, {"route_id": route_id}) or 0.0
-    return {"route_id": route_id, "meters": float(total)}
@@ -1,61 +1,83 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from .. import models
+from .. import schemas
 from ..deps import get_db
+from ..services.route_optimizer import RouteOptimizer, load_points
+from ..services.route_planner import RoutePlanningService
+from ..services.route_time_windows import TimeWindowOptimizer
+from ..settings import settings
 
 router = APIRouter(prefix="/api/geo", tags=["geo"])
+planner = RoutePlanningService()
 
 
 @router.post("/route/optimize")
-def optimize_route(address_ids: list[int], db: Session = Depends(get_db)):
+def optimize_route(
+    address_ids: list[int],
+    metric: Literal["haversine", "ellipsoidal"] = Query("haversine"),
+    max_ms: int = Query(200, ge=0, le=10_000, description="Local search budget; 0 disables"),
+    db: Session = Depends(get_db),
+):
     """
-    Demo nearest-neighbor route ordering using PostGIS ST_Distance on geography.
+    Nearest-neighbor route ordering over an in-memory distance matrix, improved by
+    2-opt / Or-opt / relocate local search within ``max_ms``.
     - Input: list of address IDs (must have geom set)
-    - Output: visiting order and total meters.
+    - Output: visiting order, total meters after and before local search, the distance
+      metric used and search statistics.
+    Coordinates are loaded in one query; ``metric=ellipsoidal`` uses WGS84
+    (matches PostGIS geography distances) at a higher CPU cost.
     """
     if not address_ids:
         raise HTTPException(status_code=400, detail="address_ids cannot be empty")
 
-    # Load only addresses that exist and have geom
-    rows = db.execute(
-        select(models.Address.id, models.Address.geom).where(
-            models.Address.id.in_(address_ids),
-            models.Address.geom.is_not(None),
-        )
-    ).all()
-
-    if len(rows) < 2:
+    # Load only addresses that exist and have geom (deduplicated, input order)
+    points = load_points(db, address_ids)
+    if len(points.ids) < 2:
         raise HTTPException(status_code=400, detail="need at least two addresses with geom")
 
-    # Map id -> geography(WKBElement)
-    pts: dict[int, object] = {rid: geom for rid, geom in rows}
-
-    # Start at the first given id that exists & has geom
-    start = next((aid for aid in address_ids if aid in pts), None)
-    if start is None:
-        raise HTTPException(status_code=400, detail="no valid address ids with geom found")
-
-    order: list[int] = [start]
-    remaining = [aid for aid in address_ids if aid in pts and aid != start]
-    total_meters: float = 0.0
-
-    # Greedy nearest-neighbor: from current -> nearest of remaining
-    while remaining:
-        current = order[-1]
-        dists = [
-            (
-                nxt,
-                db.scalar(select(func.ST_Distance(pts[current], pts[nxt]))) or 0.0,
-            )
-            for nxt in remaining
-        ]
-        nxt, d = min(dists, key=lambda x: x[1])
-        order.append(nxt)
-        remaining.remove(nxt)
-        total_meters += float(d)
-
-    return {"order": order, "total_meters": total_meters}
+    return RouteOptimizer(metric=metric).optimize(points, max_ms=max_ms)
+
+
+@router.post("/route/optimize/time-windows", response_model=schemas.TimeWindowRouteOut)
+def optimize_route_time_windows(payload: schemas.TimeWindowRouteIn, db: Session = Depends(get_db)):
+    """
+    Sequence stops with time windows and service durations from a start address,
+    minimising total lateness first and distance second, and return an ETA per stop.
+    Travel times use ``speed_kmh`` (default ``ROUTE_AVG_SPEED_KMH``).
+    """
+    ids = [payload.start_address_id, *(s.address_id for s in payload.stops)]
+    points = load_points(db, ids)
+    coords = dict(
+        zip(points.ids, zip(points.lats.tolist(), points.lons.tolist(), strict=True), strict=True)
+    )
+    missing = sorted(set(ids) - coords.keys())
+    if missing:
+        raise HTTPException(status_code=400, detail=f"addresses without geom: {missing}")
+
+    optimizer = TimeWindowOptimizer(
+        metric=payload.metric, speed_kmh=payload.speed_kmh or settings.ROUTE_AVG_SPEED_KMH
+    )
+    return optimizer.optimize(
+        coords[payload.start_address_id],
+        payload.stops,
+        [coords[s.address_id] for s in payload.stops],
+        payload.start_time,
+        max_ms=payload.max_ms,
+    )
+
+
+@router.post("/routes/plan", response_model=schemas.RoutePlanOut, status_code=201)
+def plan_routes(payload: schemas.RoutePlanIn, db: Session = Depends(get_db)):
+    """
+    Capacitated multi-vehicle planning for one depot and date.
+    Shipments (recipient address + summed parcel weight/volume) are split over the
+    depot's vehicles under both ``capacity_kg`` and ``capacity_dm3`` (sweep construction,
+    then intra- and inter-route local search within ``max_ms``) and persisted as
+    Route/Stop rows. Shipments that cannot be placed are listed in ``unassigned``.
+    """
+    return planner.plan(db, payload)
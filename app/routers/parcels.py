@@ -1,14 +1,18 @@
-# Parcels: list and create for an existing shipment.
+# Parcels: list and create for an existing shipment; latest-status lookup.
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import schemas
-from ..deps import get_db
-from ..services.parcels import ParcelsService
+from ..deps import get_async_db, get_db
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor
+from ..services.parcels import AsyncParcelsService, ParcelsService
+from ..settings import settings
 
 router = APIRouter(prefix="/api/parcels", tags=["parcels"])
 service = ParcelsService()
+async_service = AsyncParcelsService()
 
 
 def pagination(
@@ -19,23 +23,71 @@ def pagination(
     return {"limit": limit, "offset": offset}
 
 
-@router.post("", response_model=schemas.ParcelOut, status_code=201)
-def create_parcel(payload: schemas.ParcelIn, db: Session = Depends(get_db)):
-    return service.create(db, payload)
+if settings.use_async_db:
 
+    @router.post("", response_model=schemas.ParcelOut, status_code=201)
+    async def create_parcel(payload: schemas.ParcelIn, db: AsyncSession = Depends(get_async_db)):
+        return await async_service.create(db, payload)
 
-@router.get("", response_model=list[schemas.ParcelOut])
-def list_parcels(
-    shipment_id: int | None = Query(None),
-    page: dict = Depends(pagination),
-    db: Session = Depends(get_db),
-):
-    return service.list(db, shipment_id=shipment_id, **page)
+    @router.post("/status", response_model=schemas.ParcelStatusLookupOut)
+    async def lookup_status(
+        payload: schemas.ParcelStatusLookupIn, db: AsyncSession = Depends(get_async_db)
+    ):
+        return await async_service.lookup_status(db, payload)
+
+    @router.get("", response_model=list[schemas.ParcelOut])
+    async def list_parcels(
+        response: Response,
+        shipment_id: int | None = Query(None),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        page: dict = Depends(pagination),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        items = await async_service.list(db, shipment_id=shipment_id, cursor=cursor, **page)
+        if nxt := next_cursor(items, "id", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/{parcel_id}", response_model=schemas.ParcelOut)
+    async def get_parcel(
+        parcel_id: int = Path(..., ge=1), db: AsyncSession = Depends(get_async_db)
+    ):
+        obj = await async_service.get(db, parcel_id)
+        if not obj:
+            raise HTTPException(404, "parcel not found")
+        return obj
+
+else:
+
+    @router.post("", response_model=schemas.ParcelOut, status_code=201)
+    def create_parcel(payload: schemas.ParcelIn, db: Session = Depends(get_db)):
+        return service.create(db, payload)
+
+    @router.post("/status", response_model=schemas.ParcelStatusLookupOut)
+    def lookup_status(payload: schemas.ParcelStatusLookupIn, db: Session = Depends(get_db)):
+        """
+        Where are these parcels right now: last event code, time and location of each
+        parcel given by id or barcode, read from the parcel_status projection (one
+        query, no scan of tracking_events).
+        """
+        return service.lookup_status(db, payload)
 
+    @router.get("", response_model=list[schemas.ParcelOut])
+    def list_parcels(
+        response: Response,
+        shipment_id: int | None = Query(None),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        page: dict = Depends(pagination),
+        db: Session = Depends(get_db),
+    ):
+        items = service.list(db, shipment_id=shipment_id, cursor=cursor, **page)
+        if nxt := next_cursor(items, "id", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
 
-@router.get("/{parcel_id}", response_model=schemas.ParcelOut)
-def get_parcel(parcel_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
-    obj = service.get(db, parcel_id)
-    if not obj:
-        raise HTTPException(404, "parcel not found")
-    return obj
+    @router.get("/{parcel_id}", response_model=schemas.ParcelOut)
+    def get_parcel(parcel_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
+        obj = service.get(db, parcel_id)
+        if not obj:
+            raise HTTPException(404, "parcel not found")
+        return obj
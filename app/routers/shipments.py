@@ -1,16 +1,24 @@
-# Basic shipment CRUD: create, list, get.
+# Basic shipment CRUD: create, list, get (plain or with parcels/events); bulk depot assignment.
 
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import schemas
-from ..deps import get_db
+from ..deps import get_async_db, get_db
 from ..limits import limiter
-from ..services.shipments import ShipmentsService
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor
+from ..services.depot_assignment import DepotAssignmentService
+from ..services.shipments import AsyncShipmentsService, ShipmentsService
+from ..settings import settings
 
 router = APIRouter(prefix="/api/shipments", tags=["shipments"])
 service = ShipmentsService()
+async_service = AsyncShipmentsService()
+assignment_service = DepotAssignmentService()
 
 
 def pagination(
@@ -21,29 +29,104 @@ def pagination(
     return {"limit": limit, "offset": offset}
 
 
-@router.post("", response_model=schemas.ShipmentOut, status_code=201)
-def create_shipment(payload: schemas.ShipmentIn, db: Session = Depends(get_db)):
-    return service.create(db, payload)
+ShipmentSort = Literal["id", "created_at", "planned_delivery_date"]
 
 
-@router.get("", response_model=list[schemas.ShipmentOut])
-@limiter.limit("2/minute")  # demo throttle
-def list_shipments(
-    request: Request,
-    status: str | None = Query(None, description="Filter by shipment status"),
-    page: dict = Depends(pagination),
-    db: Session = Depends(get_db),
-):
-    return service.list(db, status=status, **page)
+if settings.use_async_db:
 
+    @router.post("", response_model=schemas.ShipmentOut, status_code=201)
+    async def create_shipment(
+        payload: schemas.ShipmentIn, db: AsyncSession = Depends(get_async_db)
+    ):
+        return await async_service.create(db, payload)
 
-@router.get("/{shipment_id}", response_model=schemas.ShipmentOut)
-def get_shipment(
-    shipment_id: int = Path(..., ge=1, description="Shipment primary key"),
-    db: Session = Depends(get_db),
-):
-    """Return a single shipment by id or 404 if not found."""
-    obj = service.get(db, shipment_id)
-    if not obj:
-        raise HTTPException(status_code=404, detail="shipment not found")
-    return obj
+    @router.get("", response_model=list[schemas.ShipmentOut])
+    @limiter.limit("2/minute")  # demo throttle
+    async def list_shipments(
+        request: Request,
+        response: Response,
+        status: str | None = Query(None, description="Filter by shipment status"),
+        sort: ShipmentSort = Query("id", description="Sort key (ascending, ties by id)"),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        page: dict = Depends(pagination),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        items = await async_service.list(db, status=status, sort=sort, cursor=cursor, **page)
+        if nxt := next_cursor(items, sort, page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/{shipment_id}", response_model=schemas.ShipmentOut)
+    async def get_shipment(
+        shipment_id: int = Path(..., ge=1, description="Shipment primary key"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        """Return a single shipment by id or 404 if not found."""
+        obj = await async_service.get(db, shipment_id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="shipment not found")
+        return obj
+
+    @router.get("/{shipment_id}/full", response_model=schemas.ShipmentFullOut)
+    async def get_shipment_full(
+        shipment_id: int = Path(..., ge=1, description="Shipment primary key"),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        obj = await async_service.get_full(db, shipment_id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="shipment not found")
+        return obj
+
+else:
+
+    @router.post("", response_model=schemas.ShipmentOut, status_code=201)
+    def create_shipment(payload: schemas.ShipmentIn, db: Session = Depends(get_db)):
+        return service.create(db, payload)
+
+    @router.get("", response_model=list[schemas.ShipmentOut])
+    @limiter.limit("2/minute")  # demo throttle
+    def list_shipments(
+        request: Request,
+        response: Response,
+        status: str | None = Query(None, description="Filter by shipment status"),
+        sort: ShipmentSort = Query("id", description="Sort key (ascending, ties by id)"),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        page: dict = Depends(pagination),
+        db: Session = Depends(get_db),
+    ):
+        items = service.list(db, status=status, sort=sort, cursor=cursor, **page)
+        if nxt := next_cursor(items, sort, page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/{shipment_id}", response_model=schemas.ShipmentOut)
+    def get_shipment(
+        shipment_id: int = Path(..., ge=1, description="Shipment primary key"),
+        db: Session = Depends(get_db),
+    ):
+        """Return a single shipment by id or 404 if not found."""
+        obj = service.get(db, shipment_id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="shipment not found")
+        return obj
+
+    @router.get("/{shipment_id}/full", response_model=schemas.ShipmentFullOut)
+    def get_shipment_full(
+        shipment_id: int = Path(..., ge=1, description="Shipment primary key"),
+        db: Session = Depends(get_db),
+    ):
+        """Shipment, sender/recipient addresses, parcels and their tracking events at once."""
+        obj = service.get_full(db, shipment_id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="shipment not found")
+        return obj
+
+
+@router.post("/assign-depots", response_model=schemas.DepotAssignmentOut)
+def assign_depots(payload: schemas.DepotAssignmentIn, db: Session = Depends(get_db)):
+    """
+    Assign every shipment matching the filter to the depot nearest to its recipient
+    address (one bulk computation and one UPDATE instead of a nearest-depot call per
+    shipment). Reports per-phase timings; ``persist=false`` returns the assignments.
+    """
+    return assignment_service.assign(db, payload)
@@ -1,22 +1,179 @@
 # Tracking events ingestion & listing.
 
 
-from fastapi import APIRouter, Depends, Path
+from datetime import datetime
+from typing import Any
+
+import anyio
+from fastapi import APIRouter, Body, Depends, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import schemas
-from ..deps import get_db
-from ..services.tracking import TrackingService
+from ..deps import get_async_db, get_db
+from ..errors import DomainValidationError
+from ..ingest import NDJSON_TYPES, UnsupportedMediaTypeError, iter_lines, media_type
+from ..pagination import NEXT_CURSOR_HEADER, next_cursor
+from ..services.tracking import AsyncTrackingService, TrackingService
+from ..services.tracking_buffer import tracking_buffer
+from ..services.tracking_ingest import TrackingStreamIngestor
+from ..settings import settings
 
 router = APIRouter(prefix="/api/tracking-events", tags=["tracking"])
 service = TrackingService()
+async_service = AsyncTrackingService()
+stream_ingestor = TrackingStreamIngestor()
+
+
+def pagination(
+    limit: int = Query(50, ge=1, le=200, description="Page size (max 200)"),
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+):
+    """Reusable pagination dependency."""
+    return {"limit": limit, "offset": offset}
+
+
+if settings.TRACKING_BUFFER_ENABLED:
+
+    @router.post(
+        "",
+        response_model=schemas.TrackingEventOut,
+        status_code=201,
+        responses={202: {"description": "Queued (TRACKING_BUFFER_ACK=enqueue)"}},
+    )
+    async def create_event(payload: schemas.TrackingEventIn):
+        """Buffered create: written by the next group commit."""
+        fut = tracking_buffer.submit(payload)
+        if settings.TRACKING_BUFFER_ACK == "enqueue":
+            return JSONResponse(status_code=202, content={"status": "queued"})
+        result = await fut
+        if result["status"] != "created":
+            raise DomainValidationError(result["error"])
+        stored = payload.model_dump() | {"event_time": result["event_time"]}
+        return schemas.TrackingEventOut(id=result["id"], **stored)
+
+elif settings.use_async_db:
+
+    @router.post("", response_model=schemas.TrackingEventOut, status_code=201)
+    async def create_event(
+        payload: schemas.TrackingEventIn, db: AsyncSession = Depends(get_async_db)
+    ):
+        return await async_service.create(db, payload)
+
+else:
+
+    @router.post("", response_model=schemas.TrackingEventOut, status_code=201)
+    def create_event(payload: schemas.TrackingEventIn, db: Session = Depends(get_db)):
+        return service.create(db, payload)
+
+
+if settings.use_async_db:
+
+    @router.get("/parcel/{parcel_id}", response_model=list[schemas.TrackingEventOut])
+    async def list_events(
+        response: Response,
+        parcel_id: int = Path(..., ge=1),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        since: datetime | None = Query(None, description="Only events at or after this time"),
+        until: datetime | None = Query(None, description="Only events before this time"),
+        page: dict = Depends(pagination),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        items = await async_service.list_for_parcel(
+            db, parcel_id, cursor=cursor, since=since, until=until, **page
+        )
+        if nxt := next_cursor(items, "event_time", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/shipment/{shipment_id}", response_model=list[schemas.TrackingEventOut])
+    async def shipment_timeline(
+        response: Response,
+        shipment_id: int = Path(..., ge=1),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        since: datetime | None = Query(None, description="Only events at or after this time"),
+        until: datetime | None = Query(None, description="Only events before this time"),
+        page: dict = Depends(pagination),
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        items = await async_service.timeline(
+            db, shipment_id, cursor=cursor, since=since, until=until, **page
+        )
+        if nxt := next_cursor(items, "event_time", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+else:
+
+    @router.get("/parcel/{parcel_id}", response_model=list[schemas.TrackingEventOut])
+    def list_events(
+        response: Response,
+        parcel_id: int = Path(..., ge=1),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        since: datetime | None = Query(None, description="Only events at or after this time"),
+        until: datetime | None = Query(None, description="Only events before this time"),
+        page: dict = Depends(pagination),
+        db: Session = Depends(get_db),
+    ):
+        """A parcel's events, oldest first (ties by id), one page at a time."""
+        items = service.list_for_parcel(
+            db, parcel_id, cursor=cursor, since=since, until=until, **page
+        )
+        if nxt := next_cursor(items, "event_time", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+    @router.get("/shipment/{shipment_id}", response_model=list[schemas.TrackingEventOut])
+    def shipment_timeline(
+        response: Response,
+        shipment_id: int = Path(..., ge=1),
+        cursor: str | None = Query(None, description=f"Opaque cursor from {NEXT_CURSOR_HEADER}"),
+        since: datetime | None = Query(None, description="Only events at or after this time"),
+        until: datetime | None = Query(None, description="Only events before this time"),
+        page: dict = Depends(pagination),
+        db: Session = Depends(get_db),
+    ):
+        """Events of every parcel of the shipment merged in time order, one page at a time."""
+        items = service.timeline(db, shipment_id, cursor=cursor, since=since, until=until, **page)
+        if nxt := next_cursor(items, "event_time", page["limit"]):
+            response.headers[NEXT_CURSOR_HEADER] = nxt
+        return items
+
+
+@router.post("/batch", response_model=schemas.TrackingBatchOut)
+def create_events_batch(
+    events: list[Any] = Body(..., description="Array of TrackingEventIn objects"),
+    db: Session = Depends(get_db),
+):
+    """Ingest a burst of events in one transaction; the response has one result per event."""
+    return service.create_batch(db, events)
+
+
+@router.post("/stream")
+async def ingest_events_stream(request: Request, db: Session = Depends(get_db)):
+    """
+    Ingest an NDJSON body of TrackingEventIn lines without buffering it.
+    The worker thread pulls body chunks on demand, so the socket is only read
+    as fast as events are validated and COPY'd (natural backpressure).
+    """
+    if media_type(request.headers.get("content-type")) not in NDJSON_TYPES:
+        raise UnsupportedMediaTypeError(request.headers.get("content-type"))
 
+    body = request.stream()
 
-@router.post("", response_model=schemas.TrackingEventOut, status_code=201)
-def create_event(payload: schemas.TrackingEventIn, db: Session = Depends(get_db)):
-    return service.create(db, payload)
+    async def next_chunk() -> bytes | None:
+        try:
+            return await body.__anext__()
+        except StopAsyncIteration:
+            return None
 
+    def chunks():
+        # Runs in the worker thread; hops back to the event loop for each read
+        while (chunk := anyio.from_thread.run(next_chunk)) is not None:
+            yield chunk
 
-@router.get("/parcel/{parcel_id}", response_model=list[schemas.TrackingEventOut])
-def list_events(parcel_id: int = Path(..., ge=1), db: Session = Depends(get_db)):
-    return service.list_for_parcel(db, parcel_id)
+    lines = iter_lines(chunks(), max_line_bytes=settings.TRACKING_STREAM_MAX_LINE_BYTES)
+    report = await run_in_threadpool(stream_ingestor.ingest, db, lines)
+    return report.as_dict()
@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from datetime import date, datetime
+from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 # ---------- Address ----------
@@ -24,6 +25,22 @@ class AddressOut(AddressIn):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AddressNearbyOut(AddressOut):
+    distance_m: float
+
+
+class BulkRowError(BaseModel):
+    row: int  # 0-based position in the input
+    errors: list[dict[str, Any]]
+
+
+class AddressBulkOut(BaseModel):
+    inserted: int
+    rejected: int
+    ids: list[int | None]  # aligned with input order; None for rejected rows
+    errors: list[BulkRowError]
+
+
 # ---------- Shipment ----------
 class ShipmentIn(BaseModel):
     reference: str
@@ -40,6 +57,7 @@ class ShipmentOut(BaseModel):
     service_level: str
     status: str
     planned_delivery_date: date | None = None
+    depot_id: int | None = None
     delivered_at: datetime | None = None
     created_at: datetime
     updated_at: datetime | None = None
@@ -63,6 +81,35 @@ class ParcelOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ParcelStatusLookupIn(BaseModel):
+    parcel_ids: list[int] = Field(default_factory=list)
+    barcodes: list[str] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def _not_empty(self) -> ParcelStatusLookupIn:
+        if not (self.parcel_ids or self.barcodes):
+            raise ValueError("give parcel_ids and/or barcodes")
+        return self
+
+
+class ParcelStatusOut(BaseModel):
+    parcel_id: int
+    shipment_id: int
+    barcode: str
+    code: str | None = None  # None: no tracking event yet
+    event_time: datetime | None = None
+    lat: float | None = None
+    lon: float | None = None
+    location_name: str | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ParcelStatusLookupOut(BaseModel):
+    statuses: list[ParcelStatusOut]  # by parcel id; a barcode may match several parcels
+    unknown_parcel_ids: list[int]
+    unknown_barcodes: list[str]
+
+
 # ---------- Tracking ----------
 class TrackingEventIn(BaseModel):
     parcel_id: int
@@ -77,3 +124,183 @@ class TrackingEventIn(BaseModel):
 class TrackingEventOut(TrackingEventIn):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class TrackingBatchResult(BaseModel):
+    index: int  # 0-based position in the submitted batch
+    status: Literal["created", "rejected"]
+    id: int | None = None
+    event_time: datetime | None = None  # as stored (defaults to the ingest time)
+    error: str | None = None
+
+
+class TrackingBatchOut(BaseModel):
+    created: int
+    rejected: int
+    results: list[TrackingBatchResult]
+
+
+# ---------- Shipment detail ----------
+class ParcelWithEventsOut(ParcelOut):
+    events: list[TrackingEventOut]  # oldest first
+
+
+class ShipmentFullOut(ShipmentOut):
+    sender: AddressOut
+    recipient: AddressOut
+    parcels: list[ParcelWithEventsOut]
+
+
+# ---------- Depot assignment ----------
+class DepotAssignmentIn(BaseModel):
+    status: Literal["CREATED", "IN_TRANSIT", "DELIVERED"] | None = "CREATED"
+    planned_delivery_date: date | None = None
+    only_unassigned: bool = True  # skip shipments that already have a depot_id
+    persist: bool = True  # False: compute and return the assignments only
+    method: Literal["engine", "sql"] = "engine"
+
+
+class DepotAssignment(BaseModel):
+    shipment_id: int
+    depot_id: int
+    distance_m: float
+
+
+class DepotAssignmentOut(BaseModel):
+    method: str
+    matched: int  # shipments selected by the filter
+    assigned: int
+    without_geom: int  # recipient address has no geom
+    persisted: bool
+    per_depot: dict[int, int]
+    timings_ms: dict[str, float]
+    assignments: list[DepotAssignment] | None = None  # only when persist is False
+
+
+# ---------- Route planning ----------
+class RoutePlanIn(BaseModel):
+    depot_id: int
+    route_date: date
+    shipment_ids: list[int] = Field(min_length=1)
+    metric: Literal["haversine", "ellipsoidal"] = "haversine"
+    max_ms: int = Field(2000, ge=0, le=30_000)  # local search budget
+
+
+class PlannedStop(BaseModel):
+    sequence: int
+    shipment_id: int
+    address_id: int
+
+
+class PlannedRoute(BaseModel):
+    route_id: int
+    vehicle_id: int
+    meters: float  # depot -> stops -> depot
+    load_kg: float
+    load_dm3: float
+    stops: list[PlannedStop]
+
+
+class UnassignedShipment(BaseModel):
+    shipment_id: int
+    reason: str
+
+
+class RoutePlanOut(BaseModel):
+    depot_id: int
+    route_date: date
+    total_meters: float
+    routes: list[PlannedRoute]
+    unassigned: list[UnassignedShipment]
+    search: dict[str, Any]
+
+
+class TimeWindowStopIn(BaseModel):
+    address_id: int
+    window_start: datetime | None = None  # arriving earlier waits
+    window_end: datetime | None = None  # beginning service later counts as lateness
+    service_s: float = Field(0, ge=0)
+
+
+class TimeWindowRouteIn(BaseModel):
+    start_address_id: int
+    start_time: datetime
+    stops: list[TimeWindowStopIn] = Field(min_length=1)
+    speed_kmh: float | None = Field(None, gt=0)  # default: ROUTE_AVG_SPEED_KMH
+    metric: Literal["haversine", "ellipsoidal"] = "haversine"
+    max_ms: int = Field(500, ge=0, le=30_000)
+
+    @model_validator(mode="after")
+    def _check_windows(self) -> TimeWindowRouteIn:
+        stamps = [self.start_time]
+        for i, stop in enumerate(self.stops):
+            if stop.window_start and stop.window_end and stop.window_end < stop.window_start:
+                raise ValueError(f"stops[{i}]: window_end is before window_start")
+            stamps += [t for t in (stop.window_start, stop.window_end) if t is not None]
+        if len({t.tzinfo is None for t in stamps}) > 1:
+            raise ValueError("start_time and windows must all be timezone-aware or all naive")
+        return self
+
+
+class StopEta(BaseModel):
+    index: int  # position in the submitted stops
+    address_id: int
+    eta: datetime  # arrival
+    service_start: datetime
+    departure: datetime
+    wait_s: float
+    late_s: float
+
+
+class TimeWindowRouteOut(BaseModel):
+    stops: list[StopEta]  # visiting order
+    total_meters: float
+    total_meters_before: float
+    total_late_s: float
+    total_late_s_before: float
+    finish_time: datetime
+    metric: str
+    speed_kmh: float
+    search: dict[str, Any]
+
+
+# ---------- Distance matrix ----------
+class MatrixPoints(BaseModel):
+    """Either address ids (must have geom) or raw (lat, lon) pairs."""
+
+    address_ids: list[int] | None = None
+    coords: list[tuple[float, float]] | None = None
+
+    @model_validator(mode="after")
+    def _one_source(self) -> MatrixPoints:
+        if (self.address_ids is None) == (self.coords is None):
+            raise ValueError("give exactly one of address_ids or coords")
+        if not (self.address_ids or self.coords):
+            raise ValueError("points cannot be empty")
+        for i, (lat, lon) in enumerate(self.coords or []):
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError(f"coords[{i}]: lat/lon out of range")
+        return self
+
+
+class DistanceBatchIn(BaseModel):
+    """Independent point pairs: ``[from_lat, from_lon, to_lat, to_lon]`` each."""
+
+    pairs: list[tuple[float, float, float, float]] = Field(min_length=1)
+    metric: Literal["haversine", "ellipsoidal"] = "ellipsoidal"
+
+    @model_validator(mode="after")
+    def _in_range(self) -> DistanceBatchIn:
+        for i, (lat1, lon1, lat2, lon2) in enumerate(self.pairs):
+            if not (-90 <= lat1 <= 90 and -90 <= lat2 <= 90):
+                raise ValueError(f"pairs[{i}]: latitude out of range")
+            if not (-180 <= lon1 <= 180 and -180 <= lon2 <= 180):
+                raise ValueError(f"pairs[{i}]: longitude out of range")
+        return self
+
+
+class DistanceMatrixIn(BaseModel):
+    origins: MatrixPoints
+    destinations: MatrixPoints | None = None  # default: origins x origins
+    mode: Literal["engine", "postgis"] = "engine"
+    metric: Literal["haversine", "ellipsoidal"] = "haversine"  # engine mode only
@@ -1,37 +1,85 @@
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from typing import Any
 
-from sqlalchemy import text
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from .. import models
-from ..repositories.addresses import AddressRepository, SqlAlchemyAddressRepository
+from ..pagination import resolve_page
+from ..repositories.addresses import BULK_COLUMNS, AddressRepository, SqlAlchemyAddressRepository
 from ..schemas import AddressIn
 
+# Column length limits enforced per row so one oversized value can't abort a whole COPY
+_MAX_LEN = {
+    c.name: c.type.length
+    for c in models.Address.__table__.columns
+    if getattr(c.type, "length", None) is not None
+}
+
+
+def _bulk_row_errors(obj: AddressIn) -> list[dict[str, Any]]:
+    errors: list[dict[str, Any]] = []
+    for field, max_len in _MAX_LEN.items():
+        value = getattr(obj, field, None)
+        if isinstance(value, str) and len(value) > max_len:
+            errors.append({"loc": [field], "msg": f"longer than {max_len} characters"})
+    if (obj.lat is None) != (obj.lon is None):
+        errors.append({"loc": ["lat", "lon"], "msg": "lat and lon must be given together"})
+    if obj.lat is not None and not -90.0 <= obj.lat <= 90.0:
+        errors.append({"loc": ["lat"], "msg": "latitude out of range"})
+    if obj.lon is not None and not -180.0 <= obj.lon <= 180.0:
+        errors.append({"loc": ["lon"], "msg": "longitude out of range"})
+    return errors
+
 
 @dataclass
 class AddressesService:
     repo: AddressRepository = SqlAlchemyAddressRepository()
 
     def create(self, db: Session, payload: AddressIn) -> models.Address:
-        obj = models.Address(**payload.model_dump())
-        obj = self.repo.create(db, obj)
-        # Auto-populate geom if lat/lon provided
-        if obj.lat is not None and obj.lon is not None:
-            db.execute(
-                text(
-                    """
-                    UPDATE addresses
-                    SET geom = ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
-                    WHERE id = :id
-                """.strip()
-                ),
-                {"lon": obj.lon, "lat": obj.lat, "id": obj.id},
-            )
-            db.commit()
-        return obj
+        # geom is derived from lat/lon inside the INSERT (single statement, single commit)
+        return self.repo.insert(db, payload.model_dump())
+
+    def update(self, db: Session, address_id: int, payload: AddressIn) -> models.Address | None:
+        return self.repo.update(db, address_id, payload.model_dump())
+
+    def bulk_create(self, db: Session, records: Iterable[dict[str, Any] | Exception]) -> dict:
+        """
+        Validate records one by one and COPY the valid ones in a single transaction.
+        Returns ids aligned with the input (None for rejected rows) plus per-row errors.
+        """
+        errors: list[dict[str, Any]] = []
+        total = 0
+
+        def valid_rows() -> Iterator[tuple]:
+            nonlocal total
+            for ord_, rec in enumerate(records):
+                total += 1
+                if isinstance(rec, Exception):
+                    errors.append({"row": ord_, "errors": [{"msg": str(rec)}]})
+                    continue
+                try:
+                    obj = AddressIn.model_validate(rec)
+                except ValidationError as exc:
+                    errors.append(
+                        {"row": ord_, "errors": exc.errors(include_url=False, include_input=False)}
+                    )
+                    continue
+                if row_errors := _bulk_row_errors(obj):
+                    errors.append({"row": ord_, "errors": row_errors})
+                    continue
+                yield (ord_, *(getattr(obj, c) for c in BULK_COLUMNS))
+
+        mapping = self.repo.bulk_insert(db, valid_rows())
+        ids: list[int | None] = [None] * total
+        for ord_, new_id in mapping:
+            ids[ord_] = new_id
+        return {"inserted": len(mapping), "rejected": len(errors), "ids": ids, "errors": errors}
 
     def get(self, db: Session, address_id: int) -> models.Address | None:
         return self.repo.get(db, address_id)
 
-    def list(self, db: Session, *, limit: int, offset: int):
-        return self.repo.list(db, limit=limit, offset=offset)
+    def list(self, db: Session, *, limit: int, offset: int, cursor: str | None = None):
+        after = resolve_page("id", cursor, offset)
+        return self.repo.list(db, limit=limit, offset=offset, after=after)
@@ -1,45 +1,135 @@
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, datetime, time, timedelta
 
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..repositories.kpi import SqlAlchemyKpiCounterRepository
+from ..settings import settings
+
+S = models.Shipment
+
+
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min)
+
+
+def _rate(on_time: int, total: int) -> float:
+    return float(on_time) / float(total) if total else 0.0
+
+
+def _window(stmt, date_from: date | None, date_to: date | None):
+    if date_from is not None:
+        stmt = stmt.where(S.created_at >= _day_start(date_from))
+    if date_to is not None:
+        stmt = stmt.where(S.created_at < _day_start(date_to) + timedelta(days=1))
+    return stmt
+
+
+def _today_range() -> tuple[datetime, datetime]:
+    # delivered_at is stored as naive UTC
+    today = _day_start(datetime.utcnow().date())
+    return today, today + timedelta(days=1)
 
 
 @dataclass
 class AnalyticsService:
     """Read-only aggregations for KPIs."""
 
-    def kpis(self, db: Session) -> dict:
-        total = db.scalar(select(func.count(models.Shipment.id))) or 0
-        in_transit = (
-            db.scalar(select(func.count()).where(models.Shipment.status == "IN_TRANSIT")) or 0
+    counters: SqlAlchemyKpiCounterRepository = SqlAlchemyKpiCounterRepository()
+
+    def kpis(
+        self, db: Session, *, date_from: date | None = None, date_to: date | None = None
+    ) -> dict:
+        if settings.KPI_SOURCE == "scan":
+            return self.kpis_scan(db, date_from=date_from, date_to=date_to)
+        return self.kpis_counters(db, date_from=date_from, date_to=date_to)
+
+    def kpis_counters(
+        self, db: Session, *, date_from: date | None = None, date_to: date | None = None
+    ) -> dict:
+        """
+        Read the shipment_kpi_daily rollup (O(days x statuses x levels) rows).
+        delivered_today is not a per-creation-day figure, so it comes from a range
+        scan of today's deliveries on ix_shipments_delivered_at_delivered.
+        """
+        today, tomorrow = _today_range()
+        rows = self.counters.read(db, date_from=date_from, date_to=date_to)
+        today_stmt = _window(
+            select(S.service_level, func.count())
+            .where(S.status == "DELIVERED", S.delivered_at >= today, S.delivered_at < tomorrow)
+            .group_by(S.service_level),
+            date_from,
+            date_to,
         )
-        delivered_today = (
-            db.scalar(
-                select(func.count()).where(
-                    models.Shipment.status == "DELIVERED",
-                    func.date(models.Shipment.delivered_at) == date.today(),
-                )
-            )
-            or 0
+        delivered_today = dict(db.execute(today_stmt).all())
+        return self._payload(
+            [
+                {
+                    "service_level": r.service_level,
+                    "total": r.total,
+                    "in_transit": r.in_transit,
+                    "delivered": r.delivered,
+                    "delivered_today": delivered_today.get(r.service_level, 0),
+                    "on_time": r.on_time,
+                }
+                for r in rows
+            ],
+            date_from,
+            date_to,
         )
-        # naive on-time rate demo: delivered with planned_delivery_date >= delivered_at::date
-        on_time = (
-            db.scalar(
-                select(func.count()).where(
-                    models.Shipment.status == "DELIVERED",
-                    models.Shipment.planned_delivery_date.is_not(None),
-                    func.date(models.Shipment.delivered_at)
-                    <= models.Shipment.planned_delivery_date,
-                )
+
+    def kpis_scan(
+        self, db: Session, *, date_from: date | None = None, date_to: date | None = None
+    ) -> dict:
+        """
+        All KPIs in one pass over shipments using COUNT(*) FILTER (...), grouped by
+        service_level so the breakdown is free. Date predicates are half-open ranges
+        on the raw columns (no func.date wrapping) so indexes stay usable.
+        The optional window [date_from, date_to] (inclusive) filters on created_at.
+        """
+        today, tomorrow = _today_range()
+        delivered = S.status == "DELIVERED"
+
+        stmt = select(
+            S.service_level,
+            func.count().label("total"),
+            func.count().filter(S.status == "IN_TRANSIT").label("in_transit"),
+            func.count().filter(delivered).label("delivered"),
+            func.count()
+            .filter(delivered, S.delivered_at >= today, S.delivered_at < tomorrow)
+            .label("delivered_today"),
+            # naive on-time rate demo: delivered no later than the planned delivery date
+            func.count()
+            .filter(
+                delivered,
+                S.planned_delivery_date.is_not(None),
+                S.delivered_at < S.planned_delivery_date + timedelta(days=1),
             )
-            or 0
-        )
+            .label("on_time"),
+        ).group_by(S.service_level)
+        rows = [r._asdict() for r in db.execute(_window(stmt, date_from, date_to)).all()]
+        return self._payload(rows, date_from, date_to)
+
+    @staticmethod
+    def _payload(rows: list[dict], date_from: date | None, date_to: date | None) -> dict:
+        keys = ("total", "in_transit", "delivered", "delivered_today", "on_time")
+        totals = {k: sum(r[k] for r in rows) for k in keys}
         return {
-            "total_shipments": int(total),
-            "in_transit": int(in_transit),
-            "delivered_today": int(delivered_today),
-            "on_time_rate": float(on_time) / float(total) if total else 0.0,
+            "total_shipments": int(totals["total"]),
+            "in_transit": int(totals["in_transit"]),
+            "delivered_today": int(totals["delivered_today"]),
+            "on_time_rate": _rate(totals["on_time"], totals["total"]),
+            "window": {"from": date_from, "to": date_to},
+            "by_service_level": {
+                r["service_level"]: {
+                    "total_shipments": int(r["total"]),
+                    "in_transit": int(r["in_transit"]),
+                    "delivered": int(r["delivered"]),
+                    "delivered_today": int(r["delivered_today"]),
+                    "on_time_rate": _rate(r["on_time"], r["total"]),
+                }
+                for r in rows
+            },
         }
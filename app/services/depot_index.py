@@ -0,0 +1,130 @@
+"""
+In-memory nearest-depot index.
+
+Depot coordinates are loaded once into a SphereKDTree so nearest-depot queries are
+answered in-process (microseconds, no connection checkout). A background task
+compares a cheap fingerprint of the depot table every DEPOT_INDEX_REFRESH_S seconds
+and rebuilds the tree only when it changed; the new tree is swapped in atomically.
+"""
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+
+import anyio
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..settings import settings
+from ..spatial_index import SphereKDTree
+
+logger = logging.getLogger(__name__)
+
+DEPOTS = Gauge("depot_index_depots", "Depots held by the in-memory nearest-depot index")
+RELOADS = Counter("depot_index_reloads_total", "Depot index refreshes", ["result"])
+
+# Same row set as the SQL nearest-depot query: depots whose address has a geometry
+DEPOTS_SQL = text(
+    """
+    SELECT d.id, d.name, ST_Y(a.geom::geometry) AS lat, ST_X(a.geom::geometry) AS lon
+    FROM depots d
+    JOIN addresses a ON a.id = d.address_id
+    WHERE a.geom IS NOT NULL
+    ORDER BY d.id
+"""
+)
+
+# Fingerprint of the indexed rows; changes whenever a depot is added, removed,
+# renamed or moved (or its address geometry is edited).
+VERSION_SQL = text(
+    """
+    SELECT md5(COALESCE(string_agg(
+               d.id || ':' || COALESCE(d.name, '') || ':' || ST_AsText(a.geom::geometry),
+               ',' ORDER BY d.id), ''))
+    FROM depots d
+    JOIN addresses a ON a.id = d.address_id
+    WHERE a.geom IS NOT NULL
+"""
+)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: str
+    tree: SphereKDTree
+    names: dict[int, str]
+
+
+class DepotIndex:
+    def __init__(self, *, refresh_s: float, session_factory=SessionLocal):
+        self.refresh_s = refresh_s
+        self.session_factory = session_factory
+        self._snapshot: _Snapshot | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> str | None:
+        return self._snapshot.version if self._snapshot else None
+
+    def load(self, db: Session) -> bool:
+        """Rebuild from the database if the depot fingerprint changed; True if rebuilt."""
+        version = db.scalar(VERSION_SQL)
+        if self._snapshot is not None and self._snapshot.version == version:
+            return False
+        rows = db.execute(DEPOTS_SQL).all()
+        tree = SphereKDTree([r.id for r in rows], [r.lat for r in rows], [r.lon for r in rows])
+        self._snapshot = _Snapshot(version, tree, {r.id: r.name for r in rows})
+        DEPOTS.set(len(rows))
+        return True
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 1, radius_m: float | None = None
+    ) -> list[dict]:
+        """Up to ``k`` closest depots as ``{"depot": {...}, "distance_m": ...}``, closest first."""
+        snap = self._snapshot
+        if snap is None:
+            return []
+        return [
+            {"depot": {"id": depot_id, "name": snap.names[depot_id]}, "distance_m": meters}
+            for depot_id, meters in snap.tree.nearest(lat, lon, k, radius_m)
+        ]
+
+    def refresh(self) -> None:
+        db = self.session_factory()
+        try:
+            changed = self.load(db)
+        except Exception:
+            # Keep serving the previous snapshot (or the SQL fallback if there is none)
+            logger.warning("depot index refresh failed", exc_info=True)
+            RELOADS.labels(result="failed").inc()
+            return
+        finally:
+            db.close()
+        RELOADS.labels(result="reloaded" if changed else "unchanged").inc()
+
+    async def start(self) -> None:
+        await anyio.to_thread.run_sync(self.refresh)
+        self._task = asyncio.create_task(self._run(), name="depot-index")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_s)
+            await anyio.to_thread.run_sync(self.refresh)
+
+
+depot_index = DepotIndex(refresh_s=settings.DEPOT_INDEX_REFRESH_S)
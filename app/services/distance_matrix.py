@@ -0,0 +1,123 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..errors import DomainValidationError
+from ..geodesy import Metric, distance_matrix
+from ..schemas import MatrixPoints
+from ..settings import settings
+from .route_optimizer import load_points
+
+# One set-based query: every origin x destination pair, one array per origin row
+MATRIX_SQL = text(
+    """
+    WITH o AS (
+        SELECT ord, ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography AS g
+        FROM unnest(CAST(:o_lat AS float8[]), CAST(:o_lon AS float8[]))
+             WITH ORDINALITY AS t(lat, lon, ord)
+    ),
+    d AS (
+        SELECT ord, ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography AS g
+        FROM unnest(CAST(:d_lat AS float8[]), CAST(:d_lon AS float8[]))
+             WITH ORDINALITY AS t(lat, lon, ord)
+    )
+    SELECT array_agg(ST_Distance(o.g, d.g) ORDER BY d.ord)
+    FROM o CROSS JOIN d
+    GROUP BY o.ord
+    ORDER BY o.ord
+    """
+)
+
+MATRIX_MEDIA_TYPE = "application/octet-stream"
+
+
+@dataclass
+class MatrixRequest:
+    """Resolved origins/destinations; ``square`` when destinations default to origins."""
+
+    o_lat: np.ndarray
+    o_lon: np.ndarray
+    d_lat: np.ndarray
+    d_lon: np.ndarray
+    square: bool
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.o_lat), len(self.d_lat)
+
+
+@dataclass
+class DistanceMatrixService:
+    block_rows: int = 256  # rows per computed/streamed chunk
+
+    def resolve(self, db: Session, points: MatrixPoints) -> tuple[np.ndarray, np.ndarray]:
+        """(lats, lons) aligned with the request; address ids are looked up in one query."""
+        if points.coords is not None:
+            coords = np.asarray(points.coords, dtype=np.float64)
+            return coords[:, 0].copy(), coords[:, 1].copy()
+
+        found = load_points(db, points.address_ids)
+        index = {aid: i for i, aid in enumerate(found.ids)}
+        missing = sorted({aid for aid in points.address_ids if aid not in index})
+        if missing:
+            raise DomainValidationError(
+                "addresses not found or without geom", extra={"address_ids": missing[:100]}
+            )
+        rows = np.array([index[aid] for aid in points.address_ids])
+        return found.lats[rows], found.lons[rows]
+
+    def prepare(
+        self, db: Session, origins: MatrixPoints, destinations: MatrixPoints | None
+    ) -> MatrixRequest:
+        o_lat, o_lon = self.resolve(db, origins)
+        if destinations is None:
+            d_lat, d_lon = o_lat, o_lon
+        else:
+            d_lat, d_lon = self.resolve(db, destinations)
+        req = MatrixRequest(o_lat, o_lon, d_lat, d_lon, square=destinations is None)
+        rows, cols = req.shape
+        if rows * cols > settings.GEO_MATRIX_MAX_CELLS:
+            raise DomainValidationError(
+                f"matrix too large ({rows}x{cols})",
+                extra={"max_cells": settings.GEO_MATRIX_MAX_CELLS},
+            )
+        return req
+
+    def postgis(self, db: Session, req: MatrixRequest) -> np.ndarray:
+        """Whole matrix from PostGIS geography ST_Distance (spheroid) in one query."""
+        params = {
+            "o_lat": req.o_lat.tolist(),
+            "o_lon": req.o_lon.tolist(),
+            "d_lat": req.d_lat.tolist(),
+            "d_lon": req.d_lon.tolist(),
+        }
+        rows = db.execute(MATRIX_SQL, params).scalars().all()
+        return np.array(rows, dtype=np.float64).reshape(req.shape)
+
+    def engine(self, req: MatrixRequest, metric: Metric) -> np.ndarray:
+        """Whole matrix from the in-process vectorized engine."""
+        if req.square:
+            return distance_matrix(req.o_lat, req.o_lon, metric=metric)
+        return distance_matrix(req.o_lat, req.o_lon, req.d_lat, req.d_lon, metric=metric)
+
+    def engine_chunks(self, req: MatrixRequest, metric: Metric) -> Iterator[bytes]:
+        """float32 row-major bytes, computed and yielded ``block_rows`` origins at a time."""
+        for start in range(0, req.shape[0], self.block_rows):
+            stop = start + self.block_rows
+            block = distance_matrix(
+                req.o_lat[start:stop],
+                req.o_lon[start:stop],
+                req.d_lat,
+                req.d_lon,
+                metric=metric,
+                dtype=np.float32,
+            )
+            yield block.tobytes()
+
+    def chunks(self, matrix: np.ndarray) -> Iterator[bytes]:
+        """float32 row-major bytes of an in-memory matrix."""
+        for start in range(0, matrix.shape[0], self.block_rows):
+            yield matrix[start : start + self.block_rows].astype(np.float32).tobytes()
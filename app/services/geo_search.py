@@ -0,0 +1,77 @@
+"""
+Index-backed proximity queries over ``addresses.geom`` (gist ``idx_addresses_geom``).
+
+Ordering uses the geography KNN operator ``<->`` so Postgres walks the gist index
+nearest-first and stops after LIMIT rows instead of computing ST_Distance for every
+row and sorting. Radius filters use ST_DWithin, which the index also serves. ``<->``
+on geography is the spherical distance; the reported ``distance_m`` is the spheroid
+ST_Distance, so neighbouring rows can differ from strict spheroid order by < 0.5%.
+
+Pages are keyset-paginated on (``<->`` distance, id): Incremental Sort on top of the
+KNN index scan breaks distance ties by id without a full sort.
+"""
+
+from typing import Any
+
+from geoalchemy2 import Geography
+from sqlalchemy import Double, Select, cast, func, select, tuple_
+
+from .. import models
+from ..pagination import encode_cursor, resolve_page
+
+CURSOR_SORT = "distance"
+_ADDRESS_FIELDS = ("id", "name", "line1", "line2", "city", "zip_code", "country_code", "lat", "lon")
+
+
+def _point(lat: float, lon: float):
+    # Explicit geography so the ``<->``/ST_DWithin operators match the gist opclass
+    return cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), Geography("POINT", 4326))
+
+
+def _knn(pt):
+    return models.Address.geom.op("<->", return_type=Double)(pt)
+
+
+def nearby_depots_stmt(lat: float, lon: float, k: int, radius_m: float | None = None) -> Select:
+    """The ``k`` depots closest to the point (optionally within ``radius_m``)."""
+    pt = _point(lat, lon)
+    stmt = (
+        select(models.Depot, func.ST_Distance(models.Address.geom, pt).label("distance_m"))
+        .join(models.Address, models.Depot.address_id == models.Address.id)
+        .where(models.Address.geom.is_not(None))
+    )
+    if radius_m is not None:
+        stmt = stmt.where(func.ST_DWithin(models.Address.geom, pt, radius_m))
+    return stmt.order_by(_knn(pt), models.Depot.id).limit(k)
+
+
+def nearby_depots_payload(rows) -> list[dict]:
+    return [
+        {"depot": {"id": depot.id, "name": depot.name}, "distance_m": float(dist)}
+        for depot, dist in rows
+    ]
+
+
+def addresses_within_stmt(
+    lat: float, lon: float, radius_m: float, *, limit: int, cursor: str | None = None
+) -> Select:
+    """One page of addresses within ``radius_m`` metres, nearest first."""
+    pt = _point(lat, lon)
+    knn = _knn(pt)
+    stmt = select(
+        *(getattr(models.Address, c) for c in _ADDRESS_FIELDS),
+        func.ST_Distance(models.Address.geom, pt).label("distance_m"),
+        knn.label("knn_m"),
+    ).where(func.ST_DWithin(models.Address.geom, pt, radius_m))
+    after = resolve_page(CURSOR_SORT, cursor, 0)
+    if after is not None:
+        stmt = stmt.where(tuple_(knn, models.Address.id) > tuple_(*after))
+    return stmt.order_by(knn, models.Address.id).limit(limit)
+
+
+def addresses_within_page(rows, limit: int) -> tuple[list[dict[str, Any]], str | None]:
+    """Response items plus the cursor for the next page (None on the last page)."""
+    items = [{c: row._mapping[c] for c in _ADDRESS_FIELDS + ("distance_m",)} for row in rows]
+    if len(rows) < limit:
+        return items, None
+    return items, encode_cursor(CURSOR_SORT, float(rows[-1].knn_m), rows[-1].id)
@@ -1,16 +1,48 @@
 from dataclasses import dataclass
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models
 from ..errors import DomainValidationError
-from ..repositories.parcels import ParcelRepository, SqlAlchemyParcelRepository
-from ..schemas import ParcelIn
+from ..pagination import resolve_page
+from ..repositories.parcel_status import (
+    AsyncSqlAlchemyParcelStatusRepository,
+    SqlAlchemyParcelStatusRepository,
+)
+from ..repositories.parcels import (
+    AsyncParcelRepository,
+    AsyncSqlAlchemyParcelRepository,
+    ParcelRepository,
+    SqlAlchemyParcelRepository,
+)
+from ..schemas import ParcelIn, ParcelStatusLookupIn
+from ..settings import settings
+
+
+def _check_lookup(payload: ParcelStatusLookupIn) -> None:
+    requested = len(payload.parcel_ids) + len(payload.barcodes)
+    if requested > settings.PARCEL_STATUS_LOOKUP_MAX:
+        raise DomainValidationError(
+            f"lookup exceeds {settings.PARCEL_STATUS_LOOKUP_MAX} parcel ids and barcodes",
+            extra={"max_items": settings.PARCEL_STATUS_LOOKUP_MAX},
+        )
+
+
+def _lookup_payload(payload: ParcelStatusLookupIn, rows) -> dict:
+    found_ids = {r.parcel_id for r in rows}
+    found_barcodes = {r.barcode for r in rows}
+    return {
+        "statuses": rows,
+        "unknown_parcel_ids": [i for i in dict.fromkeys(payload.parcel_ids) if i not in found_ids],
+        "unknown_barcodes": [b for b in dict.fromkeys(payload.barcodes) if b not in found_barcodes],
+    }
 
 
 @dataclass
 class ParcelsService:
     repo: ParcelRepository = SqlAlchemyParcelRepository()
+    status: SqlAlchemyParcelStatusRepository = SqlAlchemyParcelStatusRepository()
 
     def create(self, db: Session, payload: ParcelIn) -> models.Parcel:
         # Domain guard: shipment must exist
@@ -22,5 +54,54 @@ class ParcelsService:
     def get(self, db: Session, parcel_id: int) -> models.Parcel | None:
         return self.repo.get(db, parcel_id)
 
-    def list(self, db: Session, *, shipment_id: int | None, limit: int, offset: int):
-        return self.repo.list(db, shipment_id=shipment_id, limit=limit, offset=offset)
+    def list(
+        self,
+        db: Session,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+    ):
+        after = resolve_page("id", cursor, offset)
+        return self.repo.list(db, shipment_id=shipment_id, limit=limit, offset=offset, after=after)
+
+    def lookup_status(self, db: Session, payload: ParcelStatusLookupIn) -> dict:
+        """Latest status of many parcels (by id and/or barcode) from the projection."""
+        _check_lookup(payload)
+        rows = self.status.lookup(db, payload.parcel_ids, payload.barcodes)
+        return _lookup_payload(payload, rows)
+
+
+@dataclass
+class AsyncParcelsService:
+    repo: AsyncParcelRepository = AsyncSqlAlchemyParcelRepository()
+    status: AsyncSqlAlchemyParcelStatusRepository = AsyncSqlAlchemyParcelStatusRepository()
+
+    async def create(self, db: AsyncSession, payload: ParcelIn) -> models.Parcel:
+        if not await db.get(models.Shipment, payload.shipment_id):
+            raise DomainValidationError("shipment_id does not exist")
+        obj = models.Parcel(**payload.model_dump())
+        return await self.repo.create(db, obj)
+
+    async def get(self, db: AsyncSession, parcel_id: int) -> models.Parcel | None:
+        return await self.repo.get(db, parcel_id)
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        shipment_id: int | None,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+    ):
+        after = resolve_page("id", cursor, offset)
+        return await self.repo.list(
+            db, shipment_id=shipment_id, limit=limit, offset=offset, after=after
+        )
+
+    async def lookup_status(self, db: AsyncSession, payload: ParcelStatusLookupIn) -> dict:
+        _check_lookup(payload)
+        rows = await self.status.lookup(db, payload.parcel_ids, payload.barcodes)
+        return _lookup_payload(payload, rows)
@@ -0,0 +1,267 @@
+"""
+Route lengths (sum of geography distances between consecutive stops), cached per route.
+
+Lengths are read from the per-stop ``stops.leg_m`` that triggers maintain; routes
+whose legs are not computed yet (NULL, before the backfill) fall back to the window
+query over stops joined to addresses.
+
+Cache entries are keyed by ``routes.stops_version``, which the same triggers bump
+whenever a route's stops or the geometry of a stop address change. A lookup reads
+the current versions (one indexed query) and recomputes only the routes whose
+cached version is stale, in one grouped query, so edits made by any process or by
+hand in SQL invalidate correctly.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..settings import settings
+
+CACHE_REQUESTS = Counter(
+    "route_length_cache_requests_total", "Route length lookups by cache result", ["result"]
+)
+CACHE_ENTRIES = Gauge("route_length_cache_entries", "Routes held by the route length cache")
+
+# Stored legs summed per route (ix_stops_route_seq); ``pending`` routes still have NULL legs
+STORED_LENGTHS_SQL = text(
+    """
+    SELECT r.id, r.stops_version, COALESCE(SUM(s.leg_m), 0) AS meters,
+           bool_or(s.id IS NOT NULL AND s.leg_m IS NULL) AS pending
+    FROM routes r
+    LEFT JOIN stops s ON s.route_id = r.id
+    WHERE r.id = ANY(CAST(:route_ids AS integer[]))
+    GROUP BY r.id, r.stops_version
+"""
+)
+
+# Stored per-stop legs of one route, in visiting order
+STOP_LEGS_SQL = text(
+    """
+    SELECT id, sequence, address_id, leg_m, cum_m
+    FROM stops
+    WHERE route_id = :route_id
+    ORDER BY sequence
+"""
+)
+
+# Fallback when legs are not stored yet: same values as recompute_route_legs()
+COMPUTED_LEGS_SQL = text(
+    """
+    WITH located AS (
+        SELECT s.id,
+               COALESCE(ST_Distance(a.geom, LAG(a.geom) OVER (
+                   PARTITION BY s.route_id ORDER BY s.sequence)), 0) AS leg_m
+        FROM stops s
+        JOIN addresses a ON a.id = s.address_id
+        WHERE s.route_id = :route_id AND a.geom IS NOT NULL
+    )
+    SELECT s.id, s.sequence, s.address_id,
+           COALESCE(l.leg_m, 0) AS leg_m,
+           SUM(COALESCE(l.leg_m, 0)) OVER (ORDER BY s.sequence) AS cum_m
+    FROM stops s
+    LEFT JOIN located l ON l.id = s.id
+    WHERE s.route_id = :route_id
+    ORDER BY s.sequence
+"""
+)
+
+# Fallback lengths: legs per route via a window partitioned by route, summed per route
+# in one pass. Routes without (located) stops come back with 0.
+ROUTE_LENGTHS_SQL = text(
+    """
+    WITH legs AS (
+        SELECT s.route_id,
+               ST_Distance(a.geom, LAG(a.geom) OVER (PARTITION BY s.route_id ORDER BY s.sequence))
+                   AS meters
+        FROM stops s
+        JOIN addresses a ON a.id = s.address_id
+        WHERE s.route_id = ANY(CAST(:route_ids AS integer[]))
+          AND a.geom IS NOT NULL
+    )
+    SELECT r.id, r.stops_version, COALESCE(SUM(l.meters), 0) AS meters
+    FROM routes r
+    LEFT JOIN legs l ON l.route_id = r.id
+    WHERE r.id = ANY(CAST(:route_ids AS integer[]))
+    GROUP BY r.id, r.stops_version
+"""
+)
+
+
+def _versions_stmt(route_date: date, depot_id: int | None):
+    stmt = select(models.Route.id, models.Route.stops_version).where(
+        models.Route.route_date == route_date
+    )
+    if depot_id is not None:
+        stmt = stmt.where(models.Route.depot_id == depot_id)
+    return stmt.order_by(models.Route.id)
+
+
+class RouteLengthCache:
+    """Bounded LRU of route_id -> (stops_version, metres); a stale version is a miss."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    def get(self, route_id: int, version: int) -> float | None:
+        with self._lock:
+            entry = self._entries.get(route_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(route_id)
+                CACHE_REQUESTS.labels(result="hit").inc()
+                return entry[1]
+        CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    def put(self, route_id: int, version: int, meters: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[route_id] = (version, meters)
+            self._entries.move_to_end(route_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+route_length_cache = RouteLengthCache(settings.ROUTE_LENGTH_CACHE_SIZE)
+
+
+def _lookup(cache: RouteLengthCache, versions) -> tuple[dict[int, float], list[int]]:
+    """Cached lengths for the (route_id, version) pairs plus the ids to recompute."""
+    found: dict[int, float] = {}
+    stale: list[int] = []
+    for route_id, version in versions:
+        meters = cache.get(route_id, version)
+        if meters is None:
+            stale.append(route_id)
+        else:
+            found[route_id] = meters
+    return found, stale
+
+
+def _store(cache: RouteLengthCache, found: dict[int, float], rows) -> None:
+    for route_id, version, meters in rows:
+        found[route_id] = float(meters)
+        cache.put(route_id, version, float(meters))
+
+
+def _split_stored(rows) -> tuple[list, list[int]]:
+    """(route_id, version, metres) for routes with stored legs, ids of the pending ones."""
+    ready = [(r.id, r.stops_version, r.meters) for r in rows if not r.pending]
+    return ready, [r.id for r in rows if r.pending]
+
+
+def _legs_payload(route_id: int, rows) -> dict:
+    stops = [
+        {
+            "stop_id": r.id,
+            "sequence": r.sequence,
+            "address_id": r.address_id,
+            "leg_m": float(r.leg_m),
+            "cum_m": float(r.cum_m),
+        }
+        for r in rows
+    ]
+    return {"route_id": route_id, "meters": stops[-1]["cum_m"] if stops else 0.0, "stops": stops}
+
+
+def _day_payload(route_date, depot_id, order, found, hits) -> dict:
+    routes = [{"route_id": rid, "meters": found[rid]} for rid in order if rid in found]
+    return {
+        "route_date": route_date,
+        "depot_id": depot_id,
+        "routes": routes,
+        "total_meters": sum(r["meters"] for r in routes),
+        "cache": {"hits": hits, "misses": len(order) - hits},
+    }
+
+
+@dataclass
+class RouteLengthService:
+    cache: RouteLengthCache = field(default_factory=lambda: route_length_cache)
+
+    def length(self, db: Session, route_id: int) -> float:
+        version = db.scalar(select(models.Route.stops_version).where(models.Route.id == route_id))
+        if version is None:
+            return 0.0  # unknown route: nothing to measure
+        found, stale = _lookup(self.cache, [(route_id, version)])
+        if stale:
+            _store(self.cache, found, self._compute(db, stale))
+        return found.get(route_id, 0.0)
+
+    def for_day(self, db: Session, route_date: date, depot_id: int | None = None) -> dict:
+        """Lengths of every route on ``route_date`` (optionally one depot's), in route id order."""
+        versions = db.execute(_versions_stmt(route_date, depot_id)).all()
+        found, stale = _lookup(self.cache, versions)
+        hits = len(found)
+        if stale:
+            _store(self.cache, found, self._compute(db, stale))
+        return _day_payload(route_date, depot_id, [v[0] for v in versions], found, hits)
+
+    def legs(self, db: Session, route_id: int) -> dict:
+        """Per-stop leg and cumulative distances of a route, in visiting order."""
+        rows = db.execute(STOP_LEGS_SQL, {"route_id": route_id}).all()
+        if any(r.leg_m is None for r in rows):
+            rows = db.execute(COMPUTED_LEGS_SQL, {"route_id": route_id}).all()
+        return _legs_payload(route_id, rows)
+
+    def _compute(self, db: Session, route_ids: list[int]) -> list:
+        ready, pending = _split_stored(
+            db.execute(STORED_LENGTHS_SQL, {"route_ids": route_ids}).all()
+        )
+        if pending:
+            ready += db.execute(ROUTE_LENGTHS_SQL, {"route_ids": pending}).all()
+        return ready
+
+
+@dataclass
+class AsyncRouteLengthService:
+    cache: RouteLengthCache = field(default_factory=lambda: route_length_cache)
+
+    async def length(self, db: AsyncSession, route_id: int) -> float:
+        version = await db.scalar(
+            select(models.Route.stops_version).where(models.Route.id == route_id)
+        )
+        if version is None:
+            return 0.0
+        found, stale = _lookup(self.cache, [(route_id, version)])
+        if stale:
+            _store(self.cache, found, await self._compute(db, stale))
+        return found.get(route_id, 0.0)
+
+    async def for_day(
+        self, db: AsyncSession, route_date: date, depot_id: int | None = None
+    ) -> dict:
+        versions = (await db.execute(_versions_stmt(route_date, depot_id))).all()
+        found, stale = _lookup(self.cache, versions)
+        hits = len(found)
+        if stale:
+            _store(self.cache, found, await self._compute(db, stale))
+        return _day_payload(route_date, depot_id, [v[0] for v in versions], found, hits)
+
+    async def legs(self, db: AsyncSession, route_id: int) -> dict:
+        rows = (await db.execute(STOP_LEGS_SQL, {"route_id": route_id})).all()
+        if any(r.leg_m is None for r in rows):
+            rows = (await db.execute(COMPUTED_LEGS_SQL, {"route_id": route_id})).all()
+        return _legs_payload(route_id, rows)
+
+    async def _compute(self, db: AsyncSession, route_ids: list[int]) -> list:
+        rows = (await db.execute(STORED_LENGTHS_SQL, {"route_ids": route_ids})).all()
+        ready, pending = _split_stored(rows)
+        if pending:
+            ready += (await db.execute(ROUTE_LENGTHS_SQL, {"route_ids": pending})).all()
+        return ready
@@ -0,0 +1,255 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..geodesy import Metric, distance_matrix
+
+
+@dataclass
+class RoutePoints:
+    """Coordinates of the stops to order, in request order (duplicates removed)."""
+
+    ids: list[int]
+    lats: np.ndarray
+    lons: np.ndarray
+
+
+def load_points(db: Session, address_ids: list[int]) -> RoutePoints:
+    """Fetch lat/lon for every address with geom in one query, keeping input order."""
+    unique = list(dict.fromkeys(address_ids))
+    point = cast(models.Address.geom, Geometry("POINT", 4326))
+    rows = db.execute(
+        select(models.Address.id, func.ST_Y(point), func.ST_X(point)).where(
+            models.Address.id.in_(unique),
+            models.Address.geom.is_not(None),
+        )
+    ).all()
+    coords = {rid: (lat, lon) for rid, lat, lon in rows}
+    ids = [aid for aid in unique if aid in coords]
+    lats = np.array([coords[aid][0] for aid in ids], dtype=np.float64)
+    lons = np.array([coords[aid][1] for aid in ids], dtype=np.float64)
+    return RoutePoints(ids=ids, lats=lats, lons=lons)
+
+
+def nearest_neighbour(matrix: np.ndarray, start: int = 0) -> list[int]:
+    """Greedy tour over a distance matrix: always move to the closest unvisited index."""
+    n = matrix.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    current = start
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        order.append(current)
+    return order
+
+
+def tour_length(matrix: np.ndarray, order: list[int], closed: bool = False) -> float:
+    """Path length of an index order; ``closed`` adds the leg back to ``order[0]``."""
+    idx = np.asarray(order)
+    total = float(matrix[idx[:-1], idx[1:]].sum())
+    return total + float(matrix[idx[-1], idx[0]]) if closed else total
+
+
+def neighbour_lists(matrix: np.ndarray, k: int) -> list[list[int]]:
+    """The ``k`` closest other indices of every index, nearest first."""
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    # k + 1 smallest per row usually include the index itself (distance 0); drop it
+    idx = np.argpartition(matrix, k, axis=1)[:, : k + 1]
+    idx = np.take_along_axis(idx, np.argsort(np.take_along_axis(matrix, idx, 1), axis=1), 1)
+    return [[j for j in row if j != i][:k] for i, row in enumerate(idx.tolist())]
+
+
+@dataclass
+class SearchStats:
+    moves: dict[str, int] = field(
+        default_factory=lambda: {"two_opt": 0, "or_opt": 0, "relocate": 0}
+    )
+    elapsed_ms: float = 0.0
+    stopped: str = "converged"  # "time_limit" | "skipped"
+
+    def as_dict(self) -> dict:
+        return {
+            "moves": self.moves,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "stopped": self.stopped,
+        }
+
+
+_EPS = 1e-7
+
+
+def local_search(
+    matrix: np.ndarray,
+    order: list[int],
+    *,
+    max_ms: float | None = None,
+    neighbours: int = 10,
+    max_segment: int = 3,
+    closed: bool = False,
+) -> tuple[list[int], SearchStats]:
+    """
+    Improve a path that starts at ``order[0]`` (kept fixed). The end is free unless
+    ``closed``, in which case the path returns to ``order[0]`` (a depot round trip).
+
+    Moves, tried per node from a work queue ("don't look bits"):
+    - 2-opt: reverse a sub-path so that the node gets one of its neighbours as successor
+      or predecessor;
+    - Or-opt / relocate: move a segment of 2..max_segment nodes / a single node next
+      to a neighbour, in either orientation.
+    Candidates come from the ``neighbours`` nearest indices of each node and every move
+    is scored by its delta (removed minus added edges) in O(1); the first improving move
+    is applied. Stops when no node has an improving move or ``max_ms`` elapses.
+    """
+    started = time.perf_counter()
+    deadline = None if max_ms is None else started + max_ms / 1000
+    stats = SearchStats()
+    n = len(order)
+    if n < 4:
+        return list(order), stats
+
+    # Sentinel node ``n`` terminates the path and never moves: at zero cost for an
+    # open path, or as a copy of the start node for a closed one.
+    end = n
+    padded = np.zeros((n + 1, n + 1), dtype=np.float64)
+    padded[:n, :n] = matrix
+    if closed:
+        padded[n, :n] = padded[:n, n] = matrix[order[0]]
+    d = padded.item
+    near = neighbour_lists(matrix, neighbours)
+
+    path = list(order) + [end]
+    pos = [0] * (n + 1)
+    for i, v in enumerate(path):
+        pos[v] = i
+
+    queue = deque(order)
+    queued = [True] * n + [False]
+
+    def touch(*nodes: int) -> None:
+        for v in nodes:
+            if v != end and not queued[v]:
+                queued[v] = True
+                queue.append(v)
+
+    def reindex(lo: int, hi: int) -> None:
+        for k in range(lo, hi + 1):
+            pos[path[k]] = k
+
+    def try_two_opt(x: int) -> bool:
+        i = pos[x]
+        for y in near[x]:
+            lo, hi = sorted((i, pos[y]))
+            if hi - lo < 2:
+                continue
+            a, b, c, e = path[lo], path[lo + 1], path[hi], path[hi + 1]
+            # Replace (a,b),(c,e) by (a,c),(b,e): reverse path[lo+1 .. hi]
+            if d(a, b) + d(c, e) - d(a, c) - d(b, e) > _EPS:
+                path[lo + 1 : hi + 1] = path[hi:lo:-1]
+                reindex(lo + 1, hi)
+                touch(a, b, c, e)
+                stats.moves["two_opt"] += 1
+                return True
+        return False
+
+    def try_segment_move(x: int) -> bool:
+        i = pos[x]
+        if i == 0:
+            return False
+        for length in range(1, max_segment + 1):
+            j = i + length - 1  # last position of the segment
+            if j >= end:
+                break
+            first, last = path[i], path[j]
+            prev, nxt = path[i - 1], path[j + 1]
+            removed = d(prev, first) + d(last, nxt) - d(prev, nxt)
+            if removed <= _EPS:
+                continue
+            best = (_EPS, None, False)
+            for y in near[first] + (near[last] if length > 1 else []):
+                k = pos[y]
+                if i <= k <= j:
+                    continue
+                # Insert between (y, succ y) or (pred y, y)
+                for u_pos in (k, k - 1):
+                    # u_pos == i - 1 is the current place; inside the segment is invalid
+                    if u_pos < 0 or i - 1 <= u_pos <= j:
+                        continue
+                    u, v = path[u_pos], path[u_pos + 1]
+                    base = d(u, v)
+                    gain = removed - (d(u, first) + d(last, v) - base)
+                    if gain > best[0]:
+                        best = (gain, u, False)
+                    if length > 1:
+                        gain = removed - (d(u, last) + d(first, v) - base)
+                        if gain > best[0]:
+                            best = (gain, u, True)
+            _, u, flip = best
+            if u is None:
+                continue
+            segment = path[i : j + 1]
+            if flip:
+                segment.reverse()
+            del path[i : j + 1]
+            at = pos[u] + 1 if pos[u] < i else pos[u] - length + 1
+            path[at:at] = segment
+            reindex(min(i, at), max(j, at + length - 1))
+            touch(prev, nxt, first, last, u, path[at + length])
+            stats.moves["relocate" if length == 1 else "or_opt"] += 1
+            return True
+        return False
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            stats.stopped = "time_limit"
+            break
+        x = queue.popleft()
+        queued[x] = False
+        if try_two_opt(x) or try_segment_move(x):
+            touch(x)
+
+    stats.elapsed_ms = (time.perf_counter() - started) * 1000
+    return path[:-1], stats
+
+
+@dataclass
+class RouteOptimizer:
+    """
+    Orders stops in-process: coordinates are loaded once, the full distance matrix
+    is built with vectorized geodesic math and the tour is constructed over it,
+    so the database is hit once regardless of the number of stops.
+    """
+
+    metric: Metric = "haversine"
+    neighbours: int = 10
+    block_rows: int = field(default=512, repr=False)
+
+    def optimize(self, points: RoutePoints, max_ms: float | None = None) -> dict:
+        """
+        Nearest-neighbour tour starting at the first point (the first valid input id),
+        then improved by local search for at most ``max_ms`` (0 skips it).
+        """
+        matrix = distance_matrix(
+            points.lats, points.lons, metric=self.metric, block_rows=self.block_rows
+        )
+        order = nearest_neighbour(matrix, start=0)
+        before = tour_length(matrix, order)
+        stats = SearchStats(stopped="skipped")
+        if max_ms != 0:
+            order, stats = local_search(matrix, order, max_ms=max_ms, neighbours=self.neighbours)
+        return {
+            "order": [points.ids[i] for i in order],
+            "total_meters": tour_length(matrix, order),
+            "total_meters_before": before,
+            "metric": self.metric,
+            "search": stats.as_dict(),
+        }
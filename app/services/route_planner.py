@@ -0,0 +1,408 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..errors import DomainValidationError, NotFoundError
+from ..geodesy import distance_matrix
+from ..repositories.routes import RouteRepository, SqlAlchemyRouteRepository
+from ..schemas import RoutePlanIn
+from .route_optimizer import local_search, nearest_neighbour, neighbour_lists, tour_length
+
+_EPS = 1e-7
+
+
+@dataclass
+class PlanProblem:
+    """
+    Capacitated multi-vehicle problem over a distance matrix.
+    Index 0 is the depot, 1..n are customers; capacities are per vehicle (inf = unlimited).
+    """
+
+    matrix: np.ndarray
+    kg: np.ndarray
+    dm3: np.ndarray
+    cap_kg: np.ndarray
+    cap_dm3: np.ndarray
+    angles: np.ndarray  # polar angle of every index around the depot
+
+    @property
+    def vehicles(self) -> int:
+        return len(self.cap_kg)
+
+    def fits(self, v: int, c: int, load_kg: np.ndarray, load_dm3: np.ndarray) -> bool:
+        return (
+            load_kg[v] + self.kg[c] <= self.cap_kg[v]
+            and load_dm3[v] + self.dm3[c] <= self.cap_dm3[v]
+        )
+
+    def route_length(self, route: list[int]) -> float:
+        return tour_length(self.matrix, [0, *route], closed=True) if route else 0.0
+
+
+@dataclass
+class PlanStats:
+    moves: dict[str, int] = field(
+        default_factory=lambda: {
+            "two_opt": 0,
+            "or_opt": 0,
+            "relocate": 0,
+            "inter_relocate": 0,
+            "inter_swap": 0,
+        }
+    )
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    stopped: str = "converged"  # or "time_limit"
+
+    def as_dict(self) -> dict:
+        return {
+            "moves": self.moves,
+            "timings_ms": {k: round(v, 1) for k, v in self.timings_ms.items()},
+            "stopped": self.stopped,
+        }
+
+
+def polar_angles(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Angle of every point around the first one (equirectangular, fine for sweeping)."""
+    dx = (lons - lons[0]) * math.cos(math.radians(lats[0]))
+    return np.arctan2(lats - lats[0], dx)
+
+
+def sweep(problem: PlanProblem) -> tuple[list[list[int]], list[int], list[int]]:
+    """
+    Sweep construction: visit customers by polar angle (starting after the widest
+    angular gap) and fill vehicles, largest first, until the next customer does not fit.
+    Customers left over when the fleet is exhausted are placed by cheapest insertion
+    into any vehicle with room.
+
+    Returns (routes per vehicle, customers no vehicle can carry, customers left unplaced).
+    """
+    p = problem
+    customers = np.arange(1, len(p.kg))
+    fits_some = (
+        (p.kg[customers, None] <= p.cap_kg[None, :])
+        & (p.dm3[customers, None] <= p.cap_dm3[None, :])
+    ).any(axis=1)
+    oversized = customers[~fits_some].tolist()
+    order = customers[fits_some]
+    order = order[np.argsort(p.angles[order], kind="stable")]
+    if len(order) > 1:
+        a = p.angles[order]
+        gaps = np.diff(np.append(a, a[0] + 2 * math.pi))
+        order = np.roll(order, -((int(np.argmax(gaps)) + 1) % len(order)))
+
+    routes: list[list[int]] = [[] for _ in range(p.vehicles)]
+    load_kg, load_dm3 = np.zeros(p.vehicles), np.zeros(p.vehicles)
+    fleet = sorted(range(p.vehicles), key=lambda v: (-p.cap_kg[v], -p.cap_dm3[v]))
+    current, pending = 0, []
+    for c in order.tolist():
+        while current < len(fleet) and not p.fits(fleet[current], c, load_kg, load_dm3):
+            current += 1
+        if current == len(fleet):
+            pending.append(c)
+            continue
+        v = fleet[current]
+        routes[v].append(c)
+        load_kg[v] += p.kg[c]
+        load_dm3[v] += p.dm3[c]
+
+    unplaced = []
+    for c in pending:
+        best = (math.inf, -1, 0)
+        for v in range(p.vehicles):
+            if not p.fits(v, c, load_kg, load_dm3):
+                continue
+            r = np.array([0, *routes[v], 0])
+            cost = p.matrix[r[:-1], c] + p.matrix[c, r[1:]] - p.matrix[r[:-1], r[1:]]
+            k = int(np.argmin(cost))
+            if cost[k] < best[0]:
+                best = (float(cost[k]), v, k)
+        _, v, k = best
+        if v < 0:
+            unplaced.append(c)
+            continue
+        routes[v].insert(k, c)
+        load_kg[v] += p.kg[c]
+        load_dm3[v] += p.dm3[c]
+    return routes, oversized, unplaced
+
+
+def improve_between_routes(
+    problem: PlanProblem,
+    routes: list[list[int]],
+    *,
+    deadline: float | None = None,
+    neighbours: int = 10,
+) -> tuple[dict[str, int], set[int]]:
+    """
+    Inter-route moves driven by each customer's nearest neighbours on other routes:
+    relocate the customer next to the neighbour, or swap the two customers, whichever
+    shortens the total distance most while both vehicles stay within capacity in both
+    dimensions. Returns move counts and the indices of the routes changed.
+    """
+    p = problem
+    d = p.matrix.item
+    near = neighbour_lists(p.matrix, neighbours)
+    load_kg = np.array([p.kg[r].sum() if r else 0.0 for r in routes])
+    load_dm3 = np.array([p.dm3[r].sum() if r else 0.0 for r in routes])
+    route_of: dict[int, int] = {}
+    pos: dict[int, int] = {}
+
+    def reindex(v: int) -> None:
+        for i, c in enumerate(routes[v]):
+            route_of[c], pos[c] = v, i
+
+    def at(v: int, i: int) -> int:
+        # Customer at position i of route v; the depot outside the route
+        r = routes[v]
+        return r[i] if 0 <= i < len(r) else 0
+
+    for v in range(len(routes)):
+        reindex(v)
+    queue = deque(route_of)
+    queued = set(route_of)
+    moves, changed = {"inter_relocate": 0, "inter_swap": 0}, set()
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        x = queue.popleft()
+        queued.discard(x)
+        a, i = route_of[x], pos[x]
+        prev, nxt = at(a, i - 1), at(a, i + 1)
+        removed = d(prev, x) + d(x, nxt) - d(prev, nxt)
+        best = (_EPS, -1, 0, "")
+        for y in near[x]:
+            b = route_of.get(y, a)  # the depot and unrouted customers map to the own route
+            if b == a:
+                continue
+            j = pos[y]
+            if p.fits(b, x, load_kg, load_dm3):
+                for ins in (j, j + 1):  # before or after y
+                    u, v = at(b, ins - 1), at(b, ins)
+                    gain = removed - (d(u, x) + d(x, v) - d(u, v))
+                    if gain > best[0]:
+                        best = (gain, b, ins, "inter_relocate")
+            dkg, ddm3 = p.kg[y] - p.kg[x], p.dm3[y] - p.dm3[x]
+            if (
+                load_kg[a] + dkg <= p.cap_kg[a]
+                and load_dm3[a] + ddm3 <= p.cap_dm3[a]
+                and load_kg[b] - dkg <= p.cap_kg[b]
+                and load_dm3[b] - ddm3 <= p.cap_dm3[b]
+            ):
+                py, ny = at(b, j - 1), at(b, j + 1)
+                gain_a = d(prev, x) + d(x, nxt) - d(prev, y) - d(y, nxt)
+                gain_b = d(py, y) + d(y, ny) - d(py, x) - d(x, ny)
+                gain = gain_a + gain_b
+                if gain > best[0]:
+                    best = (gain, b, j, "inter_swap")
+        _, b, j, kind = best
+        if b < 0:
+            continue
+        if kind == "inter_swap":
+            y = routes[b][j]
+            routes[a][i], routes[b][j] = y, x
+            moved_kg, moved_dm3 = p.kg[x] - p.kg[y], p.dm3[x] - p.dm3[y]
+        else:
+            routes[a].pop(i)
+            routes[b].insert(j, x)
+            moved_kg, moved_dm3 = p.kg[x], p.dm3[x]
+        load_kg[a] -= moved_kg
+        load_dm3[a] -= moved_dm3
+        load_kg[b] += moved_kg
+        load_dm3[b] += moved_dm3
+        reindex(a)
+        reindex(b)
+        moves[kind] += 1
+        changed.update((a, b))
+        for c in (x, prev, nxt, at(a, i), at(b, j - 1), at(b, j + 1)):
+            if c and c not in queued:
+                queued.add(c)
+                queue.append(c)
+    return moves, changed
+
+
+def plan_routes(
+    problem: PlanProblem, *, max_ms: float | None = None
+) -> tuple[list[list[int]], list[int], list[int], PlanStats]:
+    """
+    Sweep construction, per-route 2-opt/Or-opt/relocate, inter-route relocate/swap, then a
+    final intra-route pass over the routes that changed, all within ``max_ms``.
+    """
+    stats = PlanStats()
+    started = time.perf_counter()
+    deadline = None if max_ms is None else started + max_ms / 1000
+
+    routes, oversized, unplaced = sweep(problem)
+    stats.timings_ms["construct"] = (time.perf_counter() - started) * 1000
+
+    def improve(v: int, construct: bool) -> None:
+        idx = [0, *routes[v]]
+        if len(idx) < 4:
+            return
+        sub = problem.matrix[np.ix_(idx, idx)]
+        order = nearest_neighbour(sub) if construct else list(range(len(idx)))
+        remaining = None if deadline is None else max(0.0, (deadline - time.perf_counter()) * 1000)
+        order, s = local_search(sub, order, max_ms=remaining, closed=True)
+        routes[v] = [idx[k] for k in order[1:]]
+        for name, count in s.moves.items():
+            stats.moves[name] += count
+        if s.stopped == "time_limit":
+            stats.stopped = "time_limit"
+
+    t0 = time.perf_counter()
+    for v in range(len(routes)):
+        improve(v, construct=True)
+    moves, changed = improve_between_routes(problem, routes, deadline=deadline)
+    stats.moves.update(moves)
+    for v in sorted(changed):
+        improve(v, construct=False)
+    if deadline is not None and time.perf_counter() > deadline:
+        stats.stopped = "time_limit"
+    stats.timings_ms["improve"] = (time.perf_counter() - t0) * 1000
+    return routes, oversized, unplaced, stats
+
+
+def _capacity(value: int | None) -> float:
+    return math.inf if value is None else float(value)
+
+
+@dataclass
+class RoutePlanningService:
+    repo: RouteRepository = SqlAlchemyRouteRepository()
+
+    def plan(self, db: Session, payload: RoutePlanIn) -> dict:
+        """
+        Split shipments into capacity-feasible routes over the depot's vehicles and
+        persist them as Route/Stop rows in one transaction.
+        """
+        started = time.perf_counter()
+        depot = db.get(models.Depot, payload.depot_id)
+        if not depot:
+            raise NotFoundError("Depot", payload.depot_id)
+
+        point = cast(models.Address.geom, Geometry("POINT", 4326))
+        depot_xy = db.execute(
+            select(func.ST_Y(point), func.ST_X(point)).where(
+                models.Address.id == depot.address_id, models.Address.geom.is_not(None)
+            )
+        ).first()
+        if depot_xy is None:
+            raise DomainValidationError("depot has no address with geom")
+
+        vehicles = db.scalars(
+            select(models.Vehicle)
+            .where(models.Vehicle.depot_id == depot.id)
+            .order_by(models.Vehicle.id)
+        ).all()
+        if not vehicles:
+            raise DomainValidationError("depot has no vehicles")
+
+        # One query: recipient coordinates and parcel totals per shipment
+        S, P = models.Shipment, models.Parcel
+        ids = list(dict.fromkeys(payload.shipment_ids))
+        rows = db.execute(
+            select(
+                S.id,
+                S.status,
+                S.recipient_address_id,
+                func.ST_Y(point),
+                func.ST_X(point),
+                func.coalesce(func.sum(P.weight_kg), 0.0),
+                func.coalesce(func.sum(P.volume_dm3), 0.0),
+            )
+            .join(models.Address, models.Address.id == S.recipient_address_id)
+            .outerjoin(P, P.shipment_id == S.id)
+            .where(S.id.in_(ids), models.Address.geom.is_not(None))
+            .group_by(S.id, models.Address.id)
+        ).all()
+        found = {r[0]: r for r in rows}
+        unassigned = [
+            {"shipment_id": sid, "reason": "not found or recipient address has no geom"}
+            for sid in ids
+            if sid not in found
+        ]
+        unassigned += [
+            {"shipment_id": sid, "reason": "already delivered"}
+            for sid in ids
+            if sid in found and found[sid][1] == "DELIVERED"
+        ]
+        todo = [found[sid] for sid in ids if sid in found and found[sid][1] != "DELIVERED"]
+
+        lats = np.array([depot_xy[0], *(r[3] for r in todo)], dtype=np.float64)
+        lons = np.array([depot_xy[1], *(r[4] for r in todo)], dtype=np.float64)
+        t0 = time.perf_counter()
+        problem = PlanProblem(
+            matrix=distance_matrix(lats, lons, metric=payload.metric),
+            kg=np.array([0.0, *(r[5] for r in todo)]),
+            dm3=np.array([0.0, *(r[6] for r in todo)]),
+            cap_kg=np.array([_capacity(v.capacity_kg) for v in vehicles]),
+            cap_dm3=np.array([_capacity(v.capacity_dm3) for v in vehicles]),
+            angles=polar_angles(lats, lons),
+        )
+        matrix_ms = (time.perf_counter() - t0) * 1000
+        routes, oversized, unplaced, stats = plan_routes(problem, max_ms=payload.max_ms)
+        stats.timings_ms = {"load": (t0 - started) * 1000, "matrix": matrix_ms, **stats.timings_ms}
+        unassigned += [
+            {"shipment_id": todo[c - 1][0], "reason": "exceeds every vehicle capacity"}
+            for c in oversized
+        ]
+        unassigned += [
+            {"shipment_id": todo[c - 1][0], "reason": "no vehicle capacity left"} for c in unplaced
+        ]
+
+        used = [v for v in range(len(vehicles)) if routes[v]]
+        t0 = time.perf_counter()
+        route_ids = self.repo.create_many(
+            db,
+            [
+                {
+                    "depot_id": depot.id,
+                    "vehicle_id": vehicles[v].id,
+                    "route_date": payload.route_date,
+                }
+                for v in used
+            ],
+            [
+                [
+                    {
+                        "sequence": seq,
+                        "stop_type": "DELIVERY",
+                        "address_id": todo[c - 1][2],
+                        "shipment_id": todo[c - 1][0],
+                    }
+                    for seq, c in enumerate(routes[v], start=1)
+                ]
+                for v in used
+            ],
+        )
+        db.commit()
+        stats.timings_ms["persist"] = (time.perf_counter() - t0) * 1000
+
+        planned = [
+            {
+                "route_id": route_id,
+                "vehicle_id": vehicles[v].id,
+                "meters": problem.route_length(routes[v]),
+                "load_kg": float(problem.kg[routes[v]].sum()),
+                "load_dm3": float(problem.dm3[routes[v]].sum()),
+                "stops": [
+                    {"sequence": seq, "shipment_id": todo[c - 1][0], "address_id": todo[c - 1][2]}
+                    for seq, c in enumerate(routes[v], start=1)
+                ],
+            }
+            for route_id, v in zip(route_ids, used, strict=True)
+        ]
+        return {
+            "depot_id": depot.id,
+            "route_date": payload.route_date,
+            "total_meters": sum(r["meters"] for r in planned),
+            "routes": planned,
+            "unassigned": unassigned,
+            "search": stats.as_dict(),
+        }
@@ -0,0 +1,357 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ..geodesy import Metric, distance_matrix
+from ..schemas import TimeWindowStopIn
+from .route_optimizer import SearchStats, nearest_neighbour, neighbour_lists
+
+_EPS = 1e-6
+
+
+@dataclass
+class TimeWindowProblem:
+    """
+    Open path from index 0 (the start) over stops 1..n. Times are seconds from the route
+    start. Windows are soft: arriving before ``early`` waits, beginning service after
+    ``late`` counts as lateness.
+    """
+
+    dist: np.ndarray  # metres
+    travel: np.ndarray  # seconds
+    early: np.ndarray  # 0 when unconstrained
+    late: np.ndarray  # inf when unconstrained
+    service: np.ndarray  # seconds
+
+
+class Schedule:
+    """
+    Times of a path, per position: arrival, service begin, lateness, departure, plus
+    prefix sums of distance/lateness and the forward time slack ``slack[k]`` - how far
+    the service begin at position k can be pushed back without adding lateness anywhere
+    downstream (Savelsbergh).
+    """
+
+    def __init__(self, problem: TimeWindowProblem, path: list[int]):
+        self.problem = problem
+        self.path = path
+        self._travel = problem.travel.item
+        self._dist = problem.dist.item
+        self._early = problem.early.tolist()
+        self._late = problem.late.tolist()
+        self._service = problem.service.tolist()
+        self.update()
+
+    def update(self, start: int = 1) -> None:
+        """Recompute times from position ``start`` on (earlier ones are unchanged); O(n)."""
+        path, n = self.path, len(self.path)
+        travel, dist, service = self._travel, self._dist, self._service
+        early, late_at = self._early, self._late
+        if start <= 1:
+            self.arrival, self.begin, self.lateness = [0.0] * n, [0.0] * n, [0.0] * n
+            self.depart, self.cum_dist, self.cum_late = [0.0] * n, [0.0] * n, [0.0] * n
+            self.depart[0] = service[path[0]]
+            start = 1
+        arrival, begin, lateness = self.arrival, self.begin, self.lateness
+        depart, cum_dist, cum_late = self.depart, self.cum_dist, self.cum_late
+        for k in range(start, n):
+            u, v = path[k - 1], path[k]
+            arrival[k] = depart[k - 1] + travel(u, v)
+            begin[k] = max(arrival[k], early[v])
+            lateness[k] = max(0.0, begin[k] - late_at[v])
+            depart[k] = begin[k] + service[v]
+            cum_dist[k] = cum_dist[k - 1] + dist(u, v)
+            cum_late[k] = cum_late[k - 1] + lateness[k]
+
+        # Backwards: own slack, or the next position's slack plus the waiting there
+        self.slack = slack = [0.0] * n
+        for k in range(n - 1, -1, -1):
+            own = max(0.0, late_at[path[k]] - begin[k])
+            slack[k] = own if k == n - 1 else min(own, begin[k + 1] - arrival[k + 1] + slack[k + 1])
+
+    @property
+    def total_late(self) -> float:
+        return self.cum_late[-1]
+
+    @property
+    def total_dist(self) -> float:
+        return self.cum_dist[-1]
+
+    def improves(self, lo: int, hi: int, seq: list[int], d_dist: float) -> bool:
+        """
+        Whether replacing positions lo..hi (lo >= 1) by ``seq`` is better - less lateness,
+        or no more lateness and ``d_dist`` < 0 - simulating only as far as needed:
+        the changed positions, then the suffix until the shift is absorbed or the answer
+        is known. A delay within the forward time slack costs O(1).
+        """
+        # Largest lateness delta that still counts as an improvement
+        tol = _EPS if d_dist < -_EPS else -_EPS
+        old = self.cum_late[hi] - self.cum_late[lo - 1]
+        # The suffix can at most lose all its lateness; beyond this the move cannot win
+        ceiling = old + self.total_late - self.cum_late[hi] + tol
+        travel, early, late_at, service = self._travel, self._early, self._late, self._service
+        prev, t, late = self.path[lo - 1], self.depart[lo - 1], 0.0
+        for v in seq:
+            begin = max(t + travel(prev, v), early[v])
+            late += max(0.0, begin - late_at[v])
+            if late > ceiling:
+                return False
+            t = begin + service[v]
+            prev = v
+        delta = late - old
+        path, n = self.path, len(self.path)
+        k = hi + 1
+        if k == n:
+            return delta <= tol
+
+        new_begin = max(t + travel(prev, path[k]), early[path[k]])
+        shift = new_begin - self.begin[k]
+        if shift >= 0 and (shift <= self.slack[k] or delta > tol):
+            # Within slack the suffix is unchanged; beyond it lateness can only grow
+            return delta <= tol
+        if shift < 0 and delta <= tol:
+            return True  # an earlier suffix can only lose lateness
+        while True:
+            v = path[k]
+            delta += max(0.0, new_begin - late_at[v]) - self.lateness[k]
+            if (shift >= 0) == (delta > tol):
+                return shift < 0  # delayed: lost; earlier: already won
+            if abs(new_begin - self.begin[k]) < _EPS or k == n - 1:
+                return delta <= tol  # shift absorbed or end of path
+            arrive = new_begin + service[v] + travel(v, path[k + 1])
+            k += 1
+            new_begin = max(arrive, early[path[k]])
+
+
+def earliest_begin(problem: TimeWindowProblem) -> list[int]:
+    """Greedy: always go to the stop whose service could begin soonest (travel + waiting)."""
+    n = problem.dist.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    order, current, t = [0], 0, problem.service[0]
+    for _ in range(n - 1):
+        begin = np.maximum(t + problem.travel[current], problem.early)
+        begin[visited] = np.inf
+        current = int(np.argmin(begin))
+        visited[current] = True
+        order.append(current)
+        t = begin[current] + problem.service[current]
+    return order
+
+
+def initial_order(problem: TimeWindowProblem) -> list[int]:
+    """Best (lateness, then distance) of three greedy orders: distance, deadline, begin time."""
+    n = problem.dist.shape[0]
+    by_deadline = sorted(range(1, n), key=lambda v: (problem.late[v], problem.early[v]))
+    candidates = [nearest_neighbour(problem.dist), [0, *by_deadline], earliest_begin(problem)]
+
+    def cost(order: list[int]) -> tuple[float, float]:
+        s = Schedule(problem, order)
+        return s.total_late, s.total_dist
+
+    return min(candidates, key=cost)
+
+
+def time_window_search(
+    problem: TimeWindowProblem,
+    order: list[int],
+    *,
+    max_ms: float | None = None,
+    neighbours: int = 10,
+    max_segment: int = 3,
+    max_span: int = 100,
+) -> tuple[Schedule, SearchStats]:
+    """
+    2-opt / Or-opt / relocate over neighbour lists (as ``local_search``), minimising total
+    lateness, then distance. Distance deltas are O(1); a move is simulated only when it
+    shortens the path or lateness remains downstream of it (see ``Schedule.improves``).
+    """
+    started = time.perf_counter()
+    deadline = None if max_ms is None else started + max_ms / 1000
+    stats = SearchStats()
+    sched = Schedule(problem, list(order))
+    path = sched.path
+    n = len(path)
+    if n < 3:
+        return sched, stats
+
+    d = problem.dist.item
+    near = neighbour_lists(problem.dist, neighbours)
+    pos = [0] * n
+    for i, v in enumerate(path):
+        pos[v] = i
+
+    def edge(a: int, k: int) -> float:
+        # Distance from node a to the node at position k (0 past the end of the path)
+        return d(a, path[k]) if k < n else 0.0
+
+    def late_from(lo: int) -> float:
+        return sched.total_late - sched.cum_late[lo - 1]
+
+    def apply(lo: int, hi: int, seq: list[int], kind: str) -> None:
+        path[lo : hi + 1] = seq
+        for k in range(lo, hi + 1):
+            pos[path[k]] = k
+        sched.update(lo)
+        touch(path[lo - 1], *path[lo : min(hi + 2, n)])
+        stats.moves[kind] += 1
+
+    queue = deque(path[1:])
+    queued = [False] + [True] * (n - 1)
+
+    def touch(*nodes: int) -> None:
+        for v in nodes:
+            if v and not queued[v]:
+                queued[v] = True
+                queue.append(v)
+
+    def try_two_opt(x: int) -> bool:
+        i = pos[x]
+        for y in near[x]:
+            lo, hi = sorted((i, pos[y]))
+            if not 2 <= hi - lo <= max_span:
+                continue
+            a, b, c = path[lo], path[lo + 1], path[hi]
+            # Reverse path[lo+1 .. hi]: (a,b),(c,e) become (a,c),(b,e)
+            dd = d(a, c) + edge(b, hi + 1) - d(a, b) - edge(c, hi + 1)
+            if dd >= -_EPS and late_from(lo + 1) <= _EPS:
+                continue
+            seq = path[hi:lo:-1]
+            if sched.improves(lo + 1, hi, seq, dd):
+                apply(lo + 1, hi, seq, "two_opt")
+                return True
+        return False
+
+    def try_segment_move(x: int) -> bool:
+        i = pos[x]
+        if i == 0:
+            return False
+        for length in range(1, max_segment + 1):
+            j = i + length - 1
+            if j >= n:
+                break
+            first, last, prev = path[i], path[j], path[i - 1]
+            removed = d(prev, first) + edge(last, j + 1) - edge(prev, j + 1)
+            candidates = near[first] + (near[last] if length > 1 else [])
+            for y in candidates:
+                k = pos[y]
+                if i <= k <= j or abs(k - i) > max_span:
+                    continue
+                for u_pos in (k, k - 1):  # insert after y or before y
+                    if u_pos < 0 or i - 1 <= u_pos <= j:
+                        continue
+                    u = path[u_pos]
+                    base = edge(u, u_pos + 1)
+                    for flip in (False, True) if length > 1 else (False,):
+                        head, tail = (last, first) if flip else (first, last)
+                        dd = d(u, head) + edge(tail, u_pos + 1) - base - removed
+                        lo = min(i, u_pos + 1)
+                        if dd >= -_EPS and late_from(lo) <= _EPS:
+                            continue
+                        segment = path[i : j + 1][::-1] if flip else path[i : j + 1]
+                        if u_pos < i:
+                            hi, seq = j, segment + path[u_pos + 1 : i]
+                        else:
+                            hi, seq = u_pos, path[j + 1 : u_pos + 1] + segment
+                        if sched.improves(lo, hi, seq, dd):
+                            apply(lo, hi, seq, "relocate" if length == 1 else "or_opt")
+                            return True
+        return False
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            stats.stopped = "time_limit"
+            break
+        x = queue.popleft()
+        queued[x] = False
+        if try_two_opt(x) or try_segment_move(x):
+            touch(x)
+
+    stats.elapsed_ms = (time.perf_counter() - started) * 1000
+    return sched, stats
+
+
+def build_problem(
+    dist: np.ndarray,
+    speed_kmh: float,
+    early: list[float | None],
+    late: list[float | None],
+    service: list[float],
+) -> TimeWindowProblem:
+    """Index 0 is the start; window bounds are seconds from the route start (None = open)."""
+    return TimeWindowProblem(
+        dist=dist,
+        travel=dist / (speed_kmh / 3.6),
+        early=np.array([0.0 if e is None else e for e in early]),
+        late=np.array([math.inf if v is None else v for v in late]),
+        service=np.asarray(service, dtype=np.float64),
+    )
+
+
+@dataclass
+class TimeWindowOptimizer:
+    """Sequences stops with soft time windows from a start point and reports ETAs."""
+
+    metric: Metric = "haversine"
+    speed_kmh: float = 30.0
+
+    def optimize(
+        self,
+        start: tuple[float, float],
+        stops: list[TimeWindowStopIn],
+        coords: list[tuple[float, float]],
+        start_time: datetime,
+        max_ms: float | None = None,
+    ) -> dict:
+        """``coords[i]`` is the (lat, lon) of ``stops[i]``; index 0 of the problem is ``start``."""
+
+        def offset(t: datetime | None) -> float | None:
+            return None if t is None else (t - start_time).total_seconds()
+
+        lats = np.array([start[0], *(c[0] for c in coords)], dtype=np.float64)
+        lons = np.array([start[1], *(c[1] for c in coords)], dtype=np.float64)
+        problem = build_problem(
+            distance_matrix(lats, lons, metric=self.metric),
+            self.speed_kmh,
+            [None, *(offset(s.window_start) for s in stops)],
+            [None, *(offset(s.window_end) for s in stops)],
+            [0.0, *(s.service_s for s in stops)],
+        )
+        order = initial_order(problem)
+        before = Schedule(problem, list(order))
+        if max_ms == 0:
+            sched, stats = before, SearchStats(stopped="skipped")
+        else:
+            sched, stats = time_window_search(problem, order, max_ms=max_ms)
+
+        def at(seconds: float) -> datetime:
+            return start_time + timedelta(seconds=seconds)
+
+        etas = [
+            {
+                "index": v - 1,
+                "address_id": stops[v - 1].address_id,
+                "eta": at(sched.arrival[k]),
+                "service_start": at(sched.begin[k]),
+                "departure": at(sched.depart[k]),
+                "wait_s": sched.begin[k] - sched.arrival[k],
+                "late_s": sched.lateness[k],
+            }
+            for k, v in enumerate(sched.path)
+            if k > 0
+        ]
+        return {
+            "stops": etas,
+            "total_meters": sched.total_dist,
+            "total_meters_before": before.total_dist,
+            "total_late_s": sched.total_late,
+            "total_late_s_before": before.total_late,
+            "finish_time": at(sched.depart[-1]),
+            "metric": self.metric,
+            "speed_kmh": self.speed_kmh,
+            "search": stats.as_dict(),
+        }
@@ -1,19 +1,42 @@
 from dataclasses import dataclass
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models
 from ..errors import NotFoundError
-from ..repositories.shipments import ShipmentRepository, SqlAlchemyShipmentRepository
+from ..pagination import resolve_page
+from ..repositories.kpi import AsyncSqlAlchemyKpiCounterRepository, SqlAlchemyKpiCounterRepository
+from ..repositories.shipments import (
+    AsyncShipmentRepository,
+    AsyncSqlAlchemyShipmentRepository,
+    ShipmentRepository,
+    SqlAlchemyShipmentRepository,
+)
 from ..schemas import ShipmentIn
 
 
+def _new_shipment(payload: ShipmentIn) -> models.Shipment:
+    now = datetime.utcnow()
+    return models.Shipment(
+        reference=payload.reference,
+        service_level=payload.service_level,
+        status=payload.status,
+        sender_address_id=payload.sender_address_id,
+        recipient_address_id=payload.recipient_address_id,
+        planned_delivery_date=payload.planned_delivery_date,
+        created_at=now,
+        updated_at=now,
+    )
+
+
 @dataclass
 class ShipmentsService:
     """Business rules for shipments live here."""
 
     repo: ShipmentRepository = SqlAlchemyShipmentRepository()
+    kpi: SqlAlchemyKpiCounterRepository = SqlAlchemyKpiCounterRepository()
 
     def create(self, db: Session, payload: ShipmentIn) -> models.Shipment:
         if not db.get(models.Address, payload.sender_address_id):
@@ -21,20 +44,70 @@ class ShipmentsService:
         if not db.get(models.Address, payload.recipient_address_id):
             raise NotFoundError("address", payload.recipient_address_id)
 
-        obj = models.Shipment(
-            reference=payload.reference,
-            service_level=payload.service_level,
-            status=payload.status,
-            sender_address_id=payload.sender_address_id,
-            recipient_address_id=payload.recipient_address_id,
-            planned_delivery_date=payload.planned_delivery_date,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+        obj = _new_shipment(payload)
+        # Counter delta joins the transaction that repo.create commits
+        self.kpi.bump_created(
+            db, day=obj.created_at.date(), status=obj.status, service_level=obj.service_level
         )
         return self.repo.create(db, obj)
 
     def get(self, db: Session, shipment_id: int) -> models.Shipment | None:
         return self.repo.get(db, shipment_id)
 
-    def list(self, db: Session, *, status: str | None, limit: int, offset: int):
-        return self.repo.list(db, status=status, limit=limit, offset=offset)
+    def get_full(self, db: Session, shipment_id: int) -> models.Shipment | None:
+        """Shipment with addresses, parcels and tracking events, in a fixed number of queries."""
+        return self.repo.get_full(db, shipment_id)
+
+    def list(
+        self,
+        db: Session,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        cursor: str | None = None,
+    ):
+        after = resolve_page(sort, cursor, offset)
+        return self.repo.list(db, status=status, limit=limit, offset=offset, sort=sort, after=after)
+
+
+@dataclass
+class AsyncShipmentsService:
+    """Same rules as ShipmentsService, on an AsyncSession."""
+
+    repo: AsyncShipmentRepository = AsyncSqlAlchemyShipmentRepository()
+    kpi: AsyncSqlAlchemyKpiCounterRepository = AsyncSqlAlchemyKpiCounterRepository()
+
+    async def create(self, db: AsyncSession, payload: ShipmentIn) -> models.Shipment:
+        if not await db.get(models.Address, payload.sender_address_id):
+            raise NotFoundError("address", payload.sender_address_id)
+        if not await db.get(models.Address, payload.recipient_address_id):
+            raise NotFoundError("address", payload.recipient_address_id)
+
+        obj = _new_shipment(payload)
+        await self.kpi.bump_created(
+            db, day=obj.created_at.date(), status=obj.status, service_level=obj.service_level
+        )
+        return await self.repo.create(db, obj)
+
+    async def get(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None:
+        return await self.repo.get(db, shipment_id)
+
+    async def get_full(self, db: AsyncSession, shipment_id: int) -> models.Shipment | None:
+        return await self.repo.get_full(db, shipment_id)
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        status: str | None,
+        limit: int,
+        offset: int,
+        sort: str = "id",
+        cursor: str | None = None,
+    ):
+        after = resolve_page(sort, cursor, offset)
+        return await self.repo.list(
+            db, status=status, limit=limit, offset=offset, sort=sort, after=after
+        )
@@ -1,17 +1,41 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any
 
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models
-from ..errors import DomainValidationError
-from ..repositories.tracking import SqlAlchemyTrackingRepository, TrackingRepository
+from ..errors import DomainValidationError, NotFoundError
+from ..pagination import resolve_page
+from ..repositories.kpi import AsyncSqlAlchemyKpiCounterRepository, SqlAlchemyKpiCounterRepository
+from ..repositories.parcel_status import (
+    AsyncSqlAlchemyParcelStatusRepository,
+    SqlAlchemyParcelStatusRepository,
+)
+from ..repositories.tracking import (
+    AsyncSqlAlchemyTrackingRepository,
+    AsyncTrackingRepository,
+    SqlAlchemyTrackingRepository,
+    TrackingRepository,
+)
 from ..schemas import TrackingEventIn
+from ..settings import settings
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'event'}: {err['msg']}" for err in exc.errors()
+    )
 
 
 @dataclass
 class TrackingService:
     repo: TrackingRepository = SqlAlchemyTrackingRepository()
+    kpi: SqlAlchemyKpiCounterRepository = SqlAlchemyKpiCounterRepository()
+    status: SqlAlchemyParcelStatusRepository = SqlAlchemyParcelStatusRepository()
 
     def create(self, db: Session, payload: TrackingEventIn) -> models.TrackingEvent:
         # Guard: parcel must exist
@@ -19,15 +43,161 @@ class TrackingService:
         if not parcel:
             raise DomainValidationError("parcel_id does not exist")
 
+        # Domain rule: mark shipment delivered on DELIVERED (same commit as the event)
+        if payload.code.upper() == "DELIVERED":
+            self.kpi.mark_delivered(db, [parcel.shipment_id], datetime.utcnow())
+
         evt = models.TrackingEvent(**payload.model_dump())
-        evt = self.repo.create(db, evt)
+        db.add(evt)
+        db.flush()  # the projection reads the new row
+        self.status.refresh(db, [evt.parcel_id])
+        return self.repo.create(db, evt)
+
+    def list_for_parcel(
+        self,
+        db: Session,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        """One page of a parcel's events in [since, until), oldest first (ties by id)."""
+        after = resolve_page("event_time", cursor, offset)
+        return self.repo.list_for_parcel(
+            db, parcel_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+
+    def timeline(
+        self,
+        db: Session,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        """One page of the merged event timeline of all parcels of a shipment."""
+        after = resolve_page("event_time", cursor, offset)
+        items = self.repo.list_for_shipment(
+            db, shipment_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+        if not items and db.get(models.Shipment, shipment_id) is None:
+            raise NotFoundError("shipment", shipment_id)
+        return items
+
+    def create_batch(self, db: Session, records: list[Any]) -> dict:
+        """
+        Ingest many events in one transaction: one parcel lookup, one multi-row INSERT,
+        one set-based shipment UPDATE for DELIVERED events, one commit.
+        Invalid events are rejected individually; the rest are still stored.
+        """
+        if len(records) > settings.TRACKING_BATCH_MAX_EVENTS:
+            raise DomainValidationError(
+                f"batch exceeds {settings.TRACKING_BATCH_MAX_EVENTS} events",
+                extra={"max_events": settings.TRACKING_BATCH_MAX_EVENTS},
+            )
+
+        results: list[dict[str, Any]] = [{"index": i} for i in range(len(records))]
+        parsed: list[tuple[int, TrackingEventIn]] = []
+        for i, rec in enumerate(records):
+            try:
+                parsed.append((i, TrackingEventIn.model_validate(rec)))
+            except ValidationError as exc:
+                results[i].update(status="rejected", error=_validation_message(exc))
+
+        # Resolve every referenced parcel -> shipment in one query
+        parcel_ids = {p.parcel_id for _, p in parsed}
+        stmt = select(models.Parcel.id, models.Parcel.shipment_id).where(
+            models.Parcel.id.in_(parcel_ids)
+        )
+        shipment_of = dict(db.execute(stmt).all()) if parcel_ids else {}
+
+        now = datetime.utcnow()
+        accepted: list[int] = []
+        rows: list[dict[str, Any]] = []
+        delivered: set[int] = set()
+        for i, payload in parsed:
+            if payload.parcel_id not in shipment_of:
+                results[i].update(status="rejected", error="parcel_id does not exist")
+                continue
+            row = payload.model_dump()
+            row["event_time"] = row["event_time"] or now
+            rows.append(row)
+            accepted.append(i)
+            # Domain rule: mark shipment delivered on DELIVERED
+            if payload.code.upper() == "DELIVERED":
+                delivered.add(shipment_of[payload.parcel_id])
+
+        ids = self.repo.insert_many(db, rows)
+        self.kpi.mark_delivered(db, delivered, now)
+        self.status.refresh(db, (row["parcel_id"] for row in rows))
+        db.commit()
+
+        for i, row, new_id in zip(accepted, rows, ids, strict=True):
+            results[i].update(status="created", id=new_id, event_time=row["event_time"])
+        return {
+            "created": len(accepted),
+            "rejected": len(records) - len(accepted),
+            "results": results,
+        }
+
+
+@dataclass
+class AsyncTrackingService:
+    repo: AsyncTrackingRepository = AsyncSqlAlchemyTrackingRepository()
+    kpi: AsyncSqlAlchemyKpiCounterRepository = AsyncSqlAlchemyKpiCounterRepository()
+    status: AsyncSqlAlchemyParcelStatusRepository = AsyncSqlAlchemyParcelStatusRepository()
+
+    async def create(self, db: AsyncSession, payload: TrackingEventIn) -> models.TrackingEvent:
+        parcel = await db.get(models.Parcel, payload.parcel_id)
+        if not parcel:
+            raise DomainValidationError("parcel_id does not exist")
 
-        # Domain rule: mark shipment delivered on DELIVERED
         if payload.code.upper() == "DELIVERED":
-            parcel.shipment.status = "DELIVERED"
-            parcel.shipment.delivered_at = datetime.utcnow()
-            db.commit()
-        return evt
+            await self.kpi.mark_delivered(db, [parcel.shipment_id], datetime.utcnow())
+
+        evt = models.TrackingEvent(**payload.model_dump())
+        db.add(evt)
+        await db.flush()
+        await self.status.refresh(db, [evt.parcel_id])
+        return await self.repo.create(db, evt)
+
+    async def list_for_parcel(
+        self,
+        db: AsyncSession,
+        parcel_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        after = resolve_page("event_time", cursor, offset)
+        return await self.repo.list_for_parcel(
+            db, parcel_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
 
-    def list_for_parcel(self, db: Session, parcel_id: int):
-        return self.repo.list_for_parcel(db, parcel_id)
+    async def timeline(
+        self,
+        db: AsyncSession,
+        shipment_id: int,
+        *,
+        limit: int,
+        offset: int = 0,
+        cursor: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ):
+        after = resolve_page("event_time", cursor, offset)
+        items = await self.repo.list_for_shipment(
+            db, shipment_id, limit=limit, offset=offset, after=after, since=since, until=until
+        )
+        if not items and await db.get(models.Shipment, shipment_id) is None:
+            raise NotFoundError("shipment", shipment_id)
+        return items
@@ -0,0 +1,145 @@
+"""
+In-process write-behind buffer for single tracking events.
+
+Requests enqueue events; one background task drains the queue and writes them
+with TrackingService.create_batch, one transaction (one WAL flush) per group
+of up to FLUSH_EVENTS events or FLUSH_MS milliseconds, whichever comes first.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import anyio
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..db import SessionLocal
+from ..errors import ServiceUnavailableError
+from ..schemas import TrackingEventIn
+from ..settings import settings
+from .tracking import TrackingService
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = Gauge("tracking_buffer_queue_depth", "Events waiting in the write-behind buffer")
+FLUSH_SECONDS = Histogram(
+    "tracking_buffer_flush_seconds",
+    "Duration of one group commit",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+FLUSH_EVENTS = Histogram(
+    "tracking_buffer_flush_events",
+    "Events written per group commit",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+FLUSHED = Counter("tracking_buffer_events_total", "Events flushed", ["status"])
+
+_STOP = object()
+
+
+class TrackingWriteBuffer:
+    def __init__(
+        self,
+        *,
+        max_depth: int,
+        flush_events: int,
+        flush_ms: int,
+        service: TrackingService | None = None,
+        session_factory=SessionLocal,
+    ):
+        self.max_depth = max_depth
+        self.flush_events = min(flush_events, settings.TRACKING_BATCH_MAX_EVENTS)
+        self.flush_s = flush_ms / 1000.0
+        self.service = service or TrackingService()
+        self.session_factory = session_factory
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        QUEUE_DEPTH.set_function(lambda: self._queue.qsize())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()  # bind to the running loop
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="tracking-buffer")
+
+    async def stop(self) -> None:
+        """Stop accepting events, flush everything already queued, then return."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._queue.put_nowait(_STOP)
+        await self._task
+        self._task = None
+
+    def submit(self, payload: TrackingEventIn) -> asyncio.Future:
+        """Enqueue one event; the future resolves to its create_batch result."""
+        if self._task is None or self._closing:
+            raise ServiceUnavailableError("tracking buffer is not running")
+        if self._queue.qsize() >= self.max_depth:
+            raise ServiceUnavailableError("tracking buffer is full, retry later")
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((payload, fut))
+        return fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_s
+            while len(batch) < self.flush_events:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[TrackingEventIn, asyncio.Future]]) -> None:
+        records = [payload.model_dump() for payload, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            out = await anyio.to_thread.run_sync(self._write, records)
+        except Exception as exc:
+            logger.exception("tracking buffer flush failed (%d events)", len(batch))
+            FLUSHED.labels(status="failed").inc(len(batch))
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(ServiceUnavailableError(f"flush failed: {exc}"))
+                    fut.exception()  # mark retrieved: enqueue-mode callers never await it
+            return
+        FLUSH_SECONDS.observe(time.perf_counter() - t0)
+        FLUSH_EVENTS.observe(len(batch))
+        FLUSHED.labels(status="created").inc(out["created"])
+        FLUSHED.labels(status="rejected").inc(out["rejected"])
+        for (_, fut), result in zip(batch, out["results"], strict=True):
+            if not fut.done():
+                fut.set_result(result)
+
+    def _write(self, records: list[dict[str, Any]]) -> dict:
+        db = self.session_factory()
+        try:
+            return self.service.create_batch(db, records)
+        finally:
+            db.close()
+
+
+tracking_buffer = TrackingWriteBuffer(
+    max_depth=settings.TRACKING_BUFFER_MAX_DEPTH,
+    flush_events=settings.TRACKING_BUFFER_FLUSH_EVENTS,
+    flush_ms=settings.TRACKING_BUFFER_FLUSH_MS,
+)
@@ -0,0 +1,165 @@
+"""
+Streaming NDJSON ingest for large tracking-event replays.
+
+Lines are pulled lazily, validated in fixed-size chunks, COPY'd into
+tracking_events and committed per chunk, so memory stays bounded by the chunk
+size regardless of input size. Also usable as a CLI:
+
+    python -m app.services.tracking_ingest events.ndjson[.gz] [--chunk-size 5000]
+    cat events.ndjson | python -m app.services.tracking_ingest -
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..repositories.kpi import SqlAlchemyKpiCounterRepository
+from ..repositories.parcel_status import SqlAlchemyParcelStatusRepository
+from ..repositories.tracking import COPY_COLUMNS, SqlAlchemyTrackingRepository, TrackingRepository
+from ..schemas import TrackingEventIn
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Keep only a sample of rejected lines; counts are always exact
+MAX_ERROR_SAMPLES = 100
+
+
+@dataclass
+class IngestReport:
+    lines: int = 0
+    created: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def events_per_s(self) -> float:
+        return self.created / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "events_per_s": round(self.events_per_s, 1)}
+
+    def reject(self, line_no: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append({"line": line_no, "error": error})
+
+
+@dataclass
+class TrackingStreamIngestor:
+    repo: TrackingRepository = SqlAlchemyTrackingRepository()
+    kpi: SqlAlchemyKpiCounterRepository = SqlAlchemyKpiCounterRepository()
+    status: SqlAlchemyParcelStatusRepository = SqlAlchemyParcelStatusRepository()
+    chunk_size: int = settings.TRACKING_STREAM_CHUNK_EVENTS
+
+    def ingest(
+        self,
+        db: Session,
+        lines: Iterable[bytes | str],
+        *,
+        on_progress: Callable[[IngestReport], None] | None = None,
+    ) -> IngestReport:
+        report = IngestReport()
+        t0 = time.perf_counter()
+        numbered = enumerate(lines, start=1)
+        while chunk := list(islice(numbered, self.chunk_size)):
+            self._ingest_chunk(db, chunk, report)
+            report.lines = chunk[-1][0]
+            report.chunks += 1
+            report.elapsed_s = time.perf_counter() - t0
+            if on_progress:
+                on_progress(report)
+        report.elapsed_s = time.perf_counter() - t0
+        return report
+
+    def _ingest_chunk(
+        self, db: Session, chunk: list[tuple[int, bytes | str]], report: IngestReport
+    ) -> None:
+        parsed: list[tuple[int, TrackingEventIn]] = []
+        for line_no, line in chunk:
+            if not line.strip():
+                continue
+            try:
+                parsed.append((line_no, TrackingEventIn.model_validate_json(line)))
+            except ValidationError as exc:
+                report.reject(line_no, exc.errors()[0]["msg"])
+
+        parcel_ids = {p.parcel_id for _, p in parsed}
+        stmt = select(models.Parcel.id, models.Parcel.shipment_id).where(
+            models.Parcel.id.in_(parcel_ids)
+        )
+        shipment_of = dict(db.execute(stmt).all()) if parcel_ids else {}
+
+        now = datetime.utcnow()
+        rows: list[tuple] = []
+        delivered: set[int] = set()
+        for line_no, payload in parsed:
+            if payload.parcel_id not in shipment_of:
+                report.reject(line_no, "parcel_id does not exist")
+                continue
+            values = payload.model_dump()
+            values["event_time"] = values["event_time"] or now
+            rows.append(tuple(values[c] for c in COPY_COLUMNS))
+            if payload.code.upper() == "DELIVERED":
+                delivered.add(shipment_of[payload.parcel_id])
+
+        if rows:
+            self.repo.copy_events(db, rows)
+        self.kpi.mark_delivered(db, delivered, now)
+        self.status.refresh(db, (row[0] for row in rows))
+        db.commit()
+        report.created += len(rows)
+
+
+def _open_lines(path: str) -> Iterable[bytes]:
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")  # noqa: SIM115 - closed by the caller
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Stream NDJSON tracking events into the DB")
+    parser.add_argument("path", help="NDJSON file (.gz supported) or - for stdin")
+    parser.add_argument("--chunk-size", type=int, default=settings.TRACKING_STREAM_CHUNK_EVENTS)
+    args = parser.parse_args(argv)
+
+    def progress(r: IngestReport) -> None:
+        print(
+            f"lines={r.lines} created={r.created} rejected={r.rejected} "
+            f"rate={r.events_per_s:.0f}/s",
+            file=sys.stderr,
+        )
+
+    ingestor = TrackingStreamIngestor(chunk_size=args.chunk_size)
+    src = _open_lines(args.path)
+    db = SessionLocal()
+    try:
+        report = ingestor.ingest(db, src, on_progress=progress)
+    finally:
+        db.close()
+        if src is not sys.stdin.buffer:
+            src.close()
+    print(json.dumps(report.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
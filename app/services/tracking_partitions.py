@@ -0,0 +1,233 @@
+"""
+Monthly range partitions of tracking_events: premake future months, expire old ones.
+
+    python -m app.services.tracking_partitions                 # settings defaults
+    python -m app.services.tracking_partitions --dry-run
+    python -m app.services.tracking_partitions --months-ahead 6 --retention-months 24 --action drop
+
+Run it daily (cron / k8s CronJob); it is idempotent. Partitions are named
+``tracking_events_pYYYYMM`` and cover [first of month, first of next month).
+``tracking_events_default`` catches events outside every premade month, so a late
+maintenance run never fails a write. Creating a month moves its rows out of the
+default partition in the same transaction.
+
+Expiry uses TRACKING_RETENTION_MONTHS: a month expires when it ends before the
+first day of (current month - retention). "detach" leaves it as a plain table for
+archiving (pg_dump, then DROP TABLE); "drop" deletes it. Either way it is a
+catalog change, not a DELETE, so no vacuum debt is left behind. parcel_status
+keeps the last status of parcels whose events have expired.
+
+Every DDL statement runs in its own short transaction under ``lock_timeout``, so a
+long query on tracking_events makes the run fail fast instead of queueing writers
+behind its lock.
+"""
+
+import argparse
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..settings import settings
+
+PARENT = "tracking_events"
+DEFAULT_PARTITION = f"{PARENT}_default"
+RETENTION_ACTIONS = ("detach", "drop")
+LOCK_TIMEOUT = "5s"
+
+_MONTH_NAME = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+PARTITIONS_SQL = text(
+    """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:parent AS regclass)
+"""
+)
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def parse_partition_name(name: str) -> date | None:
+    """Month of a ``tracking_events_pYYYYMM`` partition (None for the default one)."""
+    m = _MONTH_NAME.match(name)
+    return date(int(m[1]), int(m[2]), 1) if m else None
+
+
+@dataclass
+class PartitionPlan:
+    create: list[date] = field(default_factory=list)
+    expire: list[date] = field(default_factory=list)
+
+
+def plan_partitions(
+    existing: Iterable[date], today: date, *, months_ahead: int, retention_months: int
+) -> PartitionPlan:
+    """Months to create (current .. current + months_ahead) and to expire (past retention)."""
+    have = set(existing)
+    current = month_start(today)
+    wanted = [add_months(current, i) for i in range(months_ahead + 1)]
+    out = PartitionPlan(create=[m for m in wanted if m not in have])
+    if retention_months > 0:
+        keep_from = add_months(current, -retention_months)
+        out.expire = sorted(m for m in have if m < keep_from)
+    return out
+
+
+def attached_partitions(db: Session) -> tuple[list[date], bool]:
+    """Attached monthly partitions and whether the default partition exists."""
+    names = db.scalars(PARTITIONS_SQL, {"parent": PARENT}).all()
+    months = sorted(m for m in map(parse_partition_name, names) if m is not None)
+    return months, DEFAULT_PARTITION in names
+
+
+def _begin_ddl(db: Session) -> None:
+    db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+
+
+def create_partition(db: Session, month: date, *, has_default: bool) -> int:
+    """Create and attach one month; returns the rows moved out of the default partition."""
+    name, lo, hi = partition_name(month), month, add_months(month, 1)
+    bounds = f"FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+    _begin_ddl(db)
+    moved = 0
+    if has_default:
+        moved = db.scalar(
+            text(
+                f"SELECT count(*) FROM {DEFAULT_PARTITION} "
+                "WHERE event_time >= :lo AND event_time < :hi"
+            ),
+            {"lo": lo, "hi": hi},
+        )
+    if moved:
+        # CREATE ... PARTITION OF would fail on the rows already in the default partition
+        db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+        db.execute(
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE event_time >= :lo AND event_time < :hi
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """
+            ),
+            {"lo": lo, "hi": hi},
+        )
+        db.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    else:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+    db.commit()
+    return moved
+
+
+def expire_partition(db: Session, month: date, *, action: str) -> None:
+    name = partition_name(month)
+    _begin_ddl(db)
+    if action == "drop":
+        db.execute(text(f"DROP TABLE {name}"))
+    else:
+        db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    db.commit()
+
+
+@dataclass
+class MaintenanceReport:
+    created: list[str] = field(default_factory=list)
+    expired: list[str] = field(default_factory=list)
+    action: str = "detach"
+    moved_from_default: int = 0
+    default_rows: int = 0  # events still outside every monthly partition
+    dry_run: bool = False
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def maintain(
+    db: Session,
+    *,
+    today: date | None = None,
+    months_ahead: int = settings.TRACKING_PARTITION_MONTHS_AHEAD,
+    retention_months: int = settings.TRACKING_RETENTION_MONTHS,
+    action: str = settings.TRACKING_RETENTION_ACTION,
+    dry_run: bool = False,
+) -> MaintenanceReport:
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"retention action must be one of {RETENTION_ACTIONS}, not {action!r}")
+    existing, has_default = attached_partitions(db)
+    todo = plan_partitions(
+        existing,
+        today or datetime.utcnow().date(),
+        months_ahead=months_ahead,
+        retention_months=retention_months,
+    )
+    report = MaintenanceReport(
+        created=[partition_name(m) for m in todo.create],
+        expired=[partition_name(m) for m in todo.expire],
+        action=action,
+        dry_run=dry_run,
+    )
+    if not dry_run:
+        for month in todo.create:
+            report.moved_from_default += create_partition(db, month, has_default=has_default)
+        for month in todo.expire:
+            expire_partition(db, month, action=action)
+    if has_default:
+        report.default_rows = db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"))
+        db.commit()
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    from ..db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Premake and expire tracking_events partitions")
+    parser.add_argument(
+        "--months-ahead", type=int, default=settings.TRACKING_PARTITION_MONTHS_AHEAD
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.TRACKING_RETENTION_MONTHS,
+        help="0 keeps every month",
+    )
+    parser.add_argument(
+        "--action", choices=RETENTION_ACTIONS, default=settings.TRACKING_RETENTION_ACTION
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only print the plan")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = maintain(
+            db,
+            months_ahead=args.months_ahead,
+            retention_months=args.retention_months,
+            action=args.action,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+    print(json.dumps(report.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,63 @@ class Settings(BaseSettings):
 
     # Database driver: "postgres" (using Alembic and psycopg2)
     DB_DRIVER: str = "postgres"
+    # Session mode for the hot routers: "sync" (psycopg2, threadpool) or "async" (asyncpg)
+    DB_MODE: str = "sync"
+
+    # Connection pool (applied to both engines; size per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a checkout before erroring
+    DB_POOL_RECYCLE: int = -1  # seconds; replace connections older than this (-1 = never)
+    # Pre-ping: test each connection on checkout (pessimistic) vs. fail on first use (optimistic)
+    DB_POOL_PRE_PING: bool = True
+    # LIFO checkout keeps few connections hot so idle ones can be recycled/closed server-side
+    DB_POOL_USE_LIFO: bool = False
+
+    # Max events accepted by POST /api/tracking-events/batch
+    TRACKING_BATCH_MAX_EVENTS: int = 1000
+    # Parcel ids + barcodes accepted by one POST /api/parcels/status lookup
+    PARCEL_STATUS_LOOKUP_MAX: int = 1000
+    # Streaming NDJSON ingest: events validated + COPY'd + committed per chunk
+    TRACKING_STREAM_CHUNK_EVENTS: int = 5000
+    TRACKING_STREAM_MAX_LINE_BYTES: int = 64 * 1024
+    # Write-behind buffer for POST /api/tracking-events (group commit)
+    TRACKING_BUFFER_ENABLED: bool = False
+    # "commit": respond once the event's group commit is done (durable)
+    # "enqueue": respond 202 as soon as the event is queued (lost if the process dies)
+    TRACKING_BUFFER_ACK: str = "commit"
+    TRACKING_BUFFER_MAX_DEPTH: int = 10_000
+    TRACKING_BUFFER_FLUSH_EVENTS: int = 500
+    TRACKING_BUFFER_FLUSH_MS: int = 20
+    # tracking_events is range-partitioned by month on event_time. The maintenance
+    # command (python -m app.services.tracking_partitions) keeps this many months
+    # premade ahead of the current one. It expires months older than
+    # TRACKING_RETENTION_MONTHS (0 keeps everything); expired partitions are
+    # "detach"ed (kept as plain tables) or "drop"ped.
+    TRACKING_PARTITION_MONTHS_AHEAD: int = 3
+    TRACKING_RETENTION_MONTHS: int = 0
+    TRACKING_RETENTION_ACTION: str = "detach"
+
+    # Average road speed used to turn distances into travel times (time-window routing)
+    ROUTE_AVG_SPEED_KMH: float = 30.0
+
+    # POST /api/geo/matrix limits (origins x destinations): any response / responses that
+    # are materialised in memory (JSON, or mode=postgis)
+    GEO_MATRIX_MAX_CELLS: int = 25_000_000
+    GEO_MATRIX_MAX_CELLS_BUFFERED: int = 1_000_000
+    # POST /api/geo/distance/batch
+    GEO_DISTANCE_BATCH_MAX_PAIRS: int = 100_000
+
+    # Per-route cache of GET /api/geo/route-length(s) results (entries; 0 disables)
+    ROUTE_LENGTH_CACHE_SIZE: int = 10_000
+
+    # In-memory nearest-depot index (GET /api/geo/nearest-depot); the depot table is
+    # re-checked every DEPOT_INDEX_REFRESH_S seconds and the index rebuilt on change
+    DEPOT_INDEX_ENABLED: bool = True
+    DEPOT_INDEX_REFRESH_S: float = 30.0
+
+    # /api/analytics/kpis source: "counters" (shipment_kpi_daily rollup) or "scan" (shipments)
+    KPI_SOURCE: str = "counters"
 
     # Postgres connection info (Docker compose defaults)
     POSTGRES_HOST: str = "localhost"
@@ -30,5 +87,19 @@ class Settings(BaseSettings):
             )
         raise ValueError("Unsupported DB_DRIVER")
 
+    # Same database, asyncpg driver (used when DB_MODE=async)
+    @property
+    def sqlalchemy_async_url(self) -> str:
+        if self.DB_DRIVER == "postgres":
+            return (
+                f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+                f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+            )
+        raise ValueError("Unsupported DB_DRIVER")
+
+    @property
+    def use_async_db(self) -> bool:
+        return self.DB_MODE == "async"
+
 
 settings = Settings()
@@ -0,0 +1,133 @@
+# Process-local spatial index over WGS84 points (KD-tree on unit-sphere vectors).
+#
+# Points are stored as 3-D unit vectors, where straight-line (chord) distance grows
+# monotonically with great-circle distance, so an ordinary KD-tree gives exact
+# spherical nearest-neighbour and radius answers with no antimeridian/pole cases.
+# Results are re-ranked and reported with the WGS84 ellipsoidal distance, which is
+# what PostGIS geography ST_Distance returns.
+
+import heapq
+import math
+from collections.abc import Sequence
+
+from .geodesy import EARTH_RADIUS_M, vincenty_scalar
+
+# Sphere vs ellipsoid distances differ by < 0.7%; candidates within this factor of the
+# k-th spherical distance are re-ranked on the ellipsoid so the result is exact there.
+_RERANK_MARGIN = 1.01
+
+
+def _unit(lat: float, lon: float) -> tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def _chord(meters: float) -> float:
+    """Chord length on the unit sphere for a great-circle distance in metres."""
+    return 2 * math.sin(min(meters / EARTH_RADIUS_M, math.pi) / 2)
+
+
+def _meters(chord: float) -> float:
+    return 2 * EARTH_RADIUS_M * math.asin(min(chord / 2, 1.0))
+
+
+class SphereKDTree:
+    """Static KD-tree; rebuild to change the point set (depots change rarely)."""
+
+    def __init__(self, keys: Sequence, lats: Sequence[float], lons: Sequence[float]):
+        self.keys = list(keys)
+        self.lats = [float(v) for v in lats]
+        self.lons = [float(v) for v in lons]
+        self.xyz = [_unit(lat, lon) for lat, lon in zip(self.lats, self.lons, strict=True)]
+        # Flat node arrays: point index, split axis, left child, right child (-1 = none)
+        self._point: list[int] = []
+        self._axis: list[int] = []
+        self._left: list[int] = []
+        self._right: list[int] = []
+        self._root = self._build(list(range(len(self.keys))), 0)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _build(self, idx: list[int], depth: int) -> int:
+        if not idx:
+            return -1
+        # Split on the axis with the widest spread
+        spans = [
+            max(self.xyz[i][a] for i in idx) - min(self.xyz[i][a] for i in idx) for a in range(3)
+        ]
+        axis = spans.index(max(spans))
+        idx.sort(key=lambda i: self.xyz[i][axis])
+        mid = len(idx) // 2
+        node = len(self._point)
+        self._point.append(idx[mid])
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._left[node] = self._build(idx[:mid], depth + 1)
+        self._right[node] = self._build(idx[mid + 1 :], depth + 1)
+        return node
+
+    def _search(self, q: tuple[float, float, float], k: int | None, max_chord: float) -> list:
+        """Max-heap of (-chord², point) for the k closest within ``max_chord`` (all if k None)."""
+        heap: list[tuple[float, int]] = []
+        bound = max_chord * max_chord
+        # (node, squared distance from q to the node's half-space): re-checked on pop
+        # because the k-nearest bound shrinks after the far side was queued
+        stack = [(self._root, 0.0)] if self._root >= 0 else []
+        while stack:
+            node, gap = stack.pop()
+            if gap > bound:
+                continue
+            i = self._point[node]
+            p = self.xyz[i]
+            d2 = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d2 <= bound:
+                heapq.heappush(heap, (-d2, i))
+                if k is not None and len(heap) > k:
+                    heapq.heappop(heap)
+                if k is not None and len(heap) == k:
+                    bound = min(bound, -heap[0][0])
+            axis = self._axis[node]
+            diff = q[axis] - p[axis]
+            if diff < 0:
+                near, far = self._left[node], self._right[node]
+            else:
+                near, far = self._right[node], self._left[node]
+            # Push the far side first so the near side is explored first
+            if far >= 0 and diff * diff <= bound:
+                stack.append((far, diff * diff))
+            if near >= 0:
+                stack.append((near, 0.0))
+        return heap
+
+    def _rank(self, lat: float, lon: float, candidates) -> list[tuple[object, float]]:
+        out = [(vincenty_scalar(lat, lon, self.lats[i], self.lons[i]), i) for _, i in candidates]
+        out.sort()
+        return [(self.keys[i], d) for d, i in out]
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 1, radius_m: float | None = None
+    ) -> list[tuple[object, float]]:
+        """Up to ``k`` (key, metres) pairs, closest first, optionally within ``radius_m``."""
+        if not self.keys or k < 1:
+            return []
+        q = _unit(lat, lon)
+        limit = 2.0 if radius_m is None else _chord(radius_m * _RERANK_MARGIN)
+        heap = self._search(q, k, limit)
+        if not heap:
+            return []
+        # Widen to every point near the k-th spherical distance, then rank on the ellipsoid
+        kth = math.sqrt(-min(heap)[0])
+        widened = self._search(q, None, min(limit, _chord(_meters(kth) * _RERANK_MARGIN) + 1e-12))
+        ranked = self._rank(lat, lon, widened)
+        if radius_m is not None:
+            ranked = [(key, d) for key, d in ranked if d <= radius_m]
+        return ranked[:k]
+
+    def within(self, lat: float, lon: float, radius_m: float) -> list[tuple[object, float]]:
+        """All (key, metres) pairs within ``radius_m``, closest first."""
+        if not self.keys:
+            return []
+        heap = self._search(_unit(lat, lon), None, _chord(radius_m * _RERANK_MARGIN))
+        return [(key, d) for key, d in self._rank(lat, lon, heap) if d <= radius_m]
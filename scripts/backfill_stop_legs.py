@@ -0,0 +1,64 @@
+"""
+Fill stops.leg_m / stops.cum_m for existing routes, a chunk of routes per transaction.
+
+    python -m scripts.backfill_stop_legs --chunk 500
+    python -m scripts.backfill_stop_legs --all     # recompute every route
+
+New and resequenced stops are maintained by triggers; this only covers rows written
+before the leg columns existed (leg_m IS NULL, found via ix_stops_legs_pending). Each
+chunk runs recompute_route_legs() and commits, so locks are short, progress survives
+interruption and re-running resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+
+PENDING_SQL = text(
+    """
+    SELECT DISTINCT route_id FROM stops
+    WHERE leg_m IS NULL AND route_id > :after
+    ORDER BY route_id
+    LIMIT :chunk
+"""
+)
+ALL_SQL = text("SELECT id FROM routes WHERE id > :after ORDER BY id LIMIT :chunk")
+RECOMPUTE_SQL = text("SELECT recompute_route_legs(CAST(:route_ids AS integer[]))")
+
+
+def run(chunk: int, recompute_all: bool) -> None:
+    db = SessionLocal()
+    after, routes, chunks = 0, 0, 0
+    t0 = time.perf_counter()
+    try:
+        while True:
+            stmt = ALL_SQL if recompute_all else PENDING_SQL
+            ids = db.scalars(stmt, {"after": after, "chunk": chunk}).all()
+            if not ids:
+                break
+            t1 = time.perf_counter()
+            db.execute(RECOMPUTE_SQL, {"route_ids": list(ids)})
+            db.commit()
+            after = ids[-1]
+            routes += len(ids)
+            chunks += 1
+            print(
+                f"chunk {chunks}: {len(ids)} routes up to id {after} "
+                f"in {(time.perf_counter() - t1) * 1000:.0f} ms"
+            )
+    finally:
+        db.close()
+    print(f"Backfilled legs of {routes} routes in {chunks} chunks, {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk", type=int, default=500, help="routes per transaction")
+    parser.add_argument("--all", action="store_true", help="recompute routes with legs too")
+    args = parser.parse_args()
+    run(args.chunk, args.all)
@@ -0,0 +1,111 @@
+"""
+Address creation latency: legacy four-round-trip path vs INSERT ... RETURNING.
+
+    python -m scripts.bench_address_create --n 500
+
+"legacy" replays the previous AddressesService.create sequence (INSERT, commit,
+refresh SELECT, UPDATE geom, commit); "returning" calls the current service.
+Both variants also time an update. Rows created here are deleted afterwards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import delete, text
+
+from app import models
+from app.db import SessionLocal
+from app.schemas import AddressIn
+from app.services.addresses import AddressesService
+
+MARKER = "BENCH-ADDR"
+service = AddressesService()
+
+
+def _payload(i: int) -> AddressIn:
+    return AddressIn(
+        name=MARKER,
+        line1=f"Bench street {i}",
+        city="Amsterdam",
+        zip_code="1011AB",
+        country_code="NL",
+        lat=52.3 + random.random() * 0.1,
+        lon=4.8 + random.random() * 0.1,
+    )
+
+
+def legacy_create(db, payload: AddressIn) -> models.Address:
+    obj = models.Address(**payload.model_dump())
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    db.execute(
+        text(
+            "UPDATE addresses SET geom = ST_SetSRID(ST_MakePoint(:lon, :lat), 4326) WHERE id = :id"
+        ),
+        {"lon": obj.lon, "lat": obj.lat, "id": obj.id},
+    )
+    db.commit()
+    return obj
+
+
+def legacy_update(db, address_id: int, payload: AddressIn) -> models.Address:
+    obj = db.get(models.Address, address_id)
+    for k, v in payload.model_dump().items():
+        setattr(obj, k, v)
+    db.commit()
+    db.refresh(obj)
+    db.execute(
+        text(
+            "UPDATE addresses SET geom = ST_SetSRID(ST_MakePoint(:lon, :lat), 4326) WHERE id = :id"
+        ),
+        {"lon": obj.lon, "lat": obj.lat, "id": obj.id},
+    )
+    db.commit()
+    return obj
+
+
+def _summary(label: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return f"{label:<22}{statistics.median(samples):>10.3f}{p95:>10.3f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Address create/update latency")
+    parser.add_argument("--n", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        results: dict[str, list[float]] = {}
+        for label, create, upd in (
+            ("legacy", legacy_create, legacy_update),
+            ("returning", service.create, service.update),
+        ):
+            created, updated = [], []
+            for i in range(args.n):
+                t0 = time.perf_counter()
+                obj = create(db, _payload(i))
+                created.append((time.perf_counter() - t0) * 1000.0)
+                t0 = time.perf_counter()
+                upd(db, obj.id, _payload(i))
+                updated.append((time.perf_counter() - t0) * 1000.0)
+            results[f"{label} create"] = created
+            results[f"{label} update"] = updated
+
+        print(f"{'variant':<22}{'p50_ms':>10}{'p95_ms':>10}")
+        for label, samples in results.items():
+            print(_summary(label, samples))
+    finally:
+        db.execute(delete(models.Address).where(models.Address.name == MARKER))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare sync vs async DB mode under concurrent HTTP load.
+
+Start two API instances, one per mode, then point the benchmark at both:
+
+    DB_MODE=sync  uvicorn app.main:app --port 8001 --workers 1
+    DB_MODE=async uvicorn app.main:app --port 8002 --workers 1
+    python -m scripts.bench_db_mode \
+        --target sync=http://localhost:8001 --target async=http://localhost:8002 \
+        --concurrency 10 40 100 --duration 15
+
+Each target is hit with the same mix of hot read paths; throughput and latency
+percentiles are printed per (target, concurrency).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+PATHS = [
+    "/api/shipments/{id}",
+    "/api/parcels?shipment_id={id}",
+    "/api/parcels/{id}",
+    "/api/tracking-events/parcel/{id}",
+    "/api/geo/nearest-depot?lat=52.37&lon=4.90",
+]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _worker(client: httpx.AsyncClient, deadline: float, max_id: int, out: dict) -> None:
+    while time.perf_counter() < deadline:
+        path = random.choice(PATHS).format(id=random.randint(1, max_id))
+        t0 = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            ok = resp.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        out["latencies"].append(time.perf_counter() - t0)
+        if not ok:
+            out["errors"] += 1
+
+
+async def run_one(base_url: str, concurrency: int, duration: float, max_id: int) -> dict:
+    out: dict = {"latencies": [], "errors": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_worker(client, deadline, max_id, out) for _ in range(concurrency)))
+    lat_ms = [x * 1000.0 for x in out["latencies"]]
+    return {
+        "requests": len(lat_ms),
+        "errors": out["errors"],
+        "rps": len(lat_ms) / duration,
+        "p50_ms": statistics.median(lat_ms) if lat_ms else 0.0,
+        "p95_ms": _percentile(lat_ms, 95),
+        "p99_ms": _percentile(lat_ms, 99),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="label=base_url, e.g. async=http://localhost:8002 (repeatable)",
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 100])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per run")
+    parser.add_argument("--max-id", type=int, default=20, help="upper bound for random ids")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in args.target]
+    print(f"{'target':<10}{'conc':>6}{'req':>9}{'err':>6}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for conc in args.concurrency:
+        for label, url in targets:
+            r = await run_one(url, conc, args.duration, args.max_id)
+            print(
+                f"{label:<10}{conc:>6}{r['requests']:>9}{r['errors']:>6}{r['rps']:>10.1f}"
+                f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
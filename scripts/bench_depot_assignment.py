@@ -0,0 +1,57 @@
+"""
+Nearest-depot assignment kernel on synthetic shipments.
+
+    python -m scripts.bench_depot_assignment --shipments 10000 50000 100000 --depots 100
+
+Recipients and depots are drawn uniformly from a country-sized box. Times the
+vectorized ``nearest_depots`` (haversine candidates, Vincenty re-rank) against the
+per-shipment path the API offered before (one KD-tree lookup per shipment, as
+``GET /api/geo/nearest-depot`` does) and checks that both pick the same depots.
+No database is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.depot_assignment import nearest_depots
+from app.spatial_index import SphereKDTree
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--shipments", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    ap.add_argument("--depots", type=int, default=100)
+    ap.add_argument("--per-point-sample", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    d_lats = rng.uniform(36.0, 42.0, args.depots)
+    d_lons = rng.uniform(26.0, 45.0, args.depots)
+    tree = SphereKDTree(list(range(args.depots)), d_lats, d_lons)
+
+    for n in args.shipments:
+        lats = rng.uniform(36.0, 42.0, n)
+        lons = rng.uniform(26.0, 45.0, n)
+        t0 = time.perf_counter()
+        idx, _ = nearest_depots(lats, lons, d_lats, d_lons)
+        batch_ms = (time.perf_counter() - t0) * 1000
+
+        sample = min(n, args.per_point_sample)
+        t0 = time.perf_counter()
+        single = [tree.nearest(lats[i], lons[i])[0][0] for i in range(sample)]
+        per_point_ms = (time.perf_counter() - t0) * 1000 * n / sample
+        same = int((idx[:sample] == np.array(single)).sum())
+        print(
+            f"n={n:7d} depots={args.depots}: batch {batch_ms:8.1f} ms | "
+            f"per-shipment (extrapolated) {per_point_ms:8.1f} ms | "
+            f"agree {same}/{sample}"
+        )
+
+
+if __name__ == "__main__":
+    main()
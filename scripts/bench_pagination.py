@@ -0,0 +1,115 @@
+"""
+Offset vs keyset page latency on shipments.
+
+    python -m scripts.bench_pagination --seed 1200000 --offsets 0 10000 100000 1000000
+
+`--seed N` tops the shipments table up to N rows with a set-based INSERT
+(reusing existing address ids). For every offset the script times the
+LIMIT/OFFSET page and the equivalent keyset page (cursor taken from the row
+just before that offset, looked up outside the timed section).
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+
+from app import models
+from app.db import SessionLocal
+from app.pagination import encode_cursor
+from app.services.shipments import ShipmentsService
+
+service = ShipmentsService()
+
+
+def seed(db, target: int) -> None:
+    have = db.scalar(select(func.count(models.Shipment.id))) or 0
+    missing = target - have
+    if missing <= 0:
+        return
+    print(f"seeding {missing} shipments ...")
+    db.execute(
+        text(
+            """
+            INSERT INTO shipments (reference, service_level, status, sender_address_id,
+                                   recipient_address_id, planned_delivery_date,
+                                   created_at, updated_at)
+            SELECT 'BENCH-' || g,
+                   CASE WHEN g % 2 = 0 THEN 'STD' ELSE 'EXP' END,
+                   'CREATED',
+                   (SELECT min(id) FROM addresses),
+                   (SELECT max(id) FROM addresses),
+                   current_date + (g % 30),
+                   now() - make_interval(secs => g),
+                   now()
+            FROM generate_series(1, :n) AS g
+            """
+        ),
+        {"n": missing},
+    )
+    db.commit()
+    db.execute(text("ANALYZE shipments"))
+    db.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offset vs keyset page latency")
+    parser.add_argument("--seed", type=int, default=0, help="ensure at least N shipments")
+    parser.add_argument("--offsets", type=int, nargs="+", default=[0, 10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--sort", default="created_at", choices=["id", "created_at", "planned_delivery_date"]
+    )
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.seed:
+            seed(db, args.seed)
+        sort_col = getattr(models.Shipment, args.sort)
+        print(f"sort={args.sort} limit={args.limit} (median of {args.repeat}, ms)")
+        print(f"{'offset':>10}{'offset_ms':>12}{'keyset_ms':>12}")
+        for off in args.offsets:
+            cursor = None
+            if off:
+                anchor = db.execute(
+                    select(sort_col, models.Shipment.id)
+                    .order_by(sort_col, models.Shipment.id)
+                    .offset(off - 1)
+                    .limit(1)
+                ).first()
+                if anchor is None:
+                    print(f"{off:>10}  (beyond table size, skipped)")
+                    continue
+                cursor = encode_cursor(args.sort, anchor[0], anchor[1])
+
+            def by_offset(off=off):
+                service.list(db, status=None, limit=args.limit, offset=off, sort=args.sort)
+
+            def by_cursor(cursor=cursor):
+                service.list(
+                    db, status=None, limit=args.limit, offset=0, sort=args.sort, cursor=cursor
+                )
+
+            offset_ms = timed(by_offset, args.repeat)
+            keyset_ms = timed(by_cursor, args.repeat)
+            print(f"{off:>10}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Route optimizer engine throughput on synthetic stops.
+
+    python -m scripts.bench_route_optimizer --sizes 50 500 5000
+    python -m scripts.bench_route_optimizer --legacy-db 50   # old per-pair ST_Distance loop
+
+Points are drawn uniformly from a ~100 km box. For every size the script times
+the distance matrix build and the nearest-neighbour construction separately for
+each metric, followed by the local search stage (2-opt / Or-opt / relocate) and
+its gain over the greedy tour. ``--legacy-db N`` replays the previous
+implementation (one ``SELECT ST_Distance`` per candidate per step) against the
+database for comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func, select
+
+from app.geodesy import distance_matrix
+from app.services.route_optimizer import local_search, nearest_neighbour, tour_length
+
+
+def synthetic(n: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    return rng.uniform(51.9, 52.8, n), rng.uniform(4.2, 5.6, n)
+
+
+def bench_engine(sizes: list[int], metrics: list[str], seed: int, max_ms: float | None) -> None:
+    rng = np.random.default_rng(seed)
+    print(
+        f"{'n':>6} {'metric':>12} {'matrix ms':>10} {'nn ms':>8} {'nn km':>8} "
+        f"{'ls ms':>8} {'ls km':>8} {'gain':>6}"
+    )
+    for n in sizes:
+        lats, lons = synthetic(n, rng)
+        for metric in metrics:
+            t0 = time.perf_counter()
+            matrix = distance_matrix(lats, lons, metric=metric)
+            t1 = time.perf_counter()
+            order = nearest_neighbour(matrix)
+            t2 = time.perf_counter()
+            improved, _ = local_search(matrix, order, max_ms=max_ms)
+            t3 = time.perf_counter()
+            before, after = tour_length(matrix, order), tour_length(matrix, improved)
+            print(
+                f"{n:>6} {metric:>12} {(t1 - t0) * 1000:>10.1f} {(t2 - t1) * 1000:>8.1f} "
+                f"{before / 1000:>8.1f} {(t3 - t2) * 1000:>8.1f} {after / 1000:>8.1f} "
+                f"{(1 - after / before) * 100:>5.1f}%"
+            )
+
+
+def bench_legacy(n: int, seed: int) -> None:
+    from app.db import SessionLocal
+
+    lats, lons = synthetic(n, np.random.default_rng(seed))
+    pts = [
+        cast(func.ST_SetSRID(func.ST_MakePoint(float(lo), float(la)), 4326), Geography)
+        for la, lo in zip(lats, lons, strict=True)
+    ]
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        queries = 0
+        order, remaining = [0], list(range(1, n))
+        while remaining:
+            cur = order[-1]
+            dists = []
+            for nxt in remaining:
+                d = db.scalar(select(func.ST_Distance(pts[cur], pts[nxt])))
+                dists.append((nxt, d))
+                queries += 1
+            nxt, _ = min(dists, key=lambda x: x[1])
+            order.append(nxt)
+            remaining.remove(nxt)
+        elapsed = time.perf_counter() - t0
+    print(f"legacy n={n}: {queries} queries, {elapsed * 1000:.0f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    ap.add_argument(
+        "--metrics",
+        nargs="+",
+        default=["haversine", "ellipsoidal"],
+        choices=["haversine", "ellipsoidal"],
+    )
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument(
+        "--max-ms", type=float, default=None, help="local search budget (default: none)"
+    )
+    ap.add_argument(
+        "--legacy-db", type=int, metavar="N", help="also time the old DB loop for N stops"
+    )
+    args = ap.parse_args()
+
+    bench_engine(args.sizes, args.metrics, args.seed, args.max_ms)
+    if args.legacy_db:
+        bench_legacy(args.legacy_db, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Capacitated route planning on synthetic depots.
+
+    python -m scripts.bench_route_planner --shipments 1000 3000 5000 --vehicles 40
+
+Customers are drawn uniformly from a ~100 km box around the depot with random
+weight/volume; every vehicle gets the same capacity (``--cap-kg``, ``--cap-dm3``).
+Prints construction/improvement time, total distance before and after local search,
+and how many shipments did not fit the fleet. No database is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.geodesy import distance_matrix
+from app.services.route_planner import PlanProblem, plan_routes, polar_angles, sweep
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--shipments", type=int, nargs="+", default=[1000, 3000, 5000])
+    ap.add_argument("--vehicles", type=int, default=40)
+    ap.add_argument("--cap-kg", type=float, default=2000)
+    ap.add_argument("--cap-dm3", type=float, default=6000)
+    ap.add_argument("--max-ms", type=float, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(
+        f"{'n':>6} {'matrix ms':>10} {'plan ms':>8} {'sweep km':>9} {'final km':>9} "
+        f"{'routes':>7} {'unplaced':>9}"
+    )
+    for n in args.shipments:
+        lats = np.r_[52.35, rng.uniform(51.9, 52.8, n)]
+        lons = np.r_[4.9, rng.uniform(4.2, 5.6, n)]
+        t0 = time.perf_counter()
+        problem = PlanProblem(
+            matrix=distance_matrix(lats, lons),
+            kg=np.r_[0.0, rng.uniform(1, 30, n)],
+            dm3=np.r_[0.0, rng.uniform(1, 100, n)],
+            cap_kg=np.full(args.vehicles, args.cap_kg),
+            cap_dm3=np.full(args.vehicles, args.cap_dm3),
+            angles=polar_angles(lats, lons),
+        )
+        t1 = time.perf_counter()
+        initial, _, _ = sweep(problem)
+        routes, oversized, unplaced, _ = plan_routes(problem, max_ms=args.max_ms)
+        t2 = time.perf_counter()
+        before = sum(problem.route_length(r) for r in initial)
+        after = sum(problem.route_length(r) for r in routes)
+        print(
+            f"{n:>6} {(t1 - t0) * 1000:>10.1f} {(t2 - t1) * 1000:>8.1f} {before / 1000:>9.0f} "
+            f"{after / 1000:>9.0f} {sum(1 for r in routes if r):>7} "
+            f"{len(oversized) + len(unplaced):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Time-window route optimization on synthetic stops.
+
+    python -m scripts.bench_route_time_windows --sizes 100 300 1000 --max-ms 5000
+
+For every size a hidden reference tour (angular sweep around the start) is timed
+at ``--speed-kmh`` with ``--service-s`` per stop, and a fraction of the stops gets
+a ``--width-s`` window around its reference arrival, so a zero-lateness sequence
+exists. Prints the reference distance, then lateness and distance of the greedy start
+and after local search.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.geodesy import distance_matrix
+from app.services.route_time_windows import (
+    Schedule,
+    build_problem,
+    initial_order,
+    time_window_search,
+)
+
+
+def synthetic(n: int, args, rng: np.random.Generator):
+    lats = np.r_[52.35, rng.uniform(52.2, 52.5, n)]
+    lons = np.r_[4.9, rng.uniform(4.7, 5.1, n)]
+    dist = distance_matrix(lats, lons)
+    reference = np.argsort(np.arctan2(lats[1:] - lats[0], lons[1:] - lons[0])) + 1
+    speed = args.speed_kmh / 3.6
+    t, prev, arrival = 0.0, 0, {}
+    for v in reference.tolist():
+        t += dist[prev, v] / speed
+        arrival[v] = t
+        t += args.service_s
+        prev = v
+    early: list[float | None] = [None]
+    late: list[float | None] = [None]
+    for v in range(1, n + 1):
+        if rng.random() < args.windowed:
+            start = max(0.0, arrival[v] - rng.uniform(0, args.width_s))
+            early.append(start)
+            late.append(start + args.width_s)
+        else:
+            early.append(None)
+            late.append(None)
+    problem = build_problem(dist, args.speed_kmh, early, late, [0.0] + [args.service_s] * n)
+    return problem, Schedule(problem, [0, *reference.tolist()]).total_dist
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    ap.add_argument("--max-ms", type=float, default=5000)
+    ap.add_argument("--speed-kmh", type=float, default=30)
+    ap.add_argument("--service-s", type=float, default=120)
+    ap.add_argument("--width-s", type=float, default=3600)
+    ap.add_argument("--windowed", type=float, default=0.6, help="fraction of stops with a window")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(
+        f"{'n':>6} {'ref km':>8} {'late s (start)':>15} {'km (start)':>11} "
+        f"{'late s':>10} {'km':>8} {'ms':>8} {'moves':>6} stopped"
+    )
+    for n in args.sizes:
+        problem, reference_m = synthetic(n, args, rng)
+        t0 = time.perf_counter()
+        order = initial_order(problem)
+        start = Schedule(problem, list(order))
+        sched, stats = time_window_search(problem, order, max_ms=args.max_ms)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(
+            f"{n:>6} {reference_m / 1000:>8.1f} {start.total_late:>15.0f} "
+            f"{start.total_dist / 1000:>11.1f} {sched.total_late:>10.0f} "
+            f"{sched.total_dist / 1000:>8.1f} {elapsed:>8.0f} "
+            f"{sum(stats.moves.values()):>6} {stats.stopped}"
+        )
+
+
+if __name__ == "__main__":
+    main()
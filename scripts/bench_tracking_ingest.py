@@ -0,0 +1,104 @@
+"""
+Throughput and peak RSS of the streaming NDJSON tracking ingest.
+
+    python -m scripts.bench_tracking_ingest --events 2000000 [--chunk-size 5000] [--keep]
+
+Writes a synthetic NDJSON file (events for existing parcel ids) to a temp
+path, then runs `python -m app.services.tracking_ingest` on it in a child
+process so its peak RSS can be read from getrusage(RUSAGE_CHILDREN).
+Peak RSS should stay flat as --events grows; only --chunk-size moves it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import models
+from app.db import SessionLocal
+
+CODES = ["COLLECTED", "IN_DEPOT", "OUT_FOR_DELIVERY"]
+
+
+def write_events(path: str, n: int, parcel_ids: list[int]) -> None:
+    start = datetime(2025, 1, 1)
+    with open(path, "w") as fh:
+        for i in range(n):
+            evt = {
+                "parcel_id": random.choice(parcel_ids),
+                "code": random.choice(CODES),
+                "event_time": (start + timedelta(seconds=i)).isoformat(),
+                "lat": 52.0 + random.random(),
+                "lon": 4.5 + random.random(),
+                "location_name": "BENCH",
+            }
+            fh.write(json.dumps(evt) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming tracking ingest benchmark")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--keep", action="store_true", help="keep the generated file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        parcel_ids = db.execute(select(models.Parcel.id)).scalars().all()
+    finally:
+        db.close()
+    if not parcel_ids:
+        sys.exit("no parcels found; run `python -m scripts.seed` first")
+
+    fd, path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        write_events(path, args.events, parcel_ids)
+        size_mb = os.path.getsize(path) / 1e6
+        print(
+            f"generated {args.events} events ({size_mb:.1f} MB) in {time.perf_counter() - t0:.1f}s"
+        )
+
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "app.services.tracking_ingest",
+                path,
+                "--chunk-size",
+                str(args.chunk_size),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - t0
+        report = json.loads(proc.stdout.strip().splitlines()[-1])
+        # ru_maxrss is KiB on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(
+            f"created={report['created']} rejected={report['rejected']} "
+            f"events/s={report['created'] / wall:.0f} peak_rss={peak_rss_mb:.1f} MB "
+            f"input={size_mb:.1f} MB"
+        )
+    finally:
+        if args.keep:
+            print(f"kept {path}")
+        else:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
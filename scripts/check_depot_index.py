@@ -0,0 +1,75 @@
+"""
+Consistency and latency of the in-memory depot index against PostGIS.
+
+    python -m scripts.check_depot_index --queries 2000
+
+Loads the index the way the API does, then for random points around the depots
+compares the in-memory nearest depot with the SQL answer (geography ST_Distance,
+ORDER BY ... LIMIT 1). A different depot is only accepted when it is a tie, i.e.
+both distances agree within --tolerance metres. Prints mismatches and per-query
+latency percentiles for both paths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.db import SessionLocal
+from app.routers.geo import _nearest_depot_stmt
+from app.services.depot_index import DEPOTS_SQL, DepotIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--spread-deg", type=float, default=0.5, help="jitter around depots")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="metres, for ties")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = DepotIndex(refresh_s=0)
+    with SessionLocal() as db:
+        depots = db.execute(DEPOTS_SQL).all()
+        if not depots:
+            raise SystemExit("no depot with geometry")
+        t0 = time.perf_counter()
+        index.load(db)
+        print(f"loaded {len(depots)} depots in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+        mem_us, sql_us, mismatches = [], [], 0
+        for _ in range(args.queries):
+            base = rng.choice(depots)
+            lat = max(-90.0, min(90.0, base.lat + rng.uniform(-1, 1) * args.spread_deg))
+            lon = (base.lon + rng.uniform(-1, 1) * args.spread_deg + 180) % 360 - 180
+
+            t0 = time.perf_counter()
+            mem = index.nearest(lat, lon)[0]
+            mem_us.append((time.perf_counter() - t0) * 1e6)
+
+            t0 = time.perf_counter()
+            depot, sql_m = db.execute(_nearest_depot_stmt(lat, lon)).first()
+            sql_us.append((time.perf_counter() - t0) * 1e6)
+
+            same = mem["depot"]["id"] == depot.id
+            if not same and abs(mem["distance_m"] - float(sql_m)) > args.tolerance:
+                mismatches += 1
+                print(
+                    f"mismatch at ({lat:.6f}, {lon:.6f}): index {mem['depot']['id']} "
+                    f"{mem['distance_m']:.2f} m, postgis {depot.id} {float(sql_m):.2f} m"
+                )
+
+    for name, us in (("index", mem_us), ("postgis", sql_us)):
+        p50, p95, p99 = np.percentile(us, [50, 95, 99])
+        print(f"{name:8s} p50 {p50:9.1f} us  p95 {p95:9.1f} us  p99 {p99:9.1f} us")
+    print(f"{mismatches} mismatches in {args.queries} queries")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Assert that the proximity endpoints are served by the gist index on addresses.geom.
+
+    python -m scripts.check_geo_index_usage --radius-m 2000
+    python -m scripts.check_geo_index_usage --no-seqscan   # small dev databases
+
+Runs EXPLAIN (FORMAT JSON) on the exact statements behind
+``GET /api/geo/addresses/within`` (first page and a keyset page) and
+``GET /api/geo/depots/nearby`` and walks the plan tree for an index scan on
+``idx_addresses_geom``. The address queries must use it (exit status 1 otherwise).
+The depot query is reported only: with few depots, scanning them and sorting can be
+the cheaper plan. On a tiny table the planner rightly prefers a sequential scan;
+``--no-seqscan`` disables it for the session to prove the index is usable at all.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.db import SessionLocal
+from app.pagination import encode_cursor
+from app.services.geo_search import CURSOR_SORT, addresses_within_stmt, nearby_depots_stmt
+
+INDEX = "idx_addresses_geom"
+
+
+def _explain(db, stmt, analyze: bool) -> dict:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    opts = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    plan = db.execute(text(f"EXPLAIN ({opts}) {sql}")).scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+
+def _nodes(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _report(name: str, explained: dict, required: bool) -> bool:
+    nodes = list(_nodes(explained["Plan"]))
+    used = any(n.get("Index Name") == INDEX for n in nodes)
+    shape = " > ".join(n["Node Type"] for n in nodes)
+    timing = f", {explained['Execution Time']:.3f} ms" if "Execution Time" in explained else ""
+    status = "ok" if used else ("FAIL" if required else "info")
+    print(f"[{status}] {name}: {INDEX} {'used' if used else 'NOT used'}{timing}\n       {shape}")
+    return used or not required
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lat", type=float, help="default: a random address with geom")
+    parser.add_argument("--lon", type=float)
+    parser.add_argument("--radius-m", type=float, default=2000.0)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (runs them)")
+    parser.add_argument("--no-seqscan", action="store_true", help="SET enable_seqscan = off")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.no_seqscan:
+            db.execute(text("SET enable_seqscan = off"))
+        lat, lon = args.lat, args.lon
+        if lat is None or lon is None:
+            row = db.execute(
+                text(
+                    "SELECT ST_Y(geom::geometry), ST_X(geom::geometry) FROM addresses "
+                    "WHERE geom IS NOT NULL ORDER BY random() LIMIT 1"
+                )
+            ).first()
+            if row is None:
+                raise SystemExit("no address with geom")
+            lat, lon = row
+        print(f"point ({lat:.6f}, {lon:.6f}), radius {args.radius_m:.0f} m")
+
+        # A keyset page: seek past a plausible (distance, id) from the middle of the radius
+        cursor = encode_cursor(CURSOR_SORT, args.radius_m / 2, 0)
+        checks = [
+            ("addresses/within", addresses_within_stmt(lat, lon, args.radius_m, limit=args.limit)),
+            (
+                "addresses/within (cursor)",
+                addresses_within_stmt(lat, lon, args.radius_m, limit=args.limit, cursor=cursor),
+            ),
+        ]
+        ok = all([_report(name, _explain(db, stmt, args.analyze), True) for name, stmt in checks])
+        _report("depots/nearby", _explain(db, nearby_depots_stmt(lat, lon, 5), args.analyze), False)
+        db.rollback()
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
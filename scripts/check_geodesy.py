@@ -0,0 +1,69 @@
+"""
+Accuracy of the in-process distance engine against PostGIS.
+
+    python -m scripts.check_geodesy --pairs 2000
+
+Samples random address pairs with geom, computes ST_Distance on geography
+(spheroid) in the database and compares it with ``app.geodesy`` haversine and
+ellipsoidal distances. Prints absolute and relative error percentiles.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.geodesy import distance
+
+PAIRS_SQL = text(
+    """
+    WITH a AS (
+        SELECT id, geom FROM addresses WHERE geom IS NOT NULL ORDER BY random() LIMIT :n
+    ),
+    b AS (
+        SELECT id, geom FROM addresses WHERE geom IS NOT NULL ORDER BY random() LIMIT :n
+    ),
+    pairs AS (
+        SELECT a.geom AS g1, b.geom AS g2
+        FROM (SELECT *, row_number() OVER () AS rn FROM a) a
+        JOIN (SELECT *, row_number() OVER () AS rn FROM b) b USING (rn)
+    )
+    SELECT ST_Y(g1::geometry), ST_X(g1::geometry),
+           ST_Y(g2::geometry), ST_X(g2::geometry),
+           ST_Distance(g1, g2)
+    FROM pairs
+    """
+)
+
+
+def report(name: str, ours: np.ndarray, ref: np.ndarray) -> None:
+    err = np.abs(ours - ref)
+    rel = np.divide(err, ref, out=np.zeros_like(err), where=ref > 0)
+    p50, p99 = np.percentile(err, [50, 99])
+    print(
+        f"{name:>12}: abs err p50={p50:.3f} m  p99={p99:.3f} m  max={err.max():.3f} m  "
+        f"rel max={rel.max() * 100:.4f}%"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pairs", type=int, default=2000)
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        rows = np.array(db.execute(PAIRS_SQL, {"n": args.pairs}).all(), dtype=np.float64)
+    if rows.size == 0:
+        raise SystemExit("no addresses with geom; run scripts/seed.py first")
+
+    lat1, lon1, lat2, lon2, ref = rows.T
+    print(f"{len(ref)} pairs, PostGIS distance range {ref.min():.0f}..{ref.max():.0f} m")
+    report("haversine", distance(lat1, lon1, lat2, lon2, metric="haversine"), ref)
+    report("ellipsoidal", distance(lat1, lon1, lat2, lon2, metric="ellipsoidal"), ref)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Assert that the tracking repository's time-bounded queries prune tracking_events partitions.
+
+    python -m scripts.check_partition_pruning
+    python -m scripts.check_partition_pruning --month 2026-10 --parcel-id 42
+
+Runs EXPLAIN (FORMAT JSON) on the exact statements behind
+``GET /api/tracking-events/parcel/{id}`` and ``/shipment/{id}`` and collects the
+partitions left in each plan:
+
+* a window inside one month (``since``/``until``) must scan that month only;
+* a keyset page whose cursor lies in a month must not scan any earlier month
+  (the redundant ``event_time >= key`` of the seek is what allows pruning);
+* an unbounded first page is reported only, it has to visit every partition.
+
+Exits with status 1 when a required case scans more than allowed, so CI catches a
+query change that silently defeats pruning.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date, datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app import models
+from app.db import SessionLocal
+from app.repositories.tracking import _parcel_events_stmt, _shipment_timeline_stmt
+from app.services.tracking_partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    attached_partitions,
+    month_start,
+    parse_partition_name,
+)
+
+
+def _scanned(db, stmt) -> set[str]:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    root = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    found, stack = set(), [root]
+    while stack:
+        node = stack.pop()
+        name = node.get("Relation Name", "")
+        if name.startswith("tracking_events_"):
+            found.add(name)
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def _check(name: str, scanned: set[str], allowed, required: bool = True) -> bool:
+    extra = sorted(p for p in scanned if not allowed(p))
+    ok = not extra
+    status = "ok" if ok else ("FAIL" if required else "info")
+    print(f"[{status}] {name}: {len(scanned)} partition(s) scanned: {', '.join(sorted(scanned))}")
+    if extra:
+        print(f"       not pruned: {', '.join(extra)}")
+    return ok or not required
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--month", help="YYYY-MM to probe (default: current month)")
+    parser.add_argument("--parcel-id", type=int, help="default: any parcel")
+    parser.add_argument("--shipment-id", type=int, help="default: that parcel's shipment")
+    args = parser.parse_args()
+
+    month = date.fromisoformat(f"{args.month}-01") if args.month else month_start(date.today())
+    nxt = add_months(month, 1)
+    since, until = datetime(month.year, month.month, 1), datetime(nxt.year, nxt.month, 1)
+    cursor = (datetime(month.year, month.month, 15), 0)
+
+    with SessionLocal() as db:
+        months, _ = attached_partitions(db)
+        if month not in months:
+            raise SystemExit(
+                f"no partition for {month:%Y-%m}; run app.services.tracking_partitions"
+            )
+        parcel_id = args.parcel_id or db.scalar(select(func.min(models.Parcel.id))) or 1
+        shipment_id = args.shipment_id or db.scalar(
+            select(models.Parcel.shipment_id).where(models.Parcel.id == parcel_id)
+        )
+
+        def only_month(p: str) -> bool:
+            return parse_partition_name(p) == month
+
+        def from_month(p: str) -> bool:
+            m = parse_partition_name(p)
+            return p == DEFAULT_PARTITION or (m is not None and m >= month)
+
+        page = {"limit": 50, "offset": 0}
+        cases = [
+            (
+                "parcel, one-month window",
+                _parcel_events_stmt(parcel_id, after=None, since=since, until=until, **page),
+                only_month,
+                True,
+            ),
+            (
+                "shipment timeline, one-month window",
+                _shipment_timeline_stmt(
+                    shipment_id or 1, after=None, since=since, until=until, **page
+                ),
+                only_month,
+                True,
+            ),
+            (
+                "parcel, keyset page from mid-month",
+                _parcel_events_stmt(parcel_id, after=cursor, **page),
+                from_month,
+                True,
+            ),
+            (
+                "shipment timeline, keyset page from mid-month",
+                _shipment_timeline_stmt(shipment_id or 1, after=cursor, **page),
+                from_month,
+                True,
+            ),
+            (
+                "parcel, unbounded first page",
+                _parcel_events_stmt(parcel_id, after=None, **page),
+                only_month,
+                False,
+            ),
+        ]
+        failures = sum(
+            not _check(name, _scanned(db, stmt), allowed, required)
+            for name, stmt, allowed, required in cases
+        )
+
+    if failures:
+        raise SystemExit(f"{failures} query shape(s) were not pruned")
+
+
+if __name__ == "__main__":
+    main()
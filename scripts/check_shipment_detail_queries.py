@@ -0,0 +1,89 @@
+"""
+Guard against N+1 queries in GET /api/shipments/{id}/full.
+
+    python -m scripts.check_shipment_detail_queries --samples 20
+
+Loads the shipments with the most parcels through ShipmentsService.get_full and
+counts the SQL statements each load sends (SQLAlchemy ``before_cursor_execute``).
+The count must be the same fixed number (``EXPECTED``) for every shipment, however
+many parcels and events it has; otherwise the script exits with status 1, so CI
+fails on an eager-loading regression. For reference it also prints the statement
+count of the three-endpoint path the UI used before (shipment, parcels, events per
+parcel).
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+
+from sqlalchemy import event, func, select
+
+from app import models
+from app.db import SessionLocal
+from app.services.shipments import ShipmentsService
+from app.services.tracking import TrackingService
+
+# shipment + addresses (joined), parcels (SELECT ... IN), events (SELECT ... IN)
+EXPECTED = 3
+
+
+@contextmanager
+def count_statements(db):
+    counter = {"n": 0}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20, help="shipments to load")
+    args = parser.parse_args()
+
+    service, tracking = ShipmentsService(), TrackingService()
+    failures = 0
+    with SessionLocal() as db:
+        busiest = db.execute(
+            select(models.Parcel.shipment_id, func.count())
+            .group_by(models.Parcel.shipment_id)
+            .order_by(func.count().desc())
+            .limit(args.samples)
+        ).all()
+        if not busiest:
+            raise SystemExit("no shipment with parcels")
+
+        for shipment_id, parcels in busiest:
+            db.expunge_all()  # nothing may come from the identity map
+            with count_statements(db) as full:
+                obj = service.get_full(db, shipment_id)
+                events = sum(len(p.events) for p in obj.parcels)
+
+            db.expunge_all()
+            with count_statements(db) as naive:
+                service.get(db, shipment_id)
+                for parcel in db.scalars(
+                    select(models.Parcel).where(models.Parcel.shipment_id == shipment_id)
+                ):
+                    tracking.list_for_parcel(db, parcel.id, limit=200)
+
+            ok = full["n"] == EXPECTED
+            failures += not ok
+            print(
+                f"[{'ok' if ok else 'FAIL'}] shipment {shipment_id}: {parcels} parcels, "
+                f"{events} events -> {full['n']} queries (per-parcel path: {naive['n']})"
+            )
+
+    if failures:
+        raise SystemExit(f"{failures} shipment(s) did not load in {EXPECTED} queries")
+
+
+if __name__ == "__main__":
+    main()
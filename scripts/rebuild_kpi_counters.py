@@ -0,0 +1,33 @@
+"""
+Recompute shipment_kpi_daily from shipments.
+
+    python -m scripts.rebuild_kpi_counters
+
+Takes a SHARE lock on shipments for the duration (writers wait, readers don't),
+so the rebuilt counters match the table exactly when the lock is released.
+"""
+
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import func, select
+
+from app import models
+from app.db import SessionLocal
+from app.repositories.kpi import SqlAlchemyKpiCounterRepository
+
+
+def run() -> None:
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        SqlAlchemyKpiCounterRepository().rebuild(db)
+        rows = db.scalar(select(func.count()).select_from(models.ShipmentKpiDaily))
+        print(f"Rebuilt shipment_kpi_daily: {rows} rows in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+"""
+Replay tracking_events into parcel_status in parallel parcel id chunks.
+
+    python -m scripts.rebuild_parcel_status --workers 4 --chunk 50000
+    python -m scripts.rebuild_parcel_status --reset   # empty the projection first
+
+Each chunk is one transaction on its own connection, replaying the parcels
+lo <= id < hi with the same forward-only upsert as the live write path. It is safe
+while events keep arriving and re-running converges. ``--reset`` truncates the
+projection first. Only use it while writers are stopped, because lookups read
+"no event yet" until their chunk is replayed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import func, select
+
+from app import models
+from app.db import SessionLocal
+from app.repositories.parcel_status import SqlAlchemyParcelStatusRepository
+from app.settings import settings
+
+repo = SqlAlchemyParcelStatusRepository()
+
+
+def replay(lo: int, hi: int) -> tuple[int, int, float]:
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        rows = repo.rebuild_range(db, lo, hi)
+        db.commit()
+    return lo, rows, time.perf_counter() - t0
+
+
+def run(workers: int, chunk: int, reset: bool) -> None:
+    with SessionLocal() as db:
+        if reset:
+            repo.reset(db)
+        lo, hi = db.execute(select(func.min(models.Parcel.id), func.max(models.Parcel.id))).one()
+    if lo is None:
+        print("No parcels")
+        return
+
+    ranges = [(start, min(start + chunk, hi + 1)) for start in range(lo, hi + 1, chunk)]
+    # Keep every worker on its own pooled connection
+    workers = min(workers, len(ranges), settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    t0 = time.perf_counter()
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(replay, a, b) for a, b in ranges]
+        for done, fut in enumerate(as_completed(futures), start=1):
+            start, rows, seconds = fut.result()
+            total += rows
+            print(f"[{done}/{len(ranges)}] parcels from {start}: {rows} rows in {seconds:.2f}s")
+    print(
+        f"Replayed {len(ranges)} chunks with {workers} workers: {total} rows upserted "
+        f"in {time.perf_counter() - t0:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4, help="parallel connections")
+    parser.add_argument("--chunk", type=int, default=50_000, help="parcel ids per transaction")
+    parser.add_argument("--reset", action="store_true", help="truncate parcel_status first")
+    args = parser.parse_args()
+    run(args.workers, args.chunk, args.reset)
@@ -8,6 +8,7 @@ from sqlalchemy import func, select, text
 
 from app import models
 from app.db import SessionLocal
+from app.repositories.kpi import SqlAlchemyKpiCounterRepository
 
 fake = Faker()
 
@@ -153,6 +154,9 @@ def run():
                 seq += 1
             db.commit()
 
+        # Seed writes shipments directly, so bring the KPI rollup in line
+        SqlAlchemyKpiCounterRepository().rebuild(db)
+
         print("Seed completed.")
     finally:
         db.close()